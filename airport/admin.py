@@ -10,7 +10,8 @@ from airport.models import (
     Route,
     Flight,
     Order,
-    Ticket
+    Ticket,
+    SeatHold
 )
 
 admin.site.register(AirplaneType)
@@ -23,3 +24,4 @@ admin.site.register(Route)
 admin.site.register(Flight)
 admin.site.register(Order)
 admin.site.register(Ticket)
+admin.site.register(SeatHold)
@@ -0,0 +1,124 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.renderers import JSONRenderer
+
+from airport.conditional import get_validators, set_validators
+from airport.db_router import _read_database, choose_replica
+from airport.views import FlightViewSet, RouteViewSet
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(
+        JSONRenderer().render(data),
+        content_type="application/json",
+        status=status,
+        headers=headers,
+    )
+
+
+def get_view(viewset_class, request, action, **kwargs):
+    """
+    Viewset instance and DRF request for reusing the filters,
+    serializers, permissions and pagination of the sync viewset.
+    """
+    view = viewset_class(
+        action_map={"get": action},
+        args=(),
+        kwargs=kwargs,
+        format_kwarg=None,
+        headers={},
+    )
+    view.request = view.initialize_request(request, **kwargs)
+    return view, view.request
+
+
+def check_request(view, request):
+    """Authentication, permissions and throttling of the sync viewset"""
+    view.perform_authentication(request)
+    view.check_permissions(request)
+    view.check_throttles(request)
+
+
+def error_response(view, exc):
+    response = view.handle_exception(exc)
+    headers = {
+        header: value
+        for header, value in response.items()
+        if header.lower() != "content-type"
+    }
+    return json_response(response.data, response.status_code, headers)
+
+
+async def fetch(queryset):
+    """Evaluate the queryset on a replica, like the sync safe reads"""
+    token = _read_database.set(choose_replica())
+    try:
+        return [instance async for instance in queryset]
+    finally:
+        _read_database.reset(token)
+
+
+async def conditional_view(view, request, get_data):
+    """
+    Check the request, answer 304 when the client copy is current,
+    otherwise render get_data() with ETag and Last-Modified.
+    """
+    try:
+        await sync_to_async(check_request)(view, view.request)
+        etag, last_modified = await sync_to_async(get_validators)(
+            request, "application/json", view.get_conditional_names()
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = json_response(await get_data())
+    except APIException as exc:
+        return error_response(view, exc)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+async def paginated_list(view, request):
+    paginator = view.paginator
+    page_queryset = paginator.get_page_queryset(
+        view.filter_queryset(view.get_queryset()), request, view
+    )
+    page = paginator.set_page(await fetch(page_queryset))
+    serializer = view.get_serializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data).data
+
+
+async def flight_list(request):
+    """Async flight list, same filters and payload as GET /flights/"""
+    view, drf_request = get_view(FlightViewSet, request, "list")
+    return await conditional_view(
+        view, request, lambda: paginated_list(view, drf_request)
+    )
+
+
+async def flight_detail(request, pk):
+    """Async flight detail, same payload as GET /flights/<pk>/"""
+    view, drf_request = get_view(FlightViewSet, request, "retrieve", pk=pk)
+
+    async def get_data():
+        # Lazy queries are not allowed in async code, the planned
+        # queryset loads everything the serializer reads up front
+        flights = await fetch(
+            view.filter_queryset(view.get_queryset()).filter(pk=pk)
+        )
+        if not flights:
+            raise NotFound()
+        return view.get_serializer(flights[0]).data
+
+    return await conditional_view(view, request, get_data)
+
+
+async def route_list(request):
+    """Async route list, same filters and payload as GET /routes/"""
+    view, drf_request = get_view(RouteViewSet, request, "list")
+    return await conditional_view(
+        view, request, lambda: paginated_list(view, drf_request)
+    )
@@ -0,0 +1,161 @@
+import re
+import threading
+import unicodedata
+import uuid
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import transaction
+
+from airport.db_router import pin_all_reads
+from airport.models import Airport, City, Country
+
+AUTOCOMPLETE_VERSION_KEY = "airport:autocomplete:version"
+# An expired version only rebuilds the indexes once more
+AUTOCOMPLETE_VERSION_TIMEOUT = 60 * 60 * 24
+AUTOCOMPLETE_TYPES = ("city", "airport", "country")
+# Upper bound of index keys inspected per query, keeps lookups
+# within the latency budget for very short prefixes like "a"
+AUTOCOMPLETE_MAX_SCAN = 1000
+
+NON_ALPHANUMERIC = re.compile(r"[^\w]+")
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse punctuation to spaces"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    )
+    return NON_ALPHANUMERIC.sub(" ", stripped.casefold()).strip()
+
+
+class PrefixIndex:
+    """
+    Sorted list of normalized name suffixes starting at every word,
+    so "de gaulle" finds "Charles de Gaulle Airport".
+    A prefix query is a binary search plus a bounded forward scan.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        keys = []
+        for entry_index, entry in enumerate(entries):
+            words = normalize(entry["name"]).split()
+            for position in range(len(words)):
+                keys.append(
+                    (" ".join(words[position:]), entry_index, position)
+                )
+        keys.sort()
+        self.keys = [key for key, _, _ in keys]
+        self.refs = [(entry, position) for _, entry, position in keys]
+
+    def search(self, query, limit, types=AUTOCOMPLETE_TYPES):
+        query = normalize(query)
+        if not query:
+            return []
+
+        best = {}
+        start = bisect_left(self.keys, query)
+        for key_index in range(
+            start, min(start + AUTOCOMPLETE_MAX_SCAN, len(self.keys))
+        ):
+            key = self.keys[key_index]
+            if not key.startswith(query):
+                break
+            entry_index, position = self.refs[key_index]
+            entry = self.entries[entry_index]
+            if entry["type"] not in types:
+                continue
+            rank = (
+                key != query or position > 0,
+                position > 0,
+                AUTOCOMPLETE_TYPES.index(entry["type"]),
+                len(entry["name"]),
+                entry["name"],
+            )
+            if entry_index not in best or rank < best[entry_index]:
+                best[entry_index] = rank
+
+        ranked = sorted(best, key=best.get)[:limit]
+        return [self.entries[entry_index] for entry_index in ranked]
+
+
+def build_index():
+    entries = []
+    for city in City.objects.select_related("country"):
+        entries.append(
+            {
+                "type": "city",
+                "id": city.id,
+                "name": city.name,
+                "label": str(city),
+            }
+        )
+    for airport in Airport.objects.select_related(
+        "closest_big_city__country"
+    ):
+        entries.append(
+            {
+                "type": "airport",
+                "id": airport.id,
+                "name": airport.name,
+                "label": str(airport),
+            }
+        )
+    for country in Country.objects.all():
+        entries.append(
+            {
+                "type": "country",
+                "id": country.id,
+                "name": country.name,
+                "label": str(country),
+            }
+        )
+    return PrefixIndex(entries)
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def current_version():
+    version = cache.get(AUTOCOMPLETE_VERSION_KEY)
+    if version is None:
+        cache.add(
+            AUTOCOMPLETE_VERSION_KEY,
+            uuid.uuid4().hex,
+            AUTOCOMPLETE_VERSION_TIMEOUT,
+        )
+        version = cache.get(AUTOCOMPLETE_VERSION_KEY)
+    return version
+
+
+def get_index():
+    """Return the process-local index, rebuilding it once it is stale"""
+    global _index, _index_version
+
+    version = current_version()
+    if _index is None or _index_version != version:
+        with _index_lock:
+            if _index is None or _index_version != version:
+                _index = build_index()
+                _index_version = version
+    return _index
+
+
+def invalidate_autocomplete():
+    """
+    Mark the index of every process as stale once the current transaction
+    commits, so no index is rebuilt from the old rows under the new version.
+    """
+    def bump():
+        pin_all_reads()
+        cache.set(
+            AUTOCOMPLETE_VERSION_KEY,
+            uuid.uuid4().hex,
+            AUTOCOMPLETE_VERSION_TIMEOUT,
+        )
+
+    transaction.on_commit(bump)
@@ -0,0 +1,147 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.urls import reverse
+
+from airport.query_stats import query_stats
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(
+        values[min(len(values) - 1, int(len(values) * fraction))], 1
+    )
+
+
+def timed_get(url, headers, timeout):
+    """Status code and latency in milliseconds of a single GET"""
+    request = urllib.request.Request(url, headers=headers)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    except (urllib.error.URLError, TimeoutError):
+        status = None
+    return status, (time.perf_counter() - started) * 1000
+
+
+def run_load(url, requests=200, concurrency=20, headers=None, timeout=30):
+    """
+    Send the GET requests from a pool of concurrency threads.
+    Returns throughput and latency percentiles of the successful ones.
+    """
+    headers = headers or {}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(
+            executor.map(
+                lambda _: timed_get(url, headers, timeout), range(requests)
+            )
+        )
+    elapsed = time.perf_counter() - started
+
+    latencies = [
+        latency
+        for status, latency in results
+        if status is not None and status < 400
+    ]
+    return {
+        "url": url,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": requests - len(latencies),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        **latency_stats(latencies),
+    }
+
+
+def latency_stats(latencies):
+    return {
+        "mean_ms": (
+            round(statistics.fmean(latencies), 1) if latencies else None
+        ),
+        "p50_ms": percentile(latencies, 0.5),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": round(max(latencies), 1) if latencies else None,
+    }
+
+
+def measure_endpoint(client, url, requests=50, warmup=3, headers=None):
+    """
+    GET the url in process with the test client. The first warmup
+    request gives the cold query count, the measured ones the latency
+    percentiles and the warm query count.
+    """
+    latencies, queries, statuses = [], [], []
+    for index in range(warmup + requests):
+        with query_stats() as stats:
+            started = time.perf_counter()
+            response = client.get(url, headers=headers)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            latency = (time.perf_counter() - started) * 1000
+        if index == 0:
+            cold = stats
+        if index < warmup:
+            continue
+        statuses.append(response.status_code)
+        if response.status_code < 400:
+            latencies.append(latency)
+            queries.append(stats.count)
+    return {
+        "url": url,
+        "requests": requests,
+        "errors": requests - len(latencies),
+        "status": max(set(statuses), key=statuses.count),
+        **latency_stats(latencies),
+        "cold_queries": cold.count,
+        "queries": (
+            round(statistics.median(queries)) if queries else None
+        ),
+        "duplicate_queries": cold.duplicates,
+    }
+
+
+def first_id(response):
+    """Id of the first object of a list response, paginated or not"""
+    data = response.json()
+    if isinstance(data, dict):
+        data = data.get("results", [])
+    return data[0]["id"] if data and "id" in data[0] else None
+
+
+def router_endpoints(router, client, headers=None, params=None):
+    """
+    (name, url) of the list, detail and extra GET actions of every
+    viewset of the router. Detail urls use the first listed object,
+    params maps url names to the query strings they require.
+    """
+    params = params or {}
+    endpoints = []
+    for prefix, viewset, basename in router.registry:
+        list_name = f"airport:{basename}-list"
+        list_url = reverse(list_name)
+        endpoints.append((list_name, list_url + params.get(list_name, "")))
+        pk = first_id(client.get(list_url, headers=headers))
+        if pk is not None and hasattr(viewset, "retrieve"):
+            name = f"airport:{basename}-detail"
+            endpoints.append((name, reverse(name, args=[pk])))
+        for action in viewset.get_extra_actions():
+            if "get" not in action.mapping:
+                continue
+            name = f"airport:{basename}-{action.url_name}"
+            if action.detail and pk is not None:
+                endpoints.append((name, reverse(name, args=[pk])))
+            elif not action.detail:
+                endpoints.append((name, reverse(name) + params.get(name, "")))
+    return endpoints
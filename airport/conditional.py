@@ -0,0 +1,124 @@
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from airport.db_router import pin_all_reads
+
+CONDITIONAL_PREFIX = "airport:conditional"
+# Versions of single resources expire so rarely polled ones do not
+# pile up in the cache, a missing version just yields a new ETag
+CONDITIONAL_VERSION_TIMEOUT = 60 * 60 * 24
+# Airports, cities, airplanes, crews and routes embedded in route/flight
+# payloads
+REFERENCES = "references"
+
+
+def version_key(name):
+    return f"{CONDITIONAL_PREFIX}:{name}"
+
+
+def new_version():
+    return uuid.uuid4().hex, timezone.now().timestamp()
+
+
+def get_versions(names):
+    """(token, timestamp) of every name, created on first use"""
+    keys = {version_key(name): name for name in names}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, new_version(), CONDITIONAL_VERSION_TIMEOUT)
+        versions[key] = cache.get(key) or new_version()
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*names):
+    """
+    Change the ETags of the named resources once the current transaction
+    commits, so a version is never paired with uncommitted data.
+    """
+    def bump():
+        pin_all_reads()
+        version = new_version()
+        cache.set_many(
+            {version_key(name): version for name in names},
+            CONDITIONAL_VERSION_TIMEOUT,
+        )
+
+    transaction.on_commit(bump)
+
+
+def get_validators(request, media_type, names):
+    """ETag and Last-Modified timestamp of the response to the request"""
+    versions = get_versions(names)
+    etag = quote_etag(
+        hashlib.blake2b(
+            repr(
+                (
+                    request.get_full_path(),
+                    media_type,
+                    [token for token, _ in versions],
+                )
+            ).encode(),
+            digest_size=16,
+        ).hexdigest()
+    )
+    return etag, int(max(timestamp for _, timestamp in versions))
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag and Last-Modified on list and retrieve, computed from
+    version stamps in the cache. A matching If-None-Match or
+    If-Modified-Since is answered with 304 before the queryset is
+    evaluated or the serializer runs.
+    """
+
+    conditional_name = None
+
+    def get_conditional_names(self):
+        if self.action == "retrieve":
+            resource = f"{self.conditional_name}:{self.kwargs['pk']}"
+        else:
+            resource = f"{self.conditional_name}:all"
+        return resource, REFERENCES
+
+    def conditional_response(self, request, get_response):
+        etag, last_modified = get_validators(
+            request, request.accepted_media_type, self.get_conditional_names()
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = get_response()
+            if response.status_code != 200:
+                return response
+        set_validators(response, etag, last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            lambda: super(ConditionalGetMixin, self).list(
+                request, *args, **kwargs
+            ),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            lambda: super(ConditionalGetMixin, self).retrieve(
+                request, *args, **kwargs
+            ),
+        )
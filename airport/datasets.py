@@ -0,0 +1,387 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from airport.autocomplete import invalidate_autocomplete
+from airport.conditional import REFERENCES, bump_versions
+from airport.itineraries import invalidate_itineraries
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    City,
+    Country,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket
+)
+from airport.response_cache import invalidate_response_cache
+from airport.seat_map import invalidate_seat_map
+
+# Row counts of the synthetic datasets, tickets is the average number
+# of sold seats per flight times the flights
+SCALES = {
+    "tiny": {
+        "countries": 3,
+        "cities": 6,
+        "airports": 8,
+        "routes": 20,
+        "airplane_types": 2,
+        "airplanes": 5,
+        "crews": 10,
+        "flights": 30,
+        "tickets": 600,
+        "users": 2,
+    },
+    "small": {
+        "countries": 20,
+        "cities": 100,
+        "airports": 150,
+        "routes": 1000,
+        "airplane_types": 10,
+        "airplanes": 100,
+        "crews": 500,
+        "flights": 1000,
+        "tickets": 50_000,
+        "users": 100,
+    },
+    "medium": {
+        "countries": 50,
+        "cities": 500,
+        "airports": 800,
+        "routes": 5000,
+        "airplane_types": 20,
+        "airplanes": 500,
+        "crews": 2000,
+        "flights": 10_000,
+        "tickets": 1_000_000,
+        "users": 1000,
+    },
+    "large": {
+        "countries": 150,
+        "cities": 2000,
+        "airports": 3000,
+        "routes": 20_000,
+        "airplane_types": 40,
+        "airplanes": 2000,
+        "crews": 10_000,
+        "flights": 100_000,
+        "tickets": 10_000_000,
+        "users": 10_000,
+    },
+}
+DATASET_START = datetime(2030, 1, 1, tzinfo=timezone.utc)
+# Flights scheduled per day of the dataset
+DATASET_FLIGHTS_PER_DAY = 500
+DATASET_USER_PASSWORD = "benchmark"
+
+SYLLABLES = (
+    "ba", "ber", "ca", "dan", "del", "fa", "gor", "ha", "is", "ka",
+    "lan", "li", "ma", "mon", "na", "nor", "o", "pa", "ra", "ri",
+    "san", "sel", "ta", "ton", "u", "va", "vel", "za",
+)
+FIRST_NAMES = (
+    "Anna", "Bohdan", "Chloe", "David", "Elena", "Farid", "Grace",
+    "Hugo", "Iryna", "Jonas", "Kateryna", "Liam", "Maria", "Noah",
+    "Olena", "Pablo", "Sofia", "Taras", "Yuki", "Zoe",
+)
+
+
+class DatasetGenerator:
+    """
+    Deterministic synthetic dataset: the same scale and seed give the
+    same rows. Rows are inserted with bulk_create in batches, orders,
+    tickets and crew assignments with COPY on PostgreSQL. Tickets are
+    flushed with their orders so memory stays flat at any scale.
+    """
+
+    def __init__(
+        self, scale, seed=0, batch_size=5000, log=None, use_copy=True
+    ):
+        self.scale = SCALES[scale] if isinstance(scale, str) else scale
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.use_copy = use_copy and connection.vendor == "postgresql"
+        self.counts = {}
+
+    def name(self, words=1):
+        return " ".join(
+            "".join(
+                self.random.choice(SYLLABLES)
+                for _ in range(self.random.randint(2, 3))
+            ).title()
+            for _ in range(words)
+        )
+
+    def create(self, key, model, objects):
+        objects = model.objects.bulk_create(
+            objects, batch_size=self.batch_size
+        )
+        self.counts[key] = self.counts.get(key, 0) + len(objects)
+        return objects
+
+    def insert_rows(self, key, model, fields, rows):
+        """Insert value tuples of the fields, returns the new ids"""
+        if not rows:
+            return []
+        if self.use_copy:
+            ids = copy_rows(model, fields, rows)
+        else:
+            ids = [
+                instance.pk
+                for instance in model.objects.bulk_create(
+                    [model(**dict(zip(fields, row))) for row in rows],
+                    batch_size=self.batch_size,
+                )
+            ]
+        self.counts[key] = self.counts.get(key, 0) + len(ids)
+        return ids
+
+    def generate(self):
+        with transaction.atomic():
+            self.generate_references()
+            self.generate_flights()
+            self.generate_tickets()
+        invalidate_dataset_caches(self.flights, self.routes)
+        return self.counts
+
+    def generate_references(self):
+        scale = self.scale
+        self.log("references")
+        countries = self.create(
+            "countries",
+            Country,
+            [Country(name=self.name()) for _ in range(scale["countries"])],
+        )
+        cities = self.create(
+            "cities",
+            City,
+            [
+                City(
+                    name=self.name(self.random.randint(1, 2)),
+                    country=self.random.choice(countries),
+                )
+                for _ in range(scale["cities"])
+            ],
+        )
+        airports = self.create(
+            "airports",
+            Airport,
+            [
+                Airport(
+                    name=f"{self.name()} International Airport",
+                    closest_big_city=self.random.choice(cities),
+                )
+                for _ in range(scale["airports"])
+            ],
+        )
+        routes = []
+        for _ in range(scale["routes"]):
+            source, destination = self.random.sample(airports, 2)
+            routes.append(
+                Route(
+                    source=source,
+                    destination=destination,
+                    distance=self.random.randint(300, 12000),
+                )
+            )
+        self.routes = self.create("routes", Route, routes)
+        airplane_types = self.create(
+            "airplane_types",
+            AirplaneType,
+            [
+                AirplaneType(name=f"{self.name()} {100 + index}")
+                for index in range(scale["airplane_types"])
+            ],
+        )
+        self.airplanes = self.create(
+            "airplanes",
+            Airplane,
+            [
+                Airplane(
+                    name=f"{self.name()} {index}",
+                    rows=self.random.randint(20, 40),
+                    seats_in_row=self.random.choice((4, 6, 8)),
+                    airplane_type=self.random.choice(airplane_types),
+                )
+                for index in range(scale["airplanes"])
+            ],
+        )
+        self.crews = self.create(
+            "crews",
+            Crew,
+            [
+                Crew(
+                    first_name=self.random.choice(FIRST_NAMES),
+                    last_name=self.name(),
+                )
+                for _ in range(scale["crews"])
+            ],
+        )
+        password = make_password(DATASET_USER_PASSWORD)
+        self.users = self.create(
+            "users",
+            get_user_model(),
+            [
+                get_user_model()(
+                    email=f"benchmark-{index}@example.com",
+                    password=password,
+                    # The first user can read the admin-only endpoints
+                    is_staff=index == 0,
+                )
+                for index in range(scale["users"])
+            ],
+        )
+
+    def generate_flights(self):
+        scale = self.scale
+        self.log("flights")
+        days = max(1, scale["flights"] // DATASET_FLIGHTS_PER_DAY)
+        average_sold = scale["tickets"] / max(1, scale["flights"])
+        flights = []
+        for _ in range(scale["flights"]):
+            route = self.random.choice(self.routes)
+            airplane = self.random.choice(self.airplanes)
+            departure_time = DATASET_START + timedelta(
+                minutes=self.random.randrange(days * 24 * 60)
+            )
+            flight = Flight(
+                route=route,
+                airplane=airplane,
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(
+                    minutes=30 + route.distance * 60 // 800
+                ),
+                seats_sold=min(
+                    airplane.capacity,
+                    round(self.random.uniform(0.5, 1.5) * average_sold),
+                ),
+            )
+            flights.append(flight)
+        self.flights = self.create("flights", Flight, flights)
+        self.insert_rows(
+            "flight_crews",
+            Flight.crew.through,
+            ("flight_id", "crew_id"),
+            [
+                (flight.id, crew.id)
+                for flight in self.flights
+                for crew in self.random.sample(
+                    self.crews, min(len(self.crews), self.random.randint(2, 4))
+                )
+            ],
+        )
+
+    def generate_tickets(self):
+        """
+        Sold seats of every flight are a sample of its seat numbers,
+        which keeps (flight, row, seat) unique and within the airplane.
+        Consecutive seats of a flight are grouped in orders of 1-4.
+        """
+        self.log("tickets")
+        orders, tickets = [], []
+        for flight in self.flights:
+            seats_in_row = flight.airplane.seats_in_row
+            seats = self.random.sample(
+                range(flight.airplane.capacity), flight.seats_sold
+            )
+            index = 0
+            while index < len(seats):
+                orders.append(
+                    (
+                        self.random.choice(self.users).id,
+                        flight.departure_time
+                        - timedelta(days=self.random.randint(1, 90)),
+                    )
+                )
+                for seat in seats[index:index + self.random.randint(1, 4)]:
+                    tickets.append(
+                        (
+                            len(orders) - 1,
+                            flight.id,
+                            seat // seats_in_row + 1,
+                            seat % seats_in_row + 1,
+                        )
+                    )
+                    index += 1
+            if len(tickets) >= self.batch_size:
+                self.create_orders(orders, tickets)
+                orders, tickets = [], []
+        self.create_orders(orders, tickets)
+
+    def create_orders(self, orders, tickets):
+        order_ids = self.insert_rows(
+            "orders", Order, ("user_id", "created_at"), orders
+        )
+        self.insert_rows(
+            "tickets",
+            Ticket,
+            ("order_id", "flight_id", "row", "seat"),
+            [
+                (order_ids[order_index], flight_id, row, seat)
+                for order_index, flight_id, row, seat in tickets
+            ],
+        )
+
+
+def copy_rows(model, fields, rows):
+    """
+    COPY the value tuples into the table of the model. Ids are taken
+    from its sequence up front, the table lock keeps concurrent inserts
+    from drawing ids of the reserved range.
+    """
+    meta = model._meta
+    quote = connection.ops.quote_name
+    columns = [meta.pk.column] + [
+        meta.get_field(name).column for name in fields
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"LOCK TABLE {quote(meta.db_table)} IN SHARE ROW EXCLUSIVE MODE"
+        )
+        cursor.execute(
+            "SELECT setval(seq::regclass, nextval(seq::regclass) + %s - 1)"
+            " - %s + 1 FROM pg_get_serial_sequence(%s, %s) AS seq",
+            [len(rows), len(rows), meta.db_table, meta.pk.column],
+        )
+        start = cursor.fetchone()[0]
+        ids = range(start, start + len(rows))
+        with cursor.cursor.copy(
+            f"COPY {quote(meta.db_table)} "
+            f"({', '.join(quote(column) for column in columns)}) FROM STDIN"
+        ) as copy:
+            for pk, row in zip(ids, rows):
+                copy.write_row((pk, *row))
+    return list(ids)
+
+
+def generate_dataset(scale, seed=0, batch_size=5000, log=None, use_copy=True):
+    """Insert the dataset of the scale, returns the created row counts"""
+    return DatasetGenerator(
+        scale, seed, batch_size, log, use_copy
+    ).generate()
+
+
+def invalidate_dataset_caches(flights, routes):
+    """
+    bulk_create sends no signals, so everything they would have
+    invalidated for the inserted rows is invalidated here.
+    """
+    invalidate_autocomplete()
+    invalidate_itineraries()
+    invalidate_response_cache("airplane_types", "crews", "countries", "cities")
+    flight_ids = [flight.id for flight in flights]
+    invalidate_seat_map(*flight_ids)
+    bump_versions(
+        REFERENCES,
+        "flight:all",
+        "route:all",
+        *(f"flight:{pk}" for pk in flight_ids),
+        *(f"route:{route.id}" for route in routes),
+    )
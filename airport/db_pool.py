@@ -0,0 +1,62 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import OperationalError
+
+
+def get_pool(alias=DEFAULT_DB_ALIAS):
+    """The psycopg connection pool of the alias, None if not pooled"""
+    return getattr(connections[alias], "pool", None)
+
+
+def pool_stats():
+    """
+    Counters of every configured database. For pooled ones:
+    checkouts served, total and current waiting, connections in use.
+    """
+    stats = {}
+    for alias in connections:
+        pool = get_pool(alias)
+        if pool is None:
+            settings_dict = connections[alias].settings_dict
+            stats[alias] = {
+                "pooled": False,
+                "conn_max_age": settings_dict["CONN_MAX_AGE"],
+                "conn_health_checks": settings_dict["CONN_HEALTH_CHECKS"],
+            }
+            continue
+        counters = pool.get_stats()
+        size = counters.get("pool_size", 0)
+        available = counters.get("pool_available", 0)
+        stats[alias] = {
+            "pooled": True,
+            "min_size": pool.min_size,
+            "max_size": pool.max_size,
+            "size": size,
+            "available": available,
+            "in_use": size - available,
+            "checkouts": counters.get("requests_num", 0),
+            "waiting": counters.get("requests_waiting", 0),
+            "wait_ms": counters.get("requests_wait_ms", 0),
+            "timeouts": counters.get("requests_errors", 0),
+            "connections_lost": counters.get("connections_lost", 0),
+        }
+    return stats
+
+
+def database_ready(alias=DEFAULT_DB_ALIAS, timeout=1.0):
+    """
+    True once the database answers a query. For a pooled alias the pool
+    is opened and must also fill up to its min_size within the timeout.
+    """
+    connection = connections[alias]
+    errors = (OperationalError, connection.Database.OperationalError)
+    try:
+        pool = get_pool(alias)
+        if pool is not None:
+            pool.open()
+            pool.wait(timeout)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except errors:
+        connection.close()
+        return False
+    return True
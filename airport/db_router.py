@@ -0,0 +1,110 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+READ_PINNED_PREFIX = "airport:db:pinned"
+ALL_READS_PINNED_KEY = f"{READ_PINNED_PREFIX}:all"
+
+_read_database = ContextVar("read_database", default=None)
+
+
+def read_pinned_key(user_id):
+    return f"{READ_PINNED_PREFIX}:{user_id}"
+
+
+def pin_reads(user):
+    """Send the reads of the user to the primary until replicas catch up"""
+    cache.set(
+        read_pinned_key(user.id),
+        True,
+        settings.READ_YOUR_WRITES_WINDOW.total_seconds(),
+    )
+
+
+def reads_pinned(user):
+    return bool(user.is_authenticated and cache.get(read_pinned_key(user.id)))
+
+
+def pin_all_reads():
+    """
+    Send every read to the primary until replicas catch up with a commit
+    whose cached data was just invalidated, so the caches are not filled
+    again from rows of a replica that lags behind
+    """
+    if settings.REPLICA_DATABASES:
+        cache.set(
+            ALL_READS_PINNED_KEY,
+            True,
+            settings.READ_YOUR_WRITES_WINDOW.total_seconds(),
+        )
+
+
+def choose_replica():
+    if not settings.REPLICA_DATABASES or cache.get(ALL_READS_PINNED_KEY):
+        return None
+    return random.choice(settings.REPLICA_DATABASES)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica chosen for the current request, if any.
+    Writes, migrations and reads inside a transaction on the primary
+    always go to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _read_database.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe-method requests of the view from a replica, unless a
+    cache invalidation pinned all reads to the primary.
+    With pin_reads_after_write the reads of a user stay on the primary
+    for READ_YOUR_WRITES_WINDOW after each of their successful writes.
+    """
+
+    pin_reads_after_write = False
+
+    def dispatch(self, request, *args, **kwargs):
+        # Exceptions DRF does not handle skip finalize_response, the
+        # replica must not outlive the request on this thread
+        self._read_database_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._read_database_token is not None:
+                _read_database.reset(self._read_database_token)
+                self._read_database_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not (
+            self.pin_reads_after_write and reads_pinned(request.user)
+        ):
+            self._read_database_token = _read_database.set(choose_replica())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_reads(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
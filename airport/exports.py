@@ -0,0 +1,122 @@
+import csv
+import json
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router
+from django.http import StreamingHttpResponse
+
+from airport.models import Ticket
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+# Column name and ticket lookup of every exported field
+EXPORT_COLUMNS = (
+    ("order_id", "order_id"),
+    ("order_created_at", "order__created_at"),
+    ("user_email", "order__user__email"),
+    ("ticket_id", "id"),
+    ("row", "row"),
+    ("seat", "seat"),
+    ("flight_id", "flight_id"),
+    ("departure_time", "flight__departure_time"),
+    ("arrival_time", "flight__arrival_time"),
+    ("route_id", "flight__route_id"),
+    ("source", "flight__route__source__name"),
+    ("destination", "flight__route__destination__name"),
+    ("distance", "flight__route__distance"),
+    ("airplane", "flight__airplane__name"),
+)
+# Rows fetched per round trip of the server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+# Rows joined into one chunk of the response body
+EXPORT_WRITE_SIZE = 500
+
+
+class Echo:
+    """File-like object handing back what the csv writer writes"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset):
+    """
+    Value tuples of the exported columns, read in chunks through a
+    server-side cursor on the database the request reads from.
+    """
+    return (
+        queryset.using(router.db_for_read(Ticket))
+        .order_by("order_id", "id")
+        .values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def csv_lines(rows):
+    """Header and rows, dates formatted like the NDJSON export"""
+    writer = csv.writer(Echo())
+    encoder = DjangoJSONEncoder()
+    yield writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for row in rows:
+        yield writer.writerow(
+            encoder.default(value) if isinstance(value, datetime) else value
+            for value in row
+        )
+
+
+def ndjson_lines(rows):
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+EXPORT_WRITERS = {"csv": csv_lines, "ndjson": ndjson_lines}
+
+
+def batched(lines, size):
+    """Join the lines in larger chunks, one write per chunk"""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+async def chunks_to_async(chunks):
+    """
+    Async iterator over the chunks, each one produced on the sync thread
+    of the request, which keeps the server-side cursor of the rows.
+    """
+    chunks = iter(chunks)
+    read = sync_to_async(next)
+    while (chunk := await read(chunks, None)) is not None:
+        yield chunk
+
+
+def export_response(request, queryset, export_format, filename):
+    """
+    Streaming attachment of the ticket queryset in the format. Under
+    ASGI the body is an async iterator, Django would otherwise read a
+    sync one into memory before sending it.
+    """
+    lines = EXPORT_WRITERS[export_format](export_rows(queryset))
+    chunks = batched(lines, EXPORT_WRITE_SIZE)
+    if isinstance(request, ASGIRequest):
+        chunks = chunks_to_async(chunks)
+    return StreamingHttpResponse(
+        chunks,
+        content_type=EXPORT_FORMATS[export_format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{filename}.{export_format}"'
+            ),
+        },
+    )
@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from airport.conditional import REFERENCES, bump_versions
+
+logger = logging.getLogger(__name__)
+
+# Longest side in pixels of every variant
+IMAGE_VARIANTS = {"thumb": 160, "medium": 800}
+IMAGE_VARIANT_FORMAT = "WEBP"
+IMAGE_VARIANT_EXTENSION = "webp"
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_VARIANT_DIR = "uploads/variants"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process-wide pool of IMAGE_WORKERS threads"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                thread_name_prefix="image",
+            )
+        return _executor
+
+
+def content_hash(field_file):
+    digest = hashlib.sha256()
+    field_file.open("rb")
+    try:
+        for chunk in field_file.chunks():
+            digest.update(chunk)
+    finally:
+        field_file.close()
+    return digest.hexdigest()
+
+
+def variant_name(digest, variant):
+    """Content-addressed storage name, shared by identical uploads"""
+    return (
+        f"{IMAGE_VARIANT_DIR}/{digest[:2]}/"
+        f"{digest}-{variant}.{IMAGE_VARIANT_EXTENSION}"
+    )
+
+
+def generate_variants(field_file):
+    """
+    Store the resized variants of the image, unless variants of the
+    same content already exist. Returns the variant storage names.
+    """
+    storage = field_file.storage
+    digest = content_hash(field_file)
+    variants = {"source": field_file.name, "hash": digest}
+    missing = {}
+    for variant, size in IMAGE_VARIANTS.items():
+        name = variant_name(digest, variant)
+        if storage.exists(name):
+            variants[variant] = name
+        else:
+            missing[variant] = (name, size)
+    if not missing:
+        return variants
+
+    field_file.open("rb")
+    try:
+        with Image.open(field_file) as image:
+            image = ImageOps.exif_transpose(image)
+            image = image.convert(
+                "RGBA" if "A" in image.getbands() else "RGB"
+            )
+            for variant, (name, size) in missing.items():
+                resized = image.copy()
+                resized.thumbnail((size, size))
+                buffer = BytesIO()
+                resized.save(
+                    buffer,
+                    IMAGE_VARIANT_FORMAT,
+                    quality=IMAGE_VARIANT_QUALITY,
+                )
+                variants[variant] = storage.save(
+                    name, ContentFile(buffer.getvalue())
+                )
+    finally:
+        field_file.close()
+    return variants
+
+
+def process_image(model, pk):
+    """
+    Generate the variants of the current image of the object and
+    record them, unless the image was replaced in the meantime.
+    """
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not instance.image:
+        return
+    try:
+        variants = generate_variants(instance.image)
+    except (OSError, Image.DecompressionBombError):
+        logger.warning(
+            "Image variants of %s %s failed",
+            model.__name__,
+            pk,
+            exc_info=True,
+        )
+        return
+    if model.objects.filter(pk=pk, image=instance.image.name).update(
+        image_variants=variants
+    ):
+        bump_versions(REFERENCES)
+
+
+def process_image_in_worker(model, pk):
+    try:
+        process_image(model, pk)
+    except Exception:
+        logger.exception("Image processing of %s %s failed", model, pk)
+    finally:
+        # Worker threads hold their own connections
+        connections.close_all()
+
+
+def schedule_image_variants(instance):
+    """
+    Process the image of the saved object in the worker pool once
+    the transaction commits, or right away with IMAGE_PROCESSING_EAGER.
+    """
+    model, pk = type(instance), instance.pk
+    if settings.IMAGE_PROCESSING_EAGER:
+        transaction.on_commit(lambda: process_image(model, pk))
+    else:
+        transaction.on_commit(
+            lambda: get_executor().submit(process_image_in_worker, model, pk)
+        )
+
+
+def variants_pending(instance):
+    """Whether the current image has no recorded variants yet"""
+    variants = instance.image_variants or {}
+    return bool(instance.image) and (
+        variants.get("source") != instance.image.name
+    )
+
+
+def variant_urls(instance, request=None):
+    """URLs of the variants of the current image, empty while pending"""
+    if not instance.image or variants_pending(instance):
+        return {}
+    storage = instance.image.storage
+    urls = {}
+    for variant in IMAGE_VARIANTS:
+        name = instance.image_variants.get(variant)
+        if name:
+            url = storage.url(name)
+            urls[variant] = (
+                request.build_absolute_uri(url) if request else url
+            )
+    return urls
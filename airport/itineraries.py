@@ -0,0 +1,291 @@
+import copy
+import random
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from airport.db_router import pin_all_reads
+from airport.models import Airport, Flight, Route
+
+ITINERARY_VERSION_KEY = "airport:itineraries:version"
+ITINERARY_DELTA_PREFIX = "airport:itineraries:delta"
+# Flight changes published with their version for the graphs of other
+# processes. A graph further behind, or missing a change, is rebuilt.
+ITINERARY_MAX_DELTAS = 100
+ITINERARY_DELTA_TIMEOUT = 60 * 60
+# Upper bound of flights expanded per search, keeps the worst case
+# (hub to hub with many departures) within a few milliseconds
+ITINERARY_MAX_EXPANSIONS = 20000
+
+# Sorted by departure timestamp first for the bisects over departures
+Leg = namedtuple(
+    "Leg",
+    (
+        "departs_at",
+        "arrives_at",
+        "flight_id",
+        "source_id",
+        "destination_id",
+        "departure_time",
+        "arrival_time",
+    ),
+)
+
+
+def to_datetime(value):
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    return value
+
+
+class FlightGraph:
+    """
+    Time-dependent graph of the schedule: for every airport the outgoing
+    flights sorted by departure, so the connections of an arriving leg
+    are found with a bisect over the departure times.
+    """
+
+    def __init__(self, routes, airport_cities, flights):
+        self.routes = routes
+        self.city_airports = defaultdict(set)
+        for airport_id, city_id in airport_cities.items():
+            self.city_airports[city_id].add(airport_id)
+        self.airport_cities = airport_cities
+        self.departures = defaultdict(list)
+        self.flights = {}
+        for flight in flights:
+            self.add_flight(*flight)
+
+    @classmethod
+    def build(cls):
+        routes = {
+            route_id: (source_id, destination_id)
+            for route_id, source_id, destination_id in Route.objects
+            .values_list("id", "source_id", "destination_id")
+        }
+        airport_cities = dict(
+            Airport.objects.values_list("id", "closest_big_city_id")
+        )
+        flights = Flight.objects.values_list(
+            "id", "route_id", "departure_time", "arrival_time"
+        )
+        return cls(routes, airport_cities, flights)
+
+    def add_flight(self, flight_id, route_id, departure_time, arrival_time):
+        self.remove_flight(flight_id)
+        if route_id not in self.routes:
+            return
+        source_id, destination_id = self.routes[route_id]
+        departure_time = to_datetime(departure_time)
+        arrival_time = to_datetime(arrival_time)
+        leg = Leg(
+            departure_time.timestamp(),
+            arrival_time.timestamp(),
+            flight_id,
+            source_id,
+            destination_id,
+            departure_time,
+            arrival_time,
+        )
+        self.flights[flight_id] = leg
+        insort(self.departures[source_id], leg)
+
+    def remove_flight(self, flight_id):
+        leg = self.flights.pop(flight_id, None)
+        if leg is not None:
+            departures = self.departures[leg.source_id]
+            del departures[bisect_left(departures, leg)]
+
+    def replace_flight(self, flight_id, route_id=None, departure_time=None,
+                       arrival_time=None, deleted=False):
+        """
+        Copy of the graph with the flight added, moved or removed.
+        Only the departure lists that change are copied, searches
+        running on this graph are not affected.
+        """
+        graph = copy.copy(self)
+        graph.departures = self.departures.copy()
+        graph.flights = self.flights.copy()
+        changed = set()
+        if flight_id in self.flights:
+            changed.add(self.flights[flight_id].source_id)
+        if not deleted and route_id in self.routes:
+            changed.add(self.routes[route_id][0])
+        for airport_id in changed:
+            graph.departures[airport_id] = list(
+                self.departures.get(airport_id, ())
+            )
+        if deleted:
+            graph.remove_flight(flight_id)
+        else:
+            graph.add_flight(
+                flight_id, route_id, departure_time, arrival_time
+            )
+        return graph
+
+    def departures_between(self, airport_id, start, end):
+        departures = self.departures.get(airport_id, ())
+        index = bisect_left(departures, (start,))
+        while (
+            index < len(departures) and departures[index].departs_at < end
+        ):
+            yield departures[index]
+            index += 1
+
+    def search(
+        self,
+        source_city_id,
+        destination_city_id,
+        day,
+        max_legs=2,
+        min_connection=timedelta(minutes=45),
+        max_connection=timedelta(hours=24),
+        limit=10,
+    ):
+        """
+        Itineraries departing from the source city on the given local day
+        and reaching the destination city with up to max_legs flights.
+        Sorted by arrival time, then by the number of legs.
+        """
+        destinations = self.city_airports.get(destination_city_id, set())
+        if not destinations:
+            return []
+
+        day_start = timezone.make_aware(datetime.combine(day, time.min))
+        day_end = day_start + timedelta(days=1)
+        min_gap = min_connection.total_seconds()
+        max_gap = max_connection.total_seconds()
+        expansions = 0
+        itineraries = []
+
+        stack = [
+            (
+                (leg,),
+                {source_city_id, self.airport_cities.get(leg.destination_id)},
+            )
+            for airport_id in self.city_airports.get(source_city_id, ())
+            for leg in self.departures_between(
+                airport_id, day_start.timestamp(), day_end.timestamp()
+            )
+        ]
+        while stack and expansions < ITINERARY_MAX_EXPANSIONS:
+            legs, visited_cities = stack.pop()
+            expansions += 1
+            last = legs[-1]
+            if last.destination_id in destinations:
+                itineraries.append(legs)
+                continue
+            if len(legs) >= max_legs:
+                continue
+            for leg in self.departures_between(
+                last.destination_id,
+                last.arrives_at + min_gap,
+                last.arrives_at + max_gap,
+            ):
+                city_id = self.airport_cities.get(leg.destination_id)
+                if city_id in visited_cities:
+                    continue
+                stack.append((legs + (leg,), visited_cities | {city_id}))
+
+        itineraries.sort(
+            key=lambda legs: (
+                legs[-1].arrives_at, len(legs), -legs[0].departs_at
+            )
+        )
+        return itineraries[:limit]
+
+
+_graph = None
+_graph_version = None
+_graph_lock = threading.Lock()
+
+
+def current_version():
+    # Random start so a flushed cache never repeats a version
+    # some process has already built its graph for
+    cache.add(ITINERARY_VERSION_KEY, random.getrandbits(48), None)
+    return cache.get(ITINERARY_VERSION_KEY)
+
+
+def delta_key(version):
+    return f"{ITINERARY_DELTA_PREFIX}:{version}"
+
+
+def apply_deltas(graph, graph_version, version):
+    """
+    Copy of the graph with the flight changes published up to version,
+    None when one of them is not in the cache.
+    """
+    if (
+        graph is None
+        or graph_version is None
+        or not 0 < version - graph_version <= ITINERARY_MAX_DELTAS
+    ):
+        return None
+    keys = [
+        delta_key(number) for number in range(graph_version + 1, version + 1)
+    ]
+    deltas = cache.get_many(keys)
+    if len(deltas) != len(keys):
+        return None
+    for key in keys:
+        graph = graph.replace_flight(*deltas[key])
+    return graph
+
+
+def get_graph():
+    """
+    Return the process-local graph, brought up to date with the flight
+    changes published since it was built, or rebuilt when they are not
+    all available. The graph is never changed after it is returned,
+    flight changes replace it with a copy.
+    """
+    global _graph, _graph_version
+
+    version = current_version()
+    if _graph is None or _graph_version != version:
+        with _graph_lock:
+            if _graph is None or _graph_version != version:
+                graph = apply_deltas(_graph, _graph_version, version)
+                _graph = graph or FlightGraph.build()
+                _graph_version = version
+    return _graph
+
+
+def bump_version():
+    pin_all_reads()
+    current_version()
+    try:
+        return cache.incr(ITINERARY_VERSION_KEY)
+    except ValueError:
+        return None
+
+
+def invalidate_itineraries():
+    """
+    Make every process rebuild its graph on its next search once the
+    current transaction commits
+    """
+    transaction.on_commit(bump_version)
+
+
+def update_flight(flight_id, route_id=None, departure_time=None,
+                  arrival_time=None, deleted=False):
+    """
+    Publish a single committed flight change with the version it bumps,
+    every process applies it to its graph on its next search instead of
+    rebuilding the graph
+    """
+    version = bump_version()
+    if version is not None:
+        cache.set(
+            delta_key(version),
+            (flight_id, route_id, departure_time, arrival_time, deleted),
+            ITINERARY_DELTA_TIMEOUT,
+        )
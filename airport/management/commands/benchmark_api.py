@@ -0,0 +1,196 @@
+import json
+import subprocess
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.benchmark import measure_endpoint, router_endpoints
+from airport.datasets import SCALES, generate_dataset
+from airport.models import City, Flight
+from airport.urls import router
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def endpoint_params():
+    """Query strings of the endpoints that need parameters"""
+    flight = Flight.objects.select_related(
+        "route__source", "route__destination"
+    ).order_by("departure_time").first()
+    city = City.objects.order_by("id").first()
+    params = {}
+    if city:
+        params["airport:autocomplete-list"] = f"?q={city.name[:3]}"
+    if flight:
+        params["airport:flight-connections"] = (
+            f"?source_city={flight.route.source.closest_big_city_id}"
+            "&destination_city="
+            f"{flight.route.destination.closest_big_city_id}"
+            f"&date={flight.departure_time.date().isoformat()}"
+        )
+    return params
+
+
+class Command(BaseCommand):
+    """Latency and queries of every router endpoint on a synthetic dataset"""
+
+    help = (
+        "Generate a synthetic dataset in a throwaway test database and "
+        "measure latency percentiles and query counts of every endpoint "
+        "of the airport router, in process. Results are written as JSON "
+        "to compare runs across commits. Throttling is disabled while "
+        "measuring."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale", choices=SCALES, default="small"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Measured requests per endpoint",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=3,
+            help="Requests per endpoint before measuring",
+        )
+        parser.add_argument(
+            "--output",
+            help="JSON results file, benchmark-<scale>-<commit>.json "
+            "by default",
+        )
+        parser.add_argument(
+            "--baseline",
+            help="JSON results of an earlier run to compare with",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database and its dataset for the next run",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=options["keepdb"]
+        )
+        unthrottled = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": dict.fromkeys(
+                settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]
+            ),
+        }
+        try:
+            with override_settings(REST_FRAMEWORK=unthrottled):
+                results = self.run_benchmark(options)
+        finally:
+            teardown_databases(
+                old_config, verbosity=0, keepdb=options["keepdb"]
+            )
+            teardown_test_environment()
+
+        output = options["output"] or (
+            f"benchmark-{options['scale']}-{results['commit']}.json"
+        )
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+        self.write_table(results, options["baseline"])
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+    def run_benchmark(self, options):
+        if Flight.objects.exists():
+            self.stdout.write("Reusing the dataset of the kept database")
+            dataset = None
+        else:
+            started = timezone.now()
+            dataset = generate_dataset(
+                options["scale"],
+                seed=options["seed"],
+                log=lambda step: self.stdout.write(f"Generating {step}"),
+            )
+            self.stdout.write(
+                f"Generated {dataset} in {timezone.now() - started}"
+            )
+
+        user = get_user_model().objects.filter(is_staff=True).first()
+        token = AccessToken.for_user(user)
+        token.set_exp(lifetime=timedelta(days=1))
+        headers = {"Authorization": f"Bearer {token}"}
+        client = Client()
+
+        endpoints = {}
+        for name, url in router_endpoints(
+            router, client, headers, endpoint_params()
+        ):
+            endpoints[name] = measure_endpoint(
+                client,
+                url,
+                requests=options["requests"],
+                warmup=options["warmup"],
+                headers=headers,
+            )
+        return {
+            "commit": current_commit(),
+            "created_at": timezone.now().isoformat(),
+            "scale": options["scale"],
+            "seed": options["seed"],
+            "dataset": dataset,
+            "endpoints": endpoints,
+        }
+
+    def write_table(self, results, baseline=None):
+        if baseline:
+            with open(baseline) as file:
+                baseline = json.load(file)["endpoints"]
+        self.stdout.write(
+            f"{'endpoint':<36} {'status':>6} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'queries':>7}"
+            + (f" {'p50 diff':>9} {'queries diff':>12}" if baseline else "")
+        )
+        for name, result in results["endpoints"].items():
+            line = (
+                f"{name:<36} {result['status']:>6} "
+                f"{result['p50_ms']!s:>8} {result['p95_ms']!s:>8} "
+                f"{result['p99_ms']!s:>8} {result['queries']!s:>7}"
+            )
+            previous = (baseline or {}).get(name)
+            if previous and previous["p50_ms"] and result["p50_ms"]:
+                change = result["p50_ms"] / previous["p50_ms"] - 1
+                queries = (result["queries"] or 0) - (
+                    previous["queries"] or 0
+                )
+                line += f" {change:>+9.0%} {queries:>+12}"
+            self.stdout.write(line)
+            if result["errors"]:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"  {result['errors']} failed requests, "
+                        f"status {result['status']}"
+                    )
+                )
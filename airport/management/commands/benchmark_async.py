@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+
+from airport.benchmark import run_load
+
+ENDPOINTS = (
+    ("flight list", "/api/airport/flights/", "/api/airport/async/flights/"),
+    ("route list", "/api/airport/routes/", "/api/airport/async/routes/"),
+)
+
+
+class Command(BaseCommand):
+    """Compares the sync WSGI views with the async views under ASGI"""
+
+    help = (
+        "Load the sync endpoints on a WSGI server and their async "
+        "versions on an ASGI server with the same concurrent requests. "
+        "Start both servers with a THROTTLE_USER_RATE above the load."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--wsgi-url",
+            default="http://127.0.0.1:8000",
+            help="Base URL of the WSGI server (runserver, gunicorn)",
+        )
+        parser.add_argument(
+            "--asgi-url",
+            default="http://127.0.0.1:8001",
+            help="Base URL of the ASGI server (uvicorn)",
+        )
+        parser.add_argument(
+            "--token",
+            required=True,
+            help="JWT access token sent as the bearer credentials",
+        )
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+
+    def handle(self, *args, **options):
+        headers = {"Authorization": f"Bearer {options['token']}"}
+        self.stdout.write(
+            f"{'endpoint':<12} {'server':<6} {'req/s':>8} {'p50 ms':>8} "
+            f"{'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+        )
+        for name, wsgi_path, asgi_path in ENDPOINTS:
+            for server, url in (
+                ("wsgi", options["wsgi_url"].rstrip("/") + wsgi_path),
+                ("asgi", options["asgi_url"].rstrip("/") + asgi_path),
+            ):
+                result = run_load(
+                    url,
+                    requests=options["requests"],
+                    concurrency=options["concurrency"],
+                    headers=headers,
+                )
+                self.stdout.write(
+                    f"{name:<12} {server:<6} "
+                    f"{result['requests_per_second']:>8} "
+                    f"{result['p50_ms']!s:>8} {result['p95_ms']!s:>8} "
+                    f"{result['p99_ms']!s:>8} {result['errors']:>7}"
+                )
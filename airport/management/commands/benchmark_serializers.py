@@ -0,0 +1,118 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from rest_framework.renderers import JSONRenderer
+
+from airport.datasets import SCALES, generate_dataset
+from airport.models import Flight
+from airport.query_planner import plan_queryset
+from airport.serializers import FlightListSerializer, RouteListSerializer
+from airport.values_serializers import (
+    FlightListValuesSerializer,
+    RouteListValuesSerializer,
+)
+from airport.views import FlightViewSet, RouteViewSet
+
+LISTS = (
+    (
+        "flight list",
+        FlightViewSet,
+        FlightListSerializer,
+        FlightListValuesSerializer,
+    ),
+    (
+        "route list",
+        RouteViewSet,
+        RouteListSerializer,
+        RouteListValuesSerializer,
+    ),
+)
+
+
+def best_time(render, repeat):
+    """Body and fastest wall time in milliseconds of render()"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = render()
+        timings.append((time.perf_counter() - started) * 1000)
+    return body, round(min(timings), 1)
+
+
+class Command(BaseCommand):
+    """Compares the DRF list serializers with the values_list() ones"""
+
+    help = (
+        "Generate flights and routes in a throwaway test database and "
+        "time querying, serializing and rendering them as JSON with the "
+        "list serializers and with their values_list() counterparts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database and its dataset for the next run",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=options["keepdb"]
+        )
+        try:
+            self.run_benchmark(options)
+        finally:
+            teardown_databases(
+                old_config, verbosity=0, keepdb=options["keepdb"]
+            )
+            teardown_test_environment()
+
+    def run_benchmark(self, options):
+        rows = options["rows"]
+        if not Flight.objects.exists():
+            generate_dataset(
+                dict(SCALES["small"], flights=rows, routes=rows),
+                seed=options["seed"],
+            )
+
+        renderer = JSONRenderer()
+        self.stdout.write(
+            f"{'list':<12} {'rows':>6} {'serializer ms':>14} "
+            f"{'values ms':>10} {'speedup':>8}"
+        )
+        for name, viewset, serializer_class, values_class in LISTS:
+            queryset = plan_queryset(
+                serializer_class, viewset.queryset
+            ).order_by(*viewset.pagination_class.ordering)[:rows]
+            values_serializer = values_class()
+            expected, serializer_ms = best_time(
+                lambda: renderer.render(
+                    serializer_class(queryset.all(), many=True).data
+                ),
+                options["repeat"],
+            )
+            actual, values_ms = best_time(
+                lambda: renderer.render(
+                    values_serializer.to_representation(
+                        values_serializer.prepare(queryset.all())
+                    )
+                ),
+                options["repeat"],
+            )
+            if actual != expected:
+                raise CommandError(f"The {name} JSON differs")
+            self.stdout.write(
+                f"{name:<12} {queryset.count():>6} "
+                f"{serializer_ms:>14} {values_ms:>10} "
+                f"{serializer_ms / values_ms:>7.1f}x"
+            )
@@ -0,0 +1,187 @@
+import json
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from rest_framework.throttling import UserRateThrottle
+
+from airport.throttling import (
+    SlidingWindowStore,
+    SlidingWindowUserRateThrottle,
+)
+
+
+def throttle_class(base, rate, store=None):
+    """Throttle of the base class with the rate and its own store"""
+    attrs = {"rate": rate, "scope": "benchmark"}
+    if store is not None:
+        attrs["allow_request"] = lambda self, request, view: (
+            store.hit(
+                self.get_cache_key(request, view),
+                self.num_requests,
+                self.duration,
+                self.timer(),
+            )[0]
+        )
+    return type(f"Benchmark{base.__name__}", (base,), attrs)
+
+
+def run_throttle(throttle_cls, requests, keys):
+    """Latencies in microseconds of allow_request over the user keys"""
+    users = [
+        SimpleNamespace(user=SimpleNamespace(is_authenticated=True, pk=pk))
+        for pk in range(keys)
+    ]
+    latencies = []
+    allowed = 0
+    for number in range(requests):
+        throttle = throttle_cls()
+        started = time.perf_counter()
+        allowed += throttle.allow_request(users[number % keys], None)
+        latencies.append((time.perf_counter() - started) * 1_000_000)
+    return latencies, allowed
+
+
+def latency_stats_us(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed),
+        "mean_us": round(statistics.fmean(latencies), 1),
+        "p50_us": round(latencies[len(latencies) // 2], 1),
+        "p99_us": round(latencies[int(len(latencies) * 0.99)], 1),
+    }
+
+
+def store_worker(path, slots, rate, requests, keys, results):
+    store = SlidingWindowStore(path, slots)
+    throttle_cls = throttle_class(SlidingWindowUserRateThrottle, rate, store)
+    started = time.perf_counter()
+    latencies, allowed = run_throttle(throttle_cls, requests, keys)
+    results.put((latencies, allowed, time.perf_counter() - started))
+    store.close()
+
+
+class Command(BaseCommand):
+    """Per-request overhead of the throttle backends"""
+
+    help = (
+        "Time allow_request of the cache-based UserRateThrottle and of "
+        "the shared sliding-window throttle, with the sliding window "
+        "also run from several processes at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20000)
+        parser.add_argument(
+            "--keys",
+            type=int,
+            default=100,
+            help="Distinct users the requests are spread over",
+        )
+        parser.add_argument(
+            "--rate",
+            default="1000/minute",
+            help="Throttle rate, the cache history list grows up to it",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=4,
+            help="Processes sharing the sliding-window store",
+        )
+        parser.add_argument("--slots", type=int, default=65536)
+        parser.add_argument(
+            "--output", help="Write the results as JSON to this file"
+        )
+
+    def handle(self, *args, **options):
+        requests, keys = options["requests"], options["keys"]
+        rate = options["rate"]
+        results = {}
+
+        cache.clear()
+        started = time.perf_counter()
+        latencies, allowed = run_throttle(
+            throttle_class(UserRateThrottle, rate), requests, keys
+        )
+        results["cache history"] = dict(
+            latency_stats_us(latencies, time.perf_counter() - started),
+            allowed=allowed,
+        )
+        cache.clear()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "throttle.bin")
+            store = SlidingWindowStore(path, options["slots"])
+            started = time.perf_counter()
+            latencies, allowed = run_throttle(
+                throttle_class(SlidingWindowUserRateThrottle, rate, store),
+                requests,
+                keys,
+            )
+            results["sliding window"] = dict(
+                latency_stats_us(latencies, time.perf_counter() - started),
+                allowed=allowed,
+            )
+            store.clear()
+            store.close()
+
+            results[f"sliding window x{options['processes']}"] = (
+                self.run_processes(path, options)
+            )
+
+        self.stdout.write(
+            f"{'backend':<20} {'req/s':>9} {'mean us':>8} {'p50 us':>8} "
+            f"{'p99 us':>8} {'allowed':>8}"
+        )
+        for name, stats in results.items():
+            self.stdout.write(
+                f"{name:<20} {stats['requests_per_second']:>9} "
+                f"{stats['mean_us']:>8} {stats['p50_us']:>8} "
+                f"{stats['p99_us']:>8} {stats['allowed']:>8}"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+
+    @staticmethod
+    def run_processes(path, options):
+        """Same requests split over processes hitting one store"""
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        per_process = options["requests"] // options["processes"]
+        processes = [
+            context.Process(
+                target=store_worker,
+                args=(
+                    path,
+                    options["slots"],
+                    options["rate"],
+                    per_process,
+                    options["keys"],
+                    queue,
+                ),
+            )
+            for _ in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        latencies = [
+            latency for process_latencies, _, _ in outcomes
+            for latency in process_latencies
+        ]
+        stats = latency_stats_us(
+            latencies, max(elapsed for _, _, elapsed in outcomes)
+        )
+        stats["allowed"] = sum(allowed for _, allowed, _ in outcomes)
+        return stats
@@ -0,0 +1,87 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.schedule_import import (
+    SCHEDULE_FORMATS,
+    ScheduleFileError,
+    import_schedule,
+)
+
+SCHEDULE_EXTENSIONS = {
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+}
+
+
+class Command(BaseCommand):
+    """Imports a season schedule of flights and crew assignments"""
+
+    help = (
+        "Import flights from a CSV or NDJSON schedule with source, "
+        "destination, airplane, departure_time, arrival_time and crew "
+        "columns. Routes are matched by airport names, airplanes by name "
+        "and crew by full name. Invalid rows are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help="Schedule file, - to read standard input"
+        )
+        parser.add_argument(
+            "--format",
+            choices=SCHEDULE_FORMATS,
+            help="Schedule format, guessed from the file extension",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the rows without creating flights",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        schedule_format = options["format"] or SCHEDULE_EXTENSIONS.get(
+            os.path.splitext(path)[1].lower()
+        )
+        if schedule_format is None:
+            raise CommandError("Pass --format for this schedule file")
+
+        if path == "-":
+            report = self.import_file(
+                sys.stdin.buffer, schedule_format, options
+            )
+        else:
+            try:
+                with open(path, "rb") as file:
+                    report = self.import_file(file, schedule_format, options)
+            except OSError as error:
+                raise CommandError(error)
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        message = (
+            f"{report['created']} of {report['rows']} flights "
+            f"{'valid' if options['dry_run'] else 'imported'}, "
+            f"{report['error_count']} rows with errors"
+        )
+        self.stdout.write(
+            self.style.WARNING(message)
+            if report["error_count"]
+            else self.style.SUCCESS(message)
+        )
+
+    def import_file(self, file, schedule_format, options):
+        try:
+            return import_schedule(
+                file,
+                schedule_format,
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+            )
+        except ScheduleFileError as error:
+            # Listed with the row errors, the rows before it are imported
+            return error.report
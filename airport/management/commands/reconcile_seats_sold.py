@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from airport.models import Flight, Ticket
+
+
+class Command(BaseCommand):
+    """Fixes drift of Flight.seats_sold against the real ticket counts"""
+
+    help = "Recalculate Flight.seats_sold from the sold tickets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report flights with a drifted counter",
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Flight.objects
+            .annotate(tickets_count=Count("tickets"))
+            .exclude(seats_sold=F("tickets_count"))
+            .values_list("id", "seats_sold", "tickets_count")
+        )
+        for flight_id, seats_sold, tickets_count in drifted:
+            self.stdout.write(
+                f"Flight {flight_id}: seats_sold={seats_sold}, "
+                f"tickets={tickets_count}"
+            )
+
+        if drifted and not options["dry_run"]:
+            tickets_count = (
+                Ticket.objects
+                .filter(flight=OuterRef("pk"))
+                .values("flight")
+                .annotate(count=Count("id"))
+                .values("count")
+            )
+            Flight.objects.filter(
+                pk__in=[flight_id for flight_id, _, _ in drifted]
+            ).update(seats_sold=Coalesce(Subquery(tickets_count), 0))
+
+        action = "Found" if options["dry_run"] else "Reconciled"
+        self.stdout.write(
+            self.style.SUCCESS(f"{action} {len(drifted)} drifted flight(s)")
+        )
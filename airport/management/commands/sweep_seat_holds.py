@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from airport.seat_holds import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    """Releases seats of the expired seat holds"""
+
+    help = "Delete expired seat holds"
+
+    def handle(self, *args, **options):
+        released = sweep_expired_holds()
+        self.stdout.write(
+            self.style.SUCCESS(f"Released {released} expired seat hold(s)")
+        )
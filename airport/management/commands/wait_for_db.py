@@ -1,20 +1,47 @@
 import time
 
-from django.core.management.base import BaseCommand
-from django.db.utils import OperationalError
-from django.db import connections
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from airport.db_pool import database_ready
 
 
 class Command(BaseCommand):
-    """Pauses execution until db is available"""
+    """Pauses execution until db (and its connection pool) is available"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database alias to probe.",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=None,
+            help="Give up with an error after this many seconds.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds between probes.",
+        )
 
     def handle(self, *args, **options):
-        db_conn = None
+        alias = options["database"]
+        interval = options["interval"]
+        deadline = (
+            time.monotonic() + options["timeout"]
+            if options["timeout"] is not None
+            else None
+        )
 
-        while not db_conn:
-            try:
-                db_conn = connections["default"]
-            except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
+        while not database_ready(alias, timeout=interval):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise CommandError(f"Database {alias} unavailable")
+            self.stdout.write(
+                f"Database unavailable, waiting {interval:g} second..."
+            )
+            time.sleep(interval)
         self.stdout.write(self.style.SUCCESS("Database available"))
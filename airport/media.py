@@ -0,0 +1,176 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import (
+    ImproperlyConfigured,
+    SuspiciousFileOperation,
+)
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+# Names carrying a SHA-256 digest (image variants) or a UUID (uploads)
+# never change content, so clients may keep them for a year
+IMMUTABLE_MEDIA_NAME = re.compile(
+    r"(?:^|[-/])(?:[0-9a-f]{64}|[0-9a-f]{8}(?:-[0-9a-f]{4}){3}-[0-9a-f]{12})"
+    r"(?:-[a-z]+)?\.[a-z0-9]+$"
+)
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+# Only a single byte range is answered with 206, several with the file
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+MEDIA_CHUNK_SIZE = 64 * 1024
+# Values of MEDIA_OFFLOAD, the header handing the file to the web server
+MEDIA_OFFLOAD_HEADERS = {
+    "x-accel-redirect": "X-Accel-Redirect",
+    "x-sendfile": "X-Sendfile",
+}
+
+
+def is_immutable(name):
+    return IMMUTABLE_MEDIA_NAME.search(name) is not None
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive of a single satisfiable byte range, None
+    without a usable Range header. Raises ValueError when unsatisfiable.
+    """
+    match = BYTE_RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range outside of the file")
+    return start, end
+
+
+def read_range(path, start, end):
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(MEDIA_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def set_cache_headers(response, name, etag, last_modified):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    if is_immutable(name):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE
+        )
+    return response
+
+
+def offload_response(name, path, content_type):
+    """Empty response naming the file for the web server to send"""
+    offload = settings.MEDIA_OFFLOAD.lower()
+    if offload not in MEDIA_OFFLOAD_HEADERS:
+        raise ImproperlyConfigured(
+            f"MEDIA_OFFLOAD must be one of {', '.join(MEDIA_OFFLOAD_HEADERS)}"
+        )
+    response = HttpResponse(content_type=content_type)
+    if offload == "x-accel-redirect":
+        location = settings.MEDIA_OFFLOAD_LOCATION.rstrip("/")
+        response[MEDIA_OFFLOAD_HEADERS[offload]] = f"{location}/{name}"
+    else:
+        response[MEDIA_OFFLOAD_HEADERS[offload]] = path
+    return response
+
+
+def file_response(request, path, size, content_type, etag):
+    """Whole file or the requested byte range of it"""
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    if if_range is not None and if_range != etag:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        if request.method == "HEAD":
+            response = HttpResponse(content_type=content_type)
+        else:
+            response = FileResponse(
+                open(path, "rb"), content_type=content_type
+            )
+        response["Content-Length"] = size
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            () if request.method == "HEAD" else read_range(path, start, end),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = end - start + 1
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Media file with long-lived cache headers and ETag validation, the
+    bytes are either sent by the web server (MEDIA_OFFLOAD) or streamed
+    here with HTTP Range support.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (OSError, SuspiciousFileOperation):
+        raise Http404("Media file not found")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file not found")
+    name = os.path.relpath(full_path, settings.MEDIA_ROOT).replace(
+        os.sep, "/"
+    )
+
+    etag = quote_etag(f"{int(stat.st_mtime)}-{stat.st_size:x}")
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        content_type, encoding = mimetypes.guess_type(full_path)
+        content_type = content_type or "application/octet-stream"
+        if settings.MEDIA_OFFLOAD:
+            response = offload_response(name, full_path, content_type)
+        else:
+            response = file_response(
+                request, full_path, stat.st_size, content_type, etag
+            )
+        if encoding:
+            response["Content-Encoding"] = encoding
+    if response.status_code == 416:
+        return response
+    return set_cache_headers(response, name, etag, stat.st_mtime)
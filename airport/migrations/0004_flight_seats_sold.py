@@ -0,0 +1,32 @@
+# Generated by Django 5.1a1 on 2026-10-18 09:12
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_seats_sold(apps, schema_editor):
+    Flight = apps.get_model("airport", "Flight")
+    Ticket = apps.get_model("airport", "Ticket")
+    tickets_count = (
+        Ticket.objects.filter(flight=OuterRef("pk"))
+        .values("flight")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Flight.objects.update(seats_sold=Coalesce(Subquery(tickets_count), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0003_airplane_image_airport_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="seats_sold",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_seats_sold, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.1a1 on 2026-10-18 11:35
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0006_flight_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="crew",
+            options={"ordering": ["id"]},
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1a1 on 2026-10-18 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0007_crew_ordering"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="airplane",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="airport",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
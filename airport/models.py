@@ -3,7 +3,9 @@ import uuid
 from django.core.exceptions import ValidationError
 from django.utils.text import slugify
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 
 
 class AirplaneType(models.Model):
@@ -28,6 +30,8 @@ class Airplane(models.Model):
         AirplaneType, on_delete=models.CASCADE, related_name="airplanes"
     )
     image = models.ImageField(null=True, upload_to=movie_image_file_path)
+    # Storage names of the resized variants of image, see airport.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     @property
     def capacity(self) -> int:
@@ -41,6 +45,10 @@ class Crew(models.Model):
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
 
+    class Meta:
+        # Stable crew lists in flight responses, whatever the plan
+        ordering = ["id"]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -72,6 +80,8 @@ class Airport(models.Model):
         City, on_delete=models.CASCADE, related_name="airports"
     )
     image = models.ImageField(null=True, upload_to=movie_image_file_path)
+    # Storage names of the resized variants of image, see airport.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.name} ({self.closest_big_city})"
@@ -100,6 +110,34 @@ class Flight(models.Model):
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crew = models.ManyToManyField(Crew)
+    seats_sold = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["departure_time", "id"],
+                name="flight_departure_idx",
+            ),
+            models.Index(
+                fields=["route", "departure_time"],
+                name="flight_route_departure_idx",
+            ),
+            models.Index(
+                fields=["arrival_time", "id"],
+                name="flight_arrival_idx",
+            ),
+        ]
+
+    @staticmethod
+    def update_seats_sold(flight_id, delta):
+        """
+        Atomically shift the denormalized sold tickets counter, a counter
+        that drifted below the tickets stays at 0 instead of failing
+        the check constraint
+        """
+        Flight.objects.filter(pk=flight_id).update(
+            seats_sold=Greatest(F("seats_sold") + delta, 0)
+        )
 
     def __str__(self):
         return self.route
@@ -165,9 +203,26 @@ class Ticket(models.Model):
             **kwargs
     ):
         self.full_clean()
-        return super(Ticket, self).save(
-            force_insert, force_update, using, update_fields
-        )
+        with transaction.atomic(using=using):
+            if self._state.adding:
+                stored_flight_id = None
+            elif update_fields is None or "flight" in update_fields:
+                stored_flight_id = (
+                    Ticket.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list("flight_id", flat=True)
+                    .first()
+                )
+            else:
+                stored_flight_id = self.flight_id
+            super(Ticket, self).save(
+                force_insert, force_update, using, update_fields
+            )
+            if stored_flight_id != self.flight_id:
+                # Created, or moved to another flight
+                if stored_flight_id is not None:
+                    Flight.update_seats_sold(stored_flight_id, -1)
+                Flight.update_seats_sold(self.flight_id, 1)
 
     class Meta:
         unique_together = ("flight", "row", "seat")
@@ -177,3 +232,28 @@ class Ticket(models.Model):
         return (
             f"{str(self.flight)} (row: {self.row}, seat: {self.seat})"
         )
+
+
+class SeatHold(models.Model):
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ("flight", "row", "seat")
+        ordering = ["expires_at"]
+
+    def __str__(self):
+        return (
+            f"Hold on flight {self.flight_id} "
+            f"(row: {self.row}, seat: {self.seat}) until {self.expires_at}"
+        )
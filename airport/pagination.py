@@ -0,0 +1,153 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over a composite, unique ordering key.
+
+    DRF's CursorPagination filters by the first ordering field only and
+    skips ties with an offset, so pages drift when rows sharing that value
+    are inserted. Here the cursor holds the values of every ordering
+    field and pages are fetched with a row comparison on the whole key,
+    which the composite index serves at the same cost for every page.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("id",)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.set_page(list(page_queryset))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        The unevaluated query of the requested page plus one row,
+        so async views can fetch it with the async ORM.
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self.reverse, self.current_position = False, None
+        else:
+            self.reverse = self.cursor.reverse
+            self.current_position = self.cursor.position
+
+        if self.reverse:
+            queryset = queryset.order_by(*self.reversed_ordering())
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if self.current_position is not None:
+            try:
+                queryset = queryset.filter(
+                    self.position_filter(self.current_position, self.reverse)
+                )
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        """Build the page and the links from the rows of the page query"""
+        reverse, current_position = self.reverse, self.current_position
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def reversed_ordering(self):
+        return tuple(
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        )
+
+    def position_filter(self, position, reverse):
+        """
+        Row comparison (a, b) > (x, y) expanded to
+        a >= x AND (a > x OR (a = x AND b > y)),
+        the leading bound lets the planner seek the index.
+        """
+        values = json.loads(position)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValueError("Cursor position does not match the ordering")
+
+        lookups = []
+        for field in self.ordering:
+            descending = field.startswith("-")
+            lookups.append(
+                (field.lstrip("-"), "lt" if descending != reverse else "gt")
+            )
+
+        condition = Q()
+        equal = Q()
+        for (name, lookup), value in zip(lookups, values):
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+
+        leading_name, leading_lookup = lookups[0]
+        leading_bound = Q(**{f"{leading_name}__{leading_lookup}e": values[0]})
+        return leading_bound & condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip("-")
+            if isinstance(instance, dict):
+                values.append(str(instance[name]))
+            else:
+                values.append(str(getattr(instance, name)))
+        return json.dumps(values, separators=(",", ":"))
+
+
+class FlightPagination(KeysetPagination):
+    ordering = ("departure_time", "id")
+
+
+class RoutePagination(KeysetPagination):
+    ordering = ("id",)
+
+
+class AirportPagination(KeysetPagination):
+    ordering = ("id",)
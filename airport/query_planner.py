@@ -0,0 +1,319 @@
+import logging
+from contextlib import ExitStack
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.db.models.query import ModelIterable
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import ManyRelatedField, RelatedField
+
+from airport.models import (
+    AirplaneType,
+    Airplane,
+    Crew,
+    Country,
+    City,
+    Airport,
+    Route,
+    Flight,
+    Ticket,
+    Order,
+    SeatHold
+)
+from airport.query_stats import query_stats
+
+logger = logging.getLogger(__name__)
+
+# Attributes read by the properties and __str__ methods of the models,
+# relations among them are followed as if str() was applied to them
+ATTRIBUTE_DEPENDENCIES = {
+    AirplaneType: {"__str__": ("name",)},
+    Airplane: {
+        "__str__": ("name",),
+        "capacity": ("rows", "seats_in_row"),
+    },
+    Crew: {"__str__": ("first_name", "last_name")},
+    Country: {"__str__": ("name",)},
+    City: {"__str__": ("name", "country")},
+    Airport: {"__str__": ("name", "closest_big_city")},
+    Route: {"__str__": ("source", "destination")},
+    Flight: {"__str__": ("route",)},
+    Order: {"__str__": ("created_at",)},
+    Ticket: {"__str__": ("flight", "row", "seat")},
+    SeatHold: {"__str__": ("flight_id", "row", "seat", "expires_at")},
+}
+# Serializer field stand-in for str() of a related instance
+STR = "__str__"
+
+
+def join(path, name):
+    return f"{path}__{name}" if path else name
+
+
+def is_column(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return False
+    return field.concrete and not field.many_to_many
+
+
+class QueryPlan:
+    """
+    select_related paths, prefetches and columns a serializer reads from
+    the instances of model. Columns are tracked per select_related path,
+    None when the serializer may read any of them.
+    """
+
+    def __init__(self, model, annotations=()):
+        self.model = model
+        self.annotations = frozenset(annotations)
+        self.select_related = set()
+        self.prefetches = {}
+        self.columns = {"": set()}
+
+    def load(self, path, name):
+        if self.columns[path] is not None:
+            self.columns[path].add(name)
+
+    def load_all(self, path):
+        self.columns[path] = None
+
+    def only_fields(self):
+        """Arguments of only(), None when every column is needed"""
+        if self.columns[""] is None:
+            return None
+        fields = [self.model._meta.pk.name]
+        for path, columns in sorted(self.columns.items()):
+            # An unrestricted model keeps the columns of those below it
+            parts = path.split("__") if path else []
+            if any(
+                self.columns["__".join(parts[:end])] is None
+                for end in range(1, len(parts) + 1)
+            ):
+                continue
+            fields.extend(join(path, column) for column in sorted(columns))
+        return fields
+
+    def can_restrict(self, queryset):
+        """only() conflicts with deferred columns and other joins"""
+        if queryset.query.deferred_loading != (frozenset(), True):
+            return False
+        select_related = queryset.query.select_related
+        if select_related is True:
+            return False
+        paths, pending = set(), [("", select_related or {})]
+        while pending:
+            path, related = pending.pop()
+            for name, nested in related.items():
+                paths.add(join(path, name))
+                pending.append((join(path, name), nested))
+        return paths <= self.select_related
+
+    def apply(self, queryset, columns=()):
+        """
+        The queryset with the planned joins, prefetches and columns.
+        Prefetches of the queryset take precedence over planned ones,
+        columns are loaded on top of the planned ones.
+        """
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        prefetched = {
+            lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+            for lookup in queryset._prefetch_related_lookups
+        }
+        prefetches = [
+            Prefetch(
+                lookup, queryset=plan.apply(plan.model._default_manager.all())
+            )
+            for lookup, plan in sorted(self.prefetches.items())
+            if lookup not in prefetched
+        ]
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        fields = self.only_fields()
+        if fields is not None and self.can_restrict(queryset):
+            columns = [
+                column for column in columns if is_column(self.model, column)
+            ]
+            queryset = queryset.only(*fields, *columns)
+        return queryset
+
+
+def is_pk_only(field):
+    """Related fields representing an instance by its primary key"""
+    return isinstance(field, RelatedField) and field.use_pk_only_optimization()
+
+
+def plan_serializer(plan, path, model, serializer):
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == "*":
+            if isinstance(field, serializers.BaseSerializer):
+                plan_serializer(plan, path, model, field)
+            else:
+                plan.load_all(path)
+            continue
+        plan_source(plan, path, model, field.source_attrs, field)
+
+
+def plan_value(plan, path, model, field):
+    """Plan what field reads from the instance at path"""
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    elif isinstance(field, ManyRelatedField):
+        field = field.child_relation
+
+    if isinstance(field, serializers.BaseSerializer):
+        plan_serializer(plan, path, model, field)
+    elif field == STR or isinstance(
+        field, (serializers.StringRelatedField, serializers.CharField)
+    ):
+        plan_source(plan, path, model, [STR], None)
+    elif isinstance(field, serializers.SlugRelatedField):
+        plan_source(plan, path, model, [field.slug_field], STR)
+    elif not is_pk_only(field):
+        plan.load_all(path)
+
+
+def plan_source(plan, path, model, attrs, field):
+    """Plan the attribute lookups of a source from the instance at path"""
+    name, rest = attrs[0], attrs[1:]
+    if name == "pk":
+        name = model._meta.pk.name
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        model_field = None
+
+    if model_field is None:
+        attnames = {
+            concrete.attname: concrete.name
+            for concrete in model._meta.concrete_fields
+        }
+        dependencies = ATTRIBUTE_DEPENDENCIES.get(model, {}).get(name)
+        if name in attnames:
+            plan.load(path, attnames[name])
+        elif dependencies is not None and not rest:
+            for dependency in dependencies:
+                plan_source(plan, path, model, [dependency], STR)
+        elif not (path == "" and name in plan.annotations):
+            plan.load_all(path)
+        return
+    if not model_field.is_relation:
+        plan.load(path, name)
+        return
+
+    related_model = model_field.related_model
+    if model_field.many_to_many or model_field.one_to_many:
+        lookup = join(path, name)
+        if lookup not in plan.prefetches:
+            plan.prefetches[lookup] = QueryPlan(related_model)
+        related_plan, related_path = plan.prefetches[lookup], ""
+        if model_field.one_to_many:
+            # Prefetched rows are matched to their instance by this key
+            related_plan.load("", model_field.field.name)
+    else:
+        if model_field.concrete:
+            plan.load(path, name)
+            if not rest and is_pk_only(field):
+                return
+        related_plan, related_path = plan, join(path, name)
+        plan.select_related.add(related_path)
+        plan.columns.setdefault(related_path, set())
+
+    if rest:
+        plan_source(related_plan, related_path, related_model, rest, field)
+    else:
+        plan_value(related_plan, related_path, related_model, field)
+
+
+@lru_cache(maxsize=None)
+def get_query_plan(serializer_class, model, annotations=frozenset()):
+    """
+    Plan of serializer_class for a queryset of model, annotations are
+    the names the queryset annotates its instances with
+    """
+    plan = QueryPlan(model, annotations)
+    plan_serializer(plan, "", model, serializer_class())
+    return plan
+
+
+def plan_queryset(serializer_class, queryset, columns=()):
+    """queryset with what serializer_class reads from its instances"""
+    plan = get_query_plan(
+        serializer_class,
+        queryset.model,
+        frozenset(queryset.query.annotations),
+    )
+    return plan.apply(queryset, columns)
+
+
+class QueryPlanMixin:
+    """
+    Safe-method requests load what the serializer of the action reads,
+    planned from its fields, on top of the queryset of the view.
+    With QUERY_PLAN_WARNINGS, queries run while serializing the loaded
+    instances are logged, they are relations the plan missed.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        ordering = getattr(self.paginator, "ordering", None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        return plan_queryset(
+            self.get_serializer_class(),
+            queryset,
+            # Read from the last instance for the next page cursor
+            [field.lstrip("-") for field in ordering],
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        # Without pagination the serializer evaluates the queryset
+        if (
+            page is not None
+            and getattr(queryset, "_iterable_class", None) is ModelIterable
+        ):
+            self.check_unplanned_queries()
+        return page
+
+    def get_object(self):
+        instance = super().get_object()
+        self.check_unplanned_queries()
+        return instance
+
+    def check_unplanned_queries(self):
+        """Record the queries run from here until the response"""
+        if (
+            not settings.QUERY_PLAN_WARNINGS
+            or self.request.method not in SAFE_METHODS
+            or getattr(self, "_unplanned_queries", None) is not None
+        ):
+            return
+        stack = ExitStack()
+        self._unplanned_queries = stack, stack.enter_context(query_stats())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        unplanned_queries = getattr(self, "_unplanned_queries", None)
+        if unplanned_queries is not None:
+            stack, stats = unplanned_queries
+            stack.close()
+            self._unplanned_queries = None
+            if stats.count:
+                logger.warning(
+                    "%s %s ran %d queries the plan of %s missed: %s",
+                    request.method,
+                    request.path,
+                    stats.count,
+                    self.get_serializer_class().__name__,
+                    list(stats.statements)[:3],
+                )
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,121 @@
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """
+    Execute wrapper counting the queries, their total time and
+    repeated ones: duplicates share SQL and parameters, similar queries
+    share only the SQL, which is the shape of an N+1.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.statements = Counter()
+        self.executions = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+            self.executions[(sql, repr(params))] += 1
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.executions.values())
+
+    @property
+    def similar(self):
+        return sum(count - 1 for count in self.statements.values())
+
+    @property
+    def time_ms(self):
+        return round(self.time * 1000, 2)
+
+    def most_repeated(self, limit=3):
+        return [
+            (sql, count)
+            for sql, count in self.statements.most_common(limit)
+            if count > 1
+        ]
+
+
+@contextmanager
+def query_stats():
+    """Record the queries of every database alias in the block"""
+    stats = QueryStats()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(stats))
+        yield stats
+
+
+class QueryStatsMiddleware:
+    """
+    Records query count, duplicates and database time of every request.
+    With QUERY_STATS_HEADERS they are returned as X-DB-* headers,
+    requests above QUERY_STATS_WARNING_THRESHOLD queries are logged.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with query_stats() as stats:
+            response = self.get_response(request)
+        return self.record(request, response, stats)
+
+    async def __acall__(self, request):
+        # The ORM calls of async views run in the thread of
+        # sync_to_async, the wrappers go on the connections of that thread
+        stack = ExitStack()
+        stats = await sync_to_async(stack.enter_context)(query_stats())
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.record(request, response, stats)
+
+    def record(self, request, response, stats):
+        if settings.QUERY_STATS_HEADERS:
+            response["X-DB-Query-Count"] = stats.count
+            response["X-DB-Duplicate-Queries"] = stats.duplicates
+            response["X-DB-Similar-Queries"] = stats.similar
+            response["X-DB-Time-Ms"] = stats.time_ms
+        if stats.count > settings.QUERY_STATS_WARNING_THRESHOLD:
+            logger.warning(
+                "%s %s ran %d queries (%d duplicates, %d similar) in %s ms, "
+                "most repeated: %s",
+                request.method,
+                request.path,
+                stats.count,
+                stats.duplicates,
+                stats.similar,
+                stats.time_ms,
+                stats.most_repeated(),
+            )
+        return response
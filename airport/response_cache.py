@@ -0,0 +1,170 @@
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from airport.db_router import pin_all_reads
+
+RESPONSE_CACHE_PREFIX = "airport:response_cache"
+
+
+class LRUCache:
+    """Thread-safe in-process mapping that drops least recently used keys"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class ResponseCache:
+    """
+    Two-level cache of response data grouped by resource.
+    Lookups go to the process-local LRU first, then to the shared cache.
+    Every group has a version token in the shared cache, so invalidating
+    a group in one process makes the keys of all processes miss.
+    """
+
+    def __init__(self, max_size):
+        self.local = LRUCache(max_size)
+        self.stats = defaultdict(
+            lambda: {"local_hits": 0, "shared_hits": 0, "misses": 0}
+        )
+        self.stats_lock = threading.Lock()
+
+    @staticmethod
+    def version_key(group):
+        return f"{RESPONSE_CACHE_PREFIX}:version:{group}"
+
+    def group_version(self, group):
+        key = self.version_key(group)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    def entry_key(self, group, request):
+        params = sorted(request.query_params.lists())
+        digest = hashlib.blake2b(
+            repr((request.path, params)).encode(), digest_size=16
+        ).hexdigest()
+        return (
+            f"{RESPONSE_CACHE_PREFIX}:{group}:"
+            f"{self.group_version(group)}:{digest}"
+        )
+
+    def count(self, group, counter):
+        with self.stats_lock:
+            self.stats[group][counter] += 1
+
+    def get_or_set(self, group, request, get_response):
+        """
+        Return the cached response of the request or build it with
+        get_response. Only successful responses are stored.
+        """
+        key = self.entry_key(group, request)
+
+        data = self.local.get(key)
+        if data is not None:
+            self.count(group, "local_hits")
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        data = cache.get(key)
+        if data is not None:
+            self.count(group, "shared_hits")
+            self.local.set(key, data)
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        self.count(group, "misses")
+        response = get_response()
+        if response.status_code == 200:
+            # Plain containers do not keep the serializer and instances alive
+            data = (
+                list(response.data)
+                if isinstance(response.data, list)
+                else dict(response.data)
+            )
+            self.local.set(key, data)
+            cache.set(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def invalidate(self, *groups):
+        pin_all_reads()
+        cache.set_many(
+            {self.version_key(group): uuid.uuid4().hex for group in groups},
+            None,
+        )
+
+    def clear(self):
+        self.local.clear()
+        with self.stats_lock:
+            self.stats.clear()
+
+    def get_stats(self):
+        with self.stats_lock:
+            groups = {
+                group: dict(stats) for group, stats in self.stats.items()
+            }
+        return {
+            "size": len(self.local),
+            "max_size": self.local.max_size,
+            "groups": groups,
+        }
+
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def invalidate_response_cache(*groups):
+    """
+    Mark the cached responses of the groups as stale in every process
+    once the current transaction commits, so a response rendered from
+    the old rows is never cached under the new token.
+    """
+    transaction.on_commit(lambda: response_cache.invalidate(*groups))
+
+
+class CachedListMixin:
+    """
+    Serve list responses of the viewset from the response cache.
+    Permissions are checked before the cache is consulted.
+    """
+
+    cache_group = None
+
+    def list(self, request, *args, **kwargs):
+        return response_cache.get_or_set(
+            self.cache_group,
+            request,
+            lambda: super(CachedListMixin, self).list(
+                request, *args, **kwargs
+            ),
+        )
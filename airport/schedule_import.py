@@ -0,0 +1,265 @@
+import codecs
+import csv
+import json
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from airport.conditional import bump_versions
+from airport.itineraries import invalidate_itineraries
+from airport.models import Airplane, Crew, Flight, Route
+
+SCHEDULE_FORMATS = ("csv", "ndjson")
+SCHEDULE_FIELDS = (
+    "source",
+    "destination",
+    "airplane",
+    "departure_time",
+    "arrival_time",
+    "crew",
+)
+# Separator of crew member names in CSV schedules
+CREW_SEPARATOR = ";"
+# Row errors listed in the report, the rest are only counted
+SCHEDULE_MAX_REPORTED_ERRORS = 1000
+
+AMBIGUOUS = object()
+NOT_UTF8_MESSAGE = "The file is not valid UTF-8."
+NO_SCHEDULE_MESSAGE = "No schedule file was submitted."
+
+
+class ScheduleFileError(Exception):
+    """
+    A schedule that can not be read past a line. The report of the rows
+    imported before it is attached once the importer stops.
+    """
+
+    def __init__(self, line, message):
+        super().__init__(message)
+        self.line = line
+        self.report = None
+
+
+def read_csv(stream):
+    """(line number, dict) of the rows of a CSV schedule with a header"""
+    reader = csv.DictReader(codecs.iterdecode(stream, "utf-8"))
+    try:
+        for row in reader:
+            yield reader.line_num, row
+    except UnicodeDecodeError:
+        raise ScheduleFileError(reader.line_num + 1, NOT_UTF8_MESSAGE)
+    except csv.Error as error:
+        # DictReader only copies the line number of rows it returns
+        raise ScheduleFileError(
+            reader.reader.line_num, f"Invalid CSV: {error}."
+        )
+
+
+def read_ndjson(stream):
+    """(line number, dict) of a schedule with one JSON object per line"""
+    line_number = 0
+    try:
+        for line_number, line in enumerate(
+            codecs.iterdecode(stream, "utf-8"), start=1
+        ):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+    except UnicodeDecodeError:
+        raise ScheduleFileError(line_number + 1, NOT_UTF8_MESSAGE)
+
+
+def read_missing():
+    """Rows of a request without a body, e.g. an unsupported chunked upload"""
+    raise ScheduleFileError(1, NO_SCHEDULE_MESSAGE)
+    yield
+
+
+SCHEDULE_READERS = {"csv": read_csv, "ndjson": read_ndjson}
+SCHEDULE_MEDIA_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+def lookup_map(pairs):
+    """Natural key to id, keys shared by several rows are ambiguous"""
+    lookup = {}
+    for key, pk in pairs:
+        lookup[key] = AMBIGUOUS if key in lookup else pk
+    return lookup
+
+
+class ScheduleImporter:
+    """
+    Validates schedule rows against in-memory maps of routes by airport
+    names, airplanes by name and crew by full name, then inserts the
+    valid flights and their crew in batches. Invalid rows are reported
+    with their line number and skipped.
+    """
+
+    def __init__(self, batch_size=1000, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.routes = lookup_map(
+            ((source, destination), pk)
+            for pk, source, destination in Route.objects.values_list(
+                "id", "source__name", "destination__name"
+            )
+        )
+        self.airplanes = lookup_map(
+            Airplane.objects.values_list("name", "id")
+        )
+        self.crews = lookup_map(
+            (f"{first_name} {last_name}", pk)
+            for pk, first_name, last_name in Crew.objects.values_list(
+                "id", "first_name", "last_name"
+            )
+        )
+        self.report = {
+            "rows": 0,
+            "created": 0,
+            "error_count": 0,
+            "errors": [],
+        }
+
+    def resolve(self, lookup, key, field, errors):
+        pk = lookup.get(key)
+        if pk is None:
+            errors.setdefault(field, []).append(f"{key!r} does not exist.")
+        elif pk is AMBIGUOUS:
+            errors.setdefault(field, []).append(
+                f"{key!r} matches several objects."
+            )
+        return pk
+
+    def parse_time(self, value, field, errors):
+        value = parse_datetime(str(value or "").strip())
+        if value is None:
+            errors[field] = ["Enter a valid date/time."]
+        elif timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    def parse_row(self, row):
+        """(Flight, crew ids) of a row, or the errors of its fields"""
+        if row is None:
+            return None, {"row": ["Enter a valid JSON object."]}
+        errors = {}
+        for field in SCHEDULE_FIELDS[:-1]:
+            if not str(row.get(field) or "").strip():
+                errors[field] = ["This field is required."]
+        if errors:
+            return None, errors
+
+        route_id = self.resolve(
+            self.routes,
+            (str(row["source"]).strip(), str(row["destination"]).strip()),
+            "route",
+            errors,
+        )
+        airplane_id = self.resolve(
+            self.airplanes, str(row["airplane"]).strip(), "airplane", errors
+        )
+        crew = row.get("crew") or []
+        if not isinstance(crew, list):
+            crew = str(crew).split(CREW_SEPARATOR)
+        names = {str(name).strip() for name in crew} - {""}
+        crew_ids = {
+            self.resolve(self.crews, name, "crew", errors)
+            for name in sorted(names)
+        }
+        departure_time = self.parse_time(
+            row["departure_time"], "departure_time", errors
+        )
+        arrival_time = self.parse_time(
+            row["arrival_time"], "arrival_time", errors
+        )
+        if departure_time and arrival_time and arrival_time <= departure_time:
+            errors["arrival_time"] = ["Arrival must be after departure."]
+        if errors:
+            return None, errors
+
+        flight = Flight(
+            route_id=route_id,
+            airplane_id=airplane_id,
+            departure_time=departure_time,
+            arrival_time=arrival_time,
+        )
+        return (flight, crew_ids), None
+
+    def add_error(self, line, errors):
+        self.report["error_count"] += 1
+        if len(self.report["errors"]) < SCHEDULE_MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"line": line, "errors": errors})
+
+    def run(self, rows):
+        """
+        Import the (line number, dict) rows of a reader.
+        Returns the report of created flights and row errors.
+        A ScheduleFileError of the reader stops the import, the rows
+        before it are imported and it is reported as an error of its line.
+        """
+        batch = []
+        try:
+            for line, row in rows:
+                self.report["rows"] += 1
+                parsed, errors = self.parse_row(row)
+                if errors:
+                    self.add_error(line, errors)
+                    continue
+                batch.append(parsed)
+                if len(batch) >= self.batch_size:
+                    self.insert(batch)
+                    batch = []
+        except ScheduleFileError as error:
+            self.add_error(error.line, {"file": [str(error)]})
+            error.report = self.finish(batch)
+            raise
+        return self.finish(batch)
+
+    def finish(self, batch):
+        self.insert(batch)
+        if self.report["created"] and not self.dry_run:
+            invalidate_schedule_caches()
+        return self.report
+
+    def insert(self, batch):
+        if not batch:
+            return
+        if not self.dry_run:
+            with transaction.atomic():
+                flights = Flight.objects.bulk_create(
+                    [flight for flight, crew_ids in batch]
+                )
+                Flight.crew.through.objects.bulk_create(
+                    Flight.crew.through(flight_id=flight.id, crew_id=crew_id)
+                    for flight, (_, crew_ids) in zip(flights, batch)
+                    for crew_id in crew_ids
+                )
+        self.report["created"] += len(batch)
+
+
+def import_schedule(stream, schedule_format, batch_size=1000, dry_run=False):
+    """Import a CSV or NDJSON schedule from a binary stream or None"""
+    if stream is None:
+        rows = read_missing()
+    else:
+        rows = SCHEDULE_READERS[schedule_format](stream)
+    return ScheduleImporter(batch_size, dry_run).run(rows)
+
+
+def invalidate_schedule_caches():
+    """
+    bulk_create sends no signals, the itinerary graph and the flight
+    list ETags are invalidated once for the whole import.
+    """
+    invalidate_itineraries()
+    bump_versions("flight:all")
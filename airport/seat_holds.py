@@ -0,0 +1,160 @@
+import hashlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from airport.models import SeatHold, Ticket
+
+
+class SeatHoldConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are not available."
+    default_code = "seat_unavailable"
+
+
+def seat_lock_key(flight_id, row, seat):
+    """Signed 64-bit advisory lock key of a single seat"""
+    digest = hashlib.blake2b(
+        f"airport:seat:{flight_id}:{row}:{seat}".encode(), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def try_lock_seats(flight_id, seats):
+    """
+    Take transaction-scoped advisory locks on the seats without waiting.
+    Returns False as soon as another transaction holds one of them.
+    """
+    if connection.vendor != "postgresql":
+        return True
+    keys = sorted(seat_lock_key(flight_id, row, seat) for row, seat in seats)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT bool_and(pg_try_advisory_xact_lock(key)) "
+            "FROM unnest(%s::bigint[]) AS key",
+            [keys],
+        )
+        return bool(cursor.fetchone()[0])
+
+
+def hold_seats(user, flight, seats):
+    """
+    Hold the (row, seat) pairs of the flight for the user.
+    Seats already held by the same user get their expiry extended.
+    Raises SeatHoldConflict if any seat is locked, sold or held by others
+    and ValidationError above SEAT_HOLD_MAX_SEATS held seats of the user.
+    """
+    seats = set(seats)
+    now = timezone.now()
+    expires_at = now + settings.SEAT_HOLD_TTL
+
+    held_elsewhere = {
+        (flight_id, row, seat)
+        for flight_id, row, seat in SeatHold.objects.filter(
+            user=user, expires_at__gt=now
+        ).values_list("flight_id", "row", "seat")
+        if flight_id != flight.id or (row, seat) not in seats
+    }
+    if len(held_elsewhere) + len(seats) > settings.SEAT_HOLD_MAX_SEATS:
+        raise ValidationError(
+            {
+                "seats": [
+                    f"At most {settings.SEAT_HOLD_MAX_SEATS} seats can be "
+                    "held at a time."
+                ]
+            }
+        )
+
+    with transaction.atomic():
+        if not try_lock_seats(flight.id, seats):
+            raise SeatHoldConflict()
+
+        rows = {row for row, _ in seats}
+        seat_numbers = {seat for _, seat in seats}
+        sold = {
+            place
+            for place in Ticket.objects.filter(
+                flight=flight, row__in=rows, seat__in=seat_numbers
+            ).values_list("row", "seat")
+            if place in seats
+        }
+        held = {
+            (hold.row, hold.seat): hold
+            for hold in SeatHold.objects.filter(
+                flight=flight, row__in=rows, seat__in=seat_numbers
+            )
+            if (hold.row, hold.seat) in seats
+        }
+        held_by_others = {
+            place
+            for place, hold in held.items()
+            if hold.user_id != user.id and hold.expires_at > now
+        }
+        unavailable = sold | held_by_others
+        if unavailable:
+            raise SeatHoldConflict(
+                {
+                    "seats": [
+                        {"row": row, "seat": seat}
+                        for row, seat in sorted(unavailable)
+                    ]
+                }
+            )
+
+        SeatHold.objects.filter(
+            pk__in=[hold.pk for hold in held.values()]
+        ).delete()
+        return SeatHold.objects.bulk_create(
+            SeatHold(
+                flight=flight,
+                user=user,
+                row=row,
+                seat=seat,
+                expires_at=expires_at,
+            )
+            for row, seat in sorted(seats)
+        )
+
+
+def claim_seats(user, seats):
+    """
+    Lock the (flight id, row, seat) places of an order as hold_seats
+    does and delete the holds on them, so a hold taken by a concurrent
+    request is never sold to someone else. Must run in the transaction
+    creating the tickets. Raises SeatHoldConflict if a seat is locked
+    or held by another user.
+    """
+    now = timezone.now()
+    flight_seats = defaultdict(set)
+    for flight_id, row, seat in seats:
+        flight_seats[flight_id].add((row, seat))
+    for flight_id, places in sorted(flight_seats.items()):
+        if not try_lock_seats(flight_id, places):
+            raise SeatHoldConflict()
+
+    holds = [
+        hold
+        for hold in SeatHold.objects.filter(
+            flight_id__in=flight_seats,
+            row__in={row for _, row, _ in seats},
+            seat__in={seat for _, _, seat in seats},
+        )
+        if (hold.flight_id, hold.row, hold.seat) in seats
+    ]
+    if any(
+        hold.user_id != user.id and hold.expires_at > now for hold in holds
+    ):
+        raise SeatHoldConflict()
+    SeatHold.objects.filter(pk__in=[hold.pk for hold in holds]).delete()
+
+
+def sweep_expired_holds():
+    """Delete expired holds, returns the number of released seats"""
+    deleted, _ = SeatHold.objects.filter(
+        expires_at__lte=timezone.now()
+    ).delete()
+    return deleted
@@ -0,0 +1,96 @@
+import base64
+
+from django.core.cache import cache
+
+from airport.db_router import pin_all_reads
+from airport.models import Airplane, Ticket
+
+SEAT_MAP_CACHE_TIMEOUT = 60 * 60
+SEAT_MAP_ENCODINGS = ("bitmap", "rle")
+
+
+def seat_map_cache_key(flight_id):
+    return f"airport:seat_map:{flight_id}"
+
+
+def build_seat_bitmap(rows, seats_in_row, taken_places):
+    """
+    Pack (row, seat) pairs into a bitmap of rows * seats_in_row bits.
+    Seat (row, seat) is bit (row - 1) * seats_in_row + (seat - 1),
+    most significant bit first inside every byte.
+    """
+    bitmap = bytearray((rows * seats_in_row + 7) // 8)
+    for row, seat in taken_places:
+        index = (row - 1) * seats_in_row + (seat - 1)
+        bitmap[index // 8] |= 0x80 >> (index % 8)
+    return bytes(bitmap)
+
+
+def encode_runs(bitmap, size):
+    """Run lengths of alternating free/taken seats, starting with free"""
+    runs = []
+    current, length = 0, 0
+    for index in range(size):
+        bit = (bitmap[index // 8] >> (7 - index % 8)) & 1
+        if bit == current:
+            length += 1
+        else:
+            runs.append(length)
+            current, length = bit, 1
+    runs.append(length)
+    return runs
+
+
+def get_seat_map(flight_id):
+    """
+    Return cached occupancy of the flight, building it on a miss.
+    Returns None if the flight does not exist.
+    """
+    key = seat_map_cache_key(flight_id)
+    seat_map = cache.get(key)
+    if seat_map is None:
+        airplane = (
+            Airplane.objects
+            .filter(flights__id=flight_id)
+            .values("rows", "seats_in_row")
+            .first()
+        )
+        if airplane is None:
+            return None
+        taken_places = list(
+            Ticket.objects
+            .filter(flight_id=flight_id)
+            .values_list("row", "seat")
+        )
+        seat_map = {
+            "rows": airplane["rows"],
+            "seats_in_row": airplane["seats_in_row"],
+            "taken": len(taken_places),
+            "bitmap": build_seat_bitmap(
+                airplane["rows"], airplane["seats_in_row"], taken_places
+            ),
+        }
+        cache.set(key, seat_map, SEAT_MAP_CACHE_TIMEOUT)
+    return seat_map
+
+
+def serialize_seat_map(flight_id, seat_map, encoding="bitmap"):
+    size = seat_map["rows"] * seat_map["seats_in_row"]
+    data = {
+        "flight": flight_id,
+        "rows": seat_map["rows"],
+        "seats_in_row": seat_map["seats_in_row"],
+        "capacity": size,
+        "taken": seat_map["taken"],
+        "encoding": encoding,
+    }
+    if encoding == "rle":
+        data["runs"] = encode_runs(seat_map["bitmap"], size)
+    else:
+        data["bitmap"] = base64.b64encode(seat_map["bitmap"]).decode()
+    return data
+
+
+def invalidate_seat_map(*flight_ids):
+    pin_all_reads()
+    cache.delete_many([seat_map_cache_key(pk) for pk in flight_ids])
@@ -1,6 +1,12 @@
-from django.db import transaction
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Value
+from django.utils import timezone
+from django.utils.text import format_lazy
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.validators import UniqueTogetherValidator
 from airport.models import (
     AirplaneType,
     Airplane,
@@ -11,8 +17,30 @@ from airport.models import (
     Route,
     Flight,
     Ticket,
-    Order
+    Order,
+    SeatHold
+)
+from airport.conditional import bump_versions
+from airport.images import variant_urls
+from airport.seat_holds import SeatHoldConflict, claim_seats
+from airport.seat_map import invalidate_seat_map
+
+SEAT_TAKEN_MESSAGE = format_lazy(
+    UniqueTogetherValidator.message, field_names="flight, row, seat"
 )
+SEAT_HELD_MESSAGE = "This seat is held by another customer."
+
+
+class ImageVariantsField(serializers.Field):
+    """URLs of the resized image variants, empty while they are pending"""
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return variant_urls(instance, self.context.get("request"))
 
 
 class AirplaneTypeSerializer(serializers.ModelSerializer):
@@ -22,9 +50,11 @@ class AirplaneTypeSerializer(serializers.ModelSerializer):
 
 
 class AirplaneImageSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Airplane
-        fields = ("id", "image")
+        fields = ("id", "image", "image_variants")
 
 
 class AirplaneSerializer(serializers.ModelSerializer):
@@ -49,6 +79,11 @@ class AirplaneListSerializer(AirplaneSerializer):
 
 class AirplaneDetailSerializer(AirplaneSerializer):
     airplane_type = AirplaneTypeSerializer(many=False, read_only=True)
+    image_variants = ImageVariantsField()
+
+    class Meta:
+        model = Airplane
+        fields = AirplaneSerializer.Meta.fields + ("image_variants",)
 
 
 class CrewSerializer(serializers.ModelSerializer):
@@ -76,15 +111,17 @@ class CityListSerializer(CitySerializer):
 
 
 class AirportImageSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Airport
-        fields = ("id", "image")
+        fields = ("id", "image", "image_variants")
 
 
 class AirportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Airport
-        fields = "__all__"
+        exclude = ("image_variants",)
 
 
 class AirportListSerializer(AirportSerializer):
@@ -93,6 +130,11 @@ class AirportListSerializer(AirportSerializer):
 
 class AirportDetailSerializer(AirportSerializer):
     closest_big_city = CityListSerializer(many=False, read_only=True)
+    image_variants = ImageVariantsField()
+
+    class Meta:
+        model = Airport
+        fields = "__all__"
 
 
 class RouteSerializer(serializers.ModelSerializer):
@@ -115,7 +157,38 @@ class RouteDetailSerializer(RouteSerializer):
     destination = AirportListSerializer(many=False, read_only=True)
 
 
+class FlightRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves flights together with their airplane, once per flight id"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault(
+            "queryset", Flight.objects.select_related("airplane")
+        )
+        super().__init__(**kwargs)
+        self._resolved = {}
+
+    def prefetch(self, flight_ids):
+        """Resolve all given flight ids with a single query"""
+        pks = set()
+        for flight_id in flight_ids:
+            try:
+                pks.add(int(flight_id))
+            except (TypeError, ValueError):
+                continue
+        missing = pks - self._resolved.keys()
+        if missing:
+            self._resolved.update(self.get_queryset().in_bulk(missing))
+
+    def to_internal_value(self, data):
+        try:
+            return self._resolved[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    flight = FlightRelatedField()
+
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
@@ -129,6 +202,8 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight")
+        # Seat conflicts are checked for the whole order at once
+        validators = []
 
 
 class TicketSeatsSerializer(TicketSerializer):
@@ -141,6 +216,7 @@ class FlightSerializer(serializers.ModelSerializer):
     class Meta:
         model = Flight
         fields = "__all__"
+        read_only_fields = ("seats_sold",)
 
 
 class FlightListSerializer(FlightSerializer):
@@ -192,14 +268,117 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = ("id", "tickets", "created_at")
 
+    def to_internal_value(self, data):
+        tickets = data.get("tickets") if hasattr(data, "get") else None
+        if isinstance(tickets, list):
+            self.fields["tickets"].child.fields["flight"].prefetch(
+                ticket.get("flight")
+                for ticket in tickets
+                if isinstance(ticket, dict)
+            )
+        return super().to_internal_value(data)
+
+    def validate_tickets(self, tickets_data):
+        """Check requested seats against sold tickets and others' holds"""
+        seats_filter = {
+            "flight_id__in": {data["flight"].id for data in tickets_data},
+            "row__in": {data["row"] for data in tickets_data},
+            "seat__in": {data["seat"] for data in tickets_data},
+        }
+        held_seats = SeatHold.objects.filter(
+            expires_at__gt=timezone.now(), **seats_filter
+        )
+        request = self.context.get("request")
+        if request is not None:
+            held_seats = held_seats.exclude(user=request.user)
+        unavailable = dict(
+            ((flight_id, row, seat), held)
+            for flight_id, row, seat, held in (
+                Ticket.objects.filter(**seats_filter)
+                .annotate(held=Value(False))
+                .values_list("flight_id", "row", "seat", "held")
+                .union(
+                    held_seats.annotate(held=Value(True))
+                    .values_list("flight_id", "row", "seat", "held")
+                )
+            )
+        )
+
+        errors = []
+        requested = set()
+        for ticket_data in tickets_data:
+            seat = (
+                ticket_data["flight"].id,
+                ticket_data["row"],
+                ticket_data["seat"],
+            )
+            if unavailable.get(seat):
+                errors.append({"non_field_errors": [SEAT_HELD_MESSAGE]})
+            elif seat in unavailable or seat in requested:
+                errors.append({"non_field_errors": [SEAT_TAKEN_MESSAGE]})
+            else:
+                errors.append({})
+            requested.add(seat)
+        if any(errors):
+            raise ValidationError(errors)
+        return tickets_data
+
     @transaction.atomic
     def create(self, validated_data):
         tickets_data = validated_data.pop("tickets")
+        try:
+            # Holds committed after validate_tickets are checked here
+            claim_seats(
+                validated_data["user"],
+                {
+                    (data["flight"].id, data["row"], data["seat"])
+                    for data in tickets_data
+                },
+            )
+        except SeatHoldConflict:
+            raise ValidationError({"tickets": [SEAT_HELD_MESSAGE]})
         order = Order.objects.create(**validated_data)
-        for ticket_data in tickets_data:
-            Ticket.objects.create(order=order, **ticket_data)
+        try:
+            tickets = Ticket.objects.bulk_create(
+                Ticket(order=order, **ticket_data)
+                for ticket_data in tickets_data
+            )
+        except IntegrityError:
+            # A concurrent order took one of the seats after validation
+            raise ValidationError({"tickets": [SEAT_TAKEN_MESSAGE]})
+
+        sold = Counter(ticket.flight_id for ticket in tickets)
+        for flight_id, count in sold.items():
+            Flight.update_seats_sold(flight_id, count)
+        transaction.on_commit(lambda: invalidate_seat_map(*sold))
+        # bulk_create skips the ticket signals
+        bump_versions("flight:all", *(f"flight:{pk}" for pk in sold))
         return order
 
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatHoldCreateSerializer(serializers.Serializer):
+    seats = SeatSerializer(many=True, allow_empty=False)
+
+    def validate_seats(self, seats):
+        airplane = self.context["flight"].airplane
+        for seat in seats:
+            Ticket.validate_ticket(
+                seat["row"], seat["seat"], airplane, ValidationError
+            )
+        return seats
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ("id", "flight", "row", "seat", "expires_at")
+        read_only_fields = fields
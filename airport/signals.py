@@ -0,0 +1,139 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from airport.autocomplete import invalidate_autocomplete
+from airport.conditional import REFERENCES, bump_versions
+from airport.images import schedule_image_variants, variants_pending
+from airport.itineraries import invalidate_itineraries, update_flight
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    City,
+    Country,
+    Crew,
+    Flight,
+    Route,
+    Ticket
+)
+from airport.response_cache import invalidate_response_cache
+from airport.seat_map import invalidate_seat_map
+
+
+@receiver([post_save, post_delete], sender=Ticket)
+def invalidate_ticket_seat_map(sender, instance, **kwargs):
+    # A seat map read before the commit must not outlive it
+    flight_id = instance.flight_id
+    transaction.on_commit(lambda: invalidate_seat_map(flight_id))
+
+
+@receiver(post_delete, sender=Ticket)
+def release_ticket_seat(sender, instance, **kwargs):
+    Flight.update_seats_sold(instance.flight_id, -1)
+
+
+@receiver([post_save, post_delete], sender=Flight)
+def invalidate_flight_seat_map(sender, instance, **kwargs):
+    flight_id = instance.id
+    transaction.on_commit(lambda: invalidate_seat_map(flight_id))
+
+
+@receiver(post_save, sender=Airplane)
+def invalidate_airplane_seat_maps(sender, instance, created, **kwargs):
+    if not created:
+        flight_ids = list(instance.flights.values_list("id", flat=True))
+        transaction.on_commit(lambda: invalidate_seat_map(*flight_ids))
+
+
+@receiver(post_save, sender=Airplane)
+@receiver(post_save, sender=Airport)
+def process_uploaded_image(sender, instance, **kwargs):
+    if variants_pending(instance):
+        schedule_image_variants(instance)
+
+
+@receiver([post_save, post_delete], sender=Country)
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=Airport)
+def invalidate_autocomplete_index(sender, **kwargs):
+    invalidate_autocomplete()
+
+
+@receiver(post_save, sender=Flight)
+def update_flight_itineraries(sender, instance, **kwargs):
+    # A rolled back flight must not reach the graph
+    flight = (
+        instance.id,
+        instance.route_id,
+        instance.departure_time,
+        instance.arrival_time,
+    )
+    transaction.on_commit(lambda: update_flight(*flight))
+
+
+@receiver(post_delete, sender=Flight)
+def remove_flight_itineraries(sender, instance, **kwargs):
+    flight_id = instance.id
+    transaction.on_commit(lambda: update_flight(flight_id, deleted=True))
+
+
+@receiver([post_save, post_delete], sender=Route)
+@receiver([post_save, post_delete], sender=Airport)
+def invalidate_itinerary_graph(sender, **kwargs):
+    invalidate_itineraries()
+
+
+@receiver([post_save, post_delete], sender=AirplaneType)
+def invalidate_airplane_type_responses(sender, **kwargs):
+    invalidate_response_cache("airplane_types")
+
+
+@receiver([post_save, post_delete], sender=Crew)
+def invalidate_crew_responses(sender, **kwargs):
+    invalidate_response_cache("crews")
+
+
+@receiver([post_save, post_delete], sender=Country)
+def invalidate_country_responses(sender, **kwargs):
+    # City lists embed the country name
+    invalidate_response_cache("countries", "cities")
+
+
+@receiver([post_save, post_delete], sender=City)
+def invalidate_city_responses(sender, **kwargs):
+    invalidate_response_cache("cities")
+
+
+@receiver([post_save, post_delete], sender=Ticket)
+def bump_ticket_flight_version(sender, instance, **kwargs):
+    bump_versions(f"flight:{instance.flight_id}", "flight:all")
+
+
+@receiver([post_save, post_delete], sender=Flight)
+def bump_flight_version(sender, instance, **kwargs):
+    bump_versions(f"flight:{instance.id}", "flight:all")
+
+
+@receiver(m2m_changed, sender=Flight.crew.through)
+def bump_flight_crew_version(sender, instance, reverse, **kwargs):
+    if not reverse:
+        bump_versions(f"flight:{instance.id}", "flight:all")
+
+
+@receiver([post_save, post_delete], sender=Route)
+def bump_route_version(sender, instance, **kwargs):
+    # Flight lists and details embed their route
+    bump_versions(
+        f"route:{instance.id}", "route:all", "flight:all", REFERENCES
+    )
+
+
+@receiver([post_save, post_delete], sender=AirplaneType)
+@receiver([post_save, post_delete], sender=Airplane)
+@receiver([post_save, post_delete], sender=Crew)
+@receiver([post_save, post_delete], sender=Country)
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=Airport)
+def bump_references_version(sender, **kwargs):
+    bump_versions(REFERENCES)
@@ -0,0 +1,23 @@
+from airport.query_stats import query_stats
+
+
+class QueryBudgetMixin:
+    """
+    assertQueryBudget fails a test when a request runs more queries
+    than its budget, listing the most repeated statements.
+    """
+
+    def assertQueryBudget(self, budget, url, method="get", **kwargs):
+        with query_stats() as stats:
+            res = getattr(self.client, method)(url, **kwargs)
+
+        if stats.count > budget:
+            repeated = "\n".join(
+                f"  {count}x {sql}" for sql, count in stats.most_repeated()
+            )
+            self.fail(
+                f"{method.upper()} {url} ran {stats.count} queries, "
+                f"budget is {budget} ({stats.duplicates} duplicates, "
+                f"{stats.similar} similar)\n{repeated}"
+            )
+        return res
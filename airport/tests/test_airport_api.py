@@ -39,11 +39,11 @@ class AuthenticatedAirportApiTests(TestCase):
 
         res = self.client.get(AIRPORT_URL)
 
-        airports = Airport.objects.all()
+        airports = Airport.objects.order_by("id")
         serializer = AirportListSerializer(airports, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_filter_airports_by_closest_big_city(self):
         city1 = sample_city(name="First City")
@@ -62,9 +62,9 @@ class AuthenticatedAirportApiTests(TestCase):
         serializer2 = AirportListSerializer(airport2)
         serializer3 = AirportListSerializer(airport3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_retrieve_airport_detail(self):
         airport = sample_airport()
@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order, Ticket
+from airport.tests.sample_data import sample_flight, sample_route
+from airport.throttling import get_throttle_store
+
+FLIGHT_URL = reverse("airport:flight-list")
+ROUTE_URL = reverse("airport:route-list")
+ASYNC_FLIGHT_URL = reverse("airport:async-flight-list")
+ASYNC_ROUTE_URL = reverse("airport:async-route-list")
+
+
+def detail_url(flight_id):
+    return reverse("airport:flight-detail", args=[flight_id])
+
+
+def async_detail_url(flight_id):
+    return reverse("airport:async-flight-detail", args=[flight_id])
+
+
+class UnauthenticatedAsyncApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_throttle_store().clear()
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        for url in (ASYNC_FLIGHT_URL, ASYNC_ROUTE_URL, async_detail_url(1)):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertIn("WWW-Authenticate", res)
+
+
+class AuthenticatedAsyncApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_throttle_store().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.token = self.client.post(
+            reverse("user:token_obtain_pair"),
+            {"email": "test@test.com", "password": "testpass"},
+        ).data["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.flights = [
+            sample_flight(
+                departure_time=f"2024-07-0{day}T08:00:00+03:00",
+                arrival_time=f"2024-07-0{day}T10:00:00+03:00",
+            )
+            for day in range(1, 4)
+        ]
+        Ticket.objects.create(
+            flight=self.flights[0],
+            order=Order.objects.create(user=self.user),
+            row=1,
+            seat=1,
+        )
+
+    def test_flight_list_matches_sync(self):
+        params = {"page_size": 2}
+
+        res = self.client.get(ASYNC_FLIGHT_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/json")
+        sync_data = self.client.get(FLIGHT_URL, params).json()
+        self.assertEqual(res.json()["results"], sync_data["results"])
+        self.assertIn(ASYNC_FLIGHT_URL, res.json()["next"])
+
+        res = self.client.get(res.json()["next"])
+        self.assertEqual(
+            [flight["id"] for flight in res.json()["results"]],
+            [self.flights[2].id],
+        )
+
+    def test_flight_list_filters(self):
+        res = self.client.get(
+            ASYNC_FLIGHT_URL, {"departure_date_from": "2024-07-02"}
+        )
+
+        self.assertEqual(
+            [flight["id"] for flight in res.json()["results"]],
+            [self.flights[1].id, self.flights[2].id],
+        )
+
+        res = self.client.get(
+            ASYNC_FLIGHT_URL, {"departure_date_from": "07/02"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_flight_detail_matches_sync(self):
+        flight = self.flights[0]
+
+        res = self.client.get(async_detail_url(flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.json(), self.client.get(detail_url(flight.id)).json()
+        )
+        self.assertEqual(res.json()["taken_places"], [{"row": 1, "seat": 1}])
+
+        res = self.client.get(
+            async_detail_url(flight.id), HTTP_IF_NONE_MATCH=res["ETag"]
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_flight_detail_not_found(self):
+        res = self.client.get(async_detail_url(self.flights[-1].id + 100))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_route_list_matches_sync(self):
+        sample_route(distance=1234)
+
+        res = self.client.get(ASYNC_ROUTE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.json()["results"],
+            self.client.get(ROUTE_URL).json()["results"],
+        )
@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airport, City, Country
+
+AUTOCOMPLETE_URL = reverse("airport:autocomplete-list")
+
+
+class UnauthenticatedAutocompleteApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "par"})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedAutocompleteApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.france = Country.objects.create(name="France")
+        self.paraguay = Country.objects.create(name="Paraguay")
+        self.paris = City.objects.create(name="Paris", country=self.france)
+        self.sao_paulo = City.objects.create(
+            name="São Paulo", country=self.paraguay
+        )
+        self.orly = Airport.objects.create(
+            name="Paris Orly Airport", closest_big_city=self.paris
+        )
+        self.cdg = Airport.objects.create(
+            name="Charles de Gaulle Airport", closest_big_city=self.paris
+        )
+
+    def suggest(self, **params):
+        res = self.client.get(AUTOCOMPLETE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [(item["type"], item["id"]) for item in res.data]
+
+    def test_prefix_ranking(self):
+        self.assertEqual(
+            self.suggest(q="par"),
+            [
+                ("city", self.paris.id),
+                ("airport", self.orly.id),
+                ("country", self.paraguay.id),
+            ],
+        )
+
+    def test_exact_match_first(self):
+        suggestions = self.suggest(q="paris")
+
+        self.assertEqual(suggestions[0], ("city", self.paris.id))
+
+    def test_word_prefix_and_label(self):
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "de gau"})
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(
+            res.data[0]["label"], "Charles de Gaulle Airport (Paris, France)"
+        )
+
+    def test_accents_are_ignored(self):
+        self.assertEqual(
+            self.suggest(q="SAO P"), [("city", self.sao_paulo.id)]
+        )
+
+    def test_filter_by_types_and_limit(self):
+        self.assertEqual(
+            self.suggest(q="pa", types="airport"), [("airport", self.orly.id)]
+        )
+        self.assertEqual(len(self.suggest(q="pa", limit=2)), 2)
+
+    def test_index_rebuilt_on_change(self):
+        self.assertEqual(self.suggest(q="lyon"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lyon = City.objects.create(name="Lyon", country=self.france)
+
+        self.assertEqual(self.suggest(q="lyon"), [("city", lyon.id)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lyon.delete()
+
+        self.assertEqual(self.suggest(q="lyon"), [])
+
+    def test_index_rebuilt_on_commit(self):
+        self.assertEqual(self.suggest(q="lyon"), [])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            lyon = City.objects.create(name="Lyon", country=self.france)
+        self.assertEqual(self.suggest(q="lyon"), [])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.suggest(q="lyon"), [("city", lyon.id)])
+
+    def test_empty_query(self):
+        self.assertEqual(self.suggest(q=""), [])
@@ -0,0 +1,147 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Ticket
+from airport.tests.sample_data import sample_airplane, sample_flight
+
+FLIGHT_URL = reverse("airport:flight-list")
+ROUTE_URL = reverse("airport:route-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+def flight_detail_url(flight_id):
+    return reverse("airport:flight-detail", args=[flight_id])
+
+
+def route_detail_url(route_id):
+    return reverse("airport:route-detail", args=[route_id])
+
+
+class ConditionalGetApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(
+            airplane=sample_airplane(rows=3, seats_in_row=4)
+        )
+
+    def test_detail_not_modified(self):
+        res = self.client.get(flight_detail_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", res)
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(
+                flight_detail_url(self.flight.id),
+                HTTP_IF_NONE_MATCH=res["ETag"],
+            )
+
+        self.assertEqual(
+            not_modified.status_code, status.HTTP_304_NOT_MODIFIED
+        )
+        self.assertEqual(not_modified["ETag"], res["ETag"])
+
+        not_modified = self.client.get(
+            flight_detail_url(self.flight.id),
+            HTTP_IF_MODIFIED_SINCE=res["Last-Modified"],
+        )
+        self.assertEqual(
+            not_modified.status_code, status.HTTP_304_NOT_MODIFIED
+        )
+
+    def test_etag_changes_on_ticket_sale(self):
+        etag = self.client.get(flight_detail_url(self.flight.id))["ETag"]
+        list_etag = self.client.get(FLIGHT_URL)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                ORDER_URL,
+                {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+                format="json",
+            )
+
+        res = self.client.get(
+            flight_detail_url(self.flight.id), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["taken_places"]), 1)
+        self.assertNotEqual(res["ETag"], etag)
+
+        res = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        etag = res["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.get(flight=self.flight).delete()
+
+        res = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_query(self):
+        etag = self.client.get(FLIGHT_URL)["ETag"]
+
+        res = self.client.get(
+            FLIGHT_URL,
+            {"routes": self.flight.route_id},
+            HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_route_etag_changes_on_airport_rename(self):
+        route = self.flight.route
+        etag = self.client.get(route_detail_url(route.id))["ETag"]
+        list_etag = self.client.get(ROUTE_URL)["ETag"]
+
+        res = self.client.get(
+            route_detail_url(route.id), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            route.source.name = "Boryspil"
+            route.source.save()
+
+        res = self.client.get(
+            route_detail_url(route.id), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["source"]["name"], "Boryspil")
+        res = self.client.get(ROUTE_URL, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_flight_etag_changes_on_route_change(self):
+        route = self.flight.route
+        etag = self.client.get(flight_detail_url(self.flight.id))["ETag"]
+        list_etag = self.client.get(FLIGHT_URL)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            route.destination = route.source
+            route.save()
+
+        res = self.client.get(
+            flight_detail_url(self.flight.id), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["route"]["destination"], res.data["route"]["source"]
+        )
+        res = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_missing_flight_has_no_etag(self):
+        res = self.client.get(flight_detail_url(self.flight.id + 100))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("ETag", res)
@@ -0,0 +1,124 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db.models import Count, Max
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from airport.benchmark import measure_endpoint, router_endpoints
+from airport.datasets import SCALES, generate_dataset
+from airport.models import Flight, Order, Ticket
+from airport.urls import router
+
+
+class DatasetGeneratorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generate_dataset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            counts = generate_dataset("tiny", seed=1)
+
+        self.assertEqual(counts["flights"], SCALES["tiny"]["flights"])
+        self.assertEqual(counts["tickets"], Ticket.objects.count())
+        self.assertFalse(
+            Ticket.objects.values("flight", "row", "seat")
+            .annotate(count=Count("id"))
+            .filter(count__gt=1)
+            .exists()
+        )
+        for flight in Flight.objects.select_related("airplane").annotate(
+            sold=Count("tickets"),
+            max_row=Max("tickets__row"),
+            max_seat=Max("tickets__seat"),
+        ):
+            self.assertEqual(flight.seats_sold, flight.sold)
+            if flight.sold:
+                self.assertLessEqual(flight.max_row, flight.airplane.rows)
+                self.assertLessEqual(
+                    flight.max_seat, flight.airplane.seats_in_row
+                )
+
+    def test_generate_dataset_is_deterministic(self):
+        def snapshot():
+            return list(
+                Ticket.objects.order_by("id").values_list(
+                    "flight__route__distance", "row", "seat"
+                )
+            )
+
+        generate_dataset("tiny", seed=2)
+        first = snapshot()
+        Flight.objects.all().delete()
+        get_user_model().objects.all().delete()
+        generate_dataset("tiny", seed=2)
+
+        self.assertEqual(snapshot(), first)
+
+    def test_generate_dataset_without_copy(self):
+        generate_dataset("tiny", seed=3)
+        with_copy = list(Ticket.objects.values_list("row", "seat"))
+        Flight.objects.all().delete()
+        get_user_model().objects.all().delete()
+
+        counts = generate_dataset("tiny", seed=3, use_copy=False)
+
+        self.assertEqual(counts["orders"], Order.objects.count())
+        self.assertEqual(
+            list(Ticket.objects.values_list("row", "seat")), with_copy
+        )
+
+
+class GenerateDataCommandTests(TestCase):
+    def test_generate_data(self):
+        out = StringIO()
+
+        call_command(
+            "generate_data",
+            "--scale=tiny",
+            "--flights=5",
+            "--tickets=50",
+            stdout=out,
+        )
+
+        self.assertEqual(Flight.objects.count(), 5)
+        self.assertIn(
+            f"{'tickets':<16} {Ticket.objects.count():>10}", out.getvalue()
+        )
+
+    def test_generate_data_twice(self):
+        call_command("generate_data", "--scale=tiny", stdout=StringIO())
+
+        with self.assertRaises(CommandError):
+            call_command("generate_data", "--scale=tiny", stdout=StringIO())
+
+
+class BenchmarkEndpointsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        generate_dataset("tiny")
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.get(is_staff=True)
+        )
+
+    def test_router_endpoints(self):
+        names = dict(router_endpoints(router, self.client))
+
+        for prefix, viewset, basename in router.registry:
+            self.assertIn(f"airport:{basename}-list", names)
+        self.assertIn("airport:flight-detail", names)
+        self.assertIn("airport:flight-seat-map", names)
+        self.assertNotIn("airport:airplane-upload-image", names)
+
+    def test_measure_endpoint(self):
+        result = measure_endpoint(
+            self.client, "/api/airport/flights/", requests=5, warmup=1
+        )
+
+        self.assertEqual(result["errors"], 0)
+        self.assertEqual(result["status"], 200)
+        self.assertEqual(result["queries"], 2)
+        self.assertLessEqual(result["p50_ms"], result["p99_ms"])
@@ -0,0 +1,59 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.db_pool import database_ready, get_pool
+
+DB_POOL_STATS_URL = reverse("airport:db-pool-stats-list")
+
+POOLED = bool(settings.DATABASES["default"].get("OPTIONS", {}).get("pool"))
+
+
+class DatabasePoolTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "testpass",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_wait_for_db(self):
+        out = StringIO()
+
+        call_command("wait_for_db", "--timeout", "5", stdout=out)
+
+        self.assertTrue(database_ready())
+        self.assertIn("Database available", out.getvalue())
+
+    def test_pool_stats_admin_only(self):
+        self.user.is_staff = False
+        self.user.save()
+
+        res = self.client.get(DB_POOL_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_pool_stats(self):
+        res = self.client.get(DB_POOL_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["default"]["pooled"], POOLED)
+
+    @skipUnless(POOLED, "Set POSTGRES_POOL=1 to run against the pool")
+    def test_pool_counters(self):
+        stats = self.client.get(DB_POOL_STATS_URL).data["default"]
+
+        self.assertEqual(stats["max_size"], get_pool().max_size)
+        self.assertGreaterEqual(stats["checkouts"], 1)
+        self.assertGreaterEqual(stats["in_use"], 1)
+        for counter in ("size", "available", "waiting", "wait_ms"):
+            self.assertIn(counter, stats)
@@ -0,0 +1,194 @@
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+
+from airport.db_router import (
+    ReplicaReadMixin,
+    ReplicaRouter,
+    _read_database,
+    reads_pinned,
+)
+from airport.models import Flight, Order, Ticket
+from airport.tests.sample_data import sample_airplane, sample_flight
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def test_reads_follow_request_database(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Flight), "default")
+
+        token = _read_database.set("replica_1")
+        try:
+            self.assertEqual(router.db_for_read(Flight), "replica_1")
+            self.assertEqual(router.db_for_write(Flight), "default")
+        finally:
+            _read_database.reset(token)
+
+        self.assertTrue(router.allow_migrate("default", "airport"))
+        self.assertFalse(router.allow_migrate("replica_1", "airport"))
+
+
+class FailingView(ReplicaReadMixin, APIView):
+    permission_classes = ()
+
+    def get(self, request):
+        raise RuntimeError("unhandled")
+
+
+class ReplicaReadMixinTests(SimpleTestCase):
+    @override_settings(REPLICA_DATABASES=["replica_1"])
+    def test_unhandled_exception_resets_read_database(self):
+        view = FailingView.as_view()
+
+        with self.assertRaises(RuntimeError):
+            view(APIRequestFactory().get("/"))
+
+        self.assertIsNone(_read_database.get())
+
+
+class ReadYourWritesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_write_pins_reads(self):
+        flight = sample_flight(
+            airplane=sample_airplane(rows=3, seats_in_row=4)
+        )
+        self.assertFalse(reads_pinned(self.user))
+
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": flight.id}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(reads_pinned(self.user))
+
+    def test_failed_write_does_not_pin_reads(self):
+        res = self.client.post(ORDER_URL, {"tickets": []}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(reads_pinned(self.user))
+
+
+@override_settings(REPLICA_DATABASES=["replica_1"])
+class LaggingReplicaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(
+            airplane=sample_airplane(rows=3, seats_in_row=4)
+        )
+        self.seat_map_url = reverse(
+            "airport:flight-seat-map", args=[self.flight.id]
+        )
+
+    def get(self, url):
+        """Response and the databases its reads were routed to"""
+        databases = []
+
+        def db_for_read(router, model, **hints):
+            # The replica has not replayed the last commit yet, the
+            # rows come from the primary and only the routing is checked
+            databases.append(_read_database.get())
+            return DEFAULT_DB_ALIAS
+
+        with mock.patch.object(ReplicaRouter, "db_for_read", db_for_read):
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, set(databases)
+
+    def test_invalidated_cache_refilled_from_primary(self):
+        res, databases = self.get(self.seat_map_url)
+        self.assertEqual(databases, {"replica_1"})
+
+        order = Order.objects.create(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(
+                flight=self.flight, order=order, row=1, seat=1
+            )
+        res, databases = self.get(self.seat_map_url)
+
+        self.assertEqual(res.data["taken"], 1)
+        self.assertEqual(databases, {None})
+        # Reads of every view are pinned, not only those of the writer
+        self.assertEqual(self.get(FLIGHT_URL)[1], {None})
+
+
+@skipUnless(
+    settings.REPLICA_DATABASES,
+    "Set POSTGRES_REPLICA_HOSTS to run against replica aliases",
+)
+class ReplicaRoutingApiTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(
+            airplane=sample_airplane(rows=3, seats_in_row=4)
+        )
+
+    def replica_queries(self, *args, **kwargs):
+        contexts = [
+            CaptureQueriesContext(connections[alias])
+            for alias in settings.REPLICA_DATABASES
+        ]
+        for context in contexts:
+            context.__enter__()
+        try:
+            res = self.client.get(*args, **kwargs)
+        finally:
+            for context in contexts:
+                context.__exit__(None, None, None)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return sum(len(context) for context in contexts)
+
+    def test_safe_reads_use_replica(self):
+        self.assertGreater(self.replica_queries(FLIGHT_URL), 0)
+
+    def test_order_reads_pinned_after_write(self):
+        self.assertGreater(self.replica_queries(ORDER_URL), 0)
+
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+        )
+
+        self.assertEqual(self.replica_queries(ORDER_URL), 0)
+        self.assertGreater(self.replica_queries(FLIGHT_URL), 0)
@@ -1,12 +1,27 @@
+import base64
+from io import StringIO
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
-from airport.models import Flight, Crew
+from airport.models import Flight, Crew, Order, Route, Ticket
 from airport.serializers import FlightListSerializer
-from airport.tests.sample_data import sample_flight, sample_route, sample_airplane
+from airport.tests.sample_data import (
+    sample_flight,
+    sample_route,
+    sample_airplane,
+    sample_airport,
+    sample_city
+)
+from airport.views import FlightViewSet
 
 FLIGHT_URL = reverse("airport:flight-list")
 
@@ -15,6 +30,10 @@ def detail_url(flight_id):
     return reverse("airport:flight-detail", args=[flight_id])
 
 
+def seat_map_url(flight_id):
+    return reverse("airport:flight-seat-map", args=[flight_id])
+
+
 class UnauthenticatedFlightApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -39,14 +58,15 @@ class AuthenticatedFlightApiTests(TestCase):
 
         res = self.client.get(FLIGHT_URL)
 
-        flights = Flight.objects.all()
+        flights = Flight.objects.order_by("departure_time", "id")
         serializer = FlightListSerializer(flights, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+        results = res.data["results"]
         for index, serializer_object in enumerate(serializer.data):
             for key in serializer_object:
-                self.assertEqual(serializer_object[key], res.data[index][key])
+                self.assertEqual(serializer_object[key], results[index][key])
 
     def test_filter_flights_by_routes(self):
         route1 = sample_route(distance=1111)
@@ -65,9 +85,9 @@ class AuthenticatedFlightApiTests(TestCase):
         serializer2 = FlightListSerializer(flight2)
         serializer3 = FlightListSerializer(flight3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_flights_by_airplanes(self):
         airplane1 = sample_airplane(name="Airplane 1")
@@ -86,9 +106,9 @@ class AuthenticatedFlightApiTests(TestCase):
         serializer2 = FlightListSerializer(flight2)
         serializer3 = FlightListSerializer(flight3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_flights_by_crews(self):
         crew1 = Crew.objects.create(
@@ -120,9 +140,66 @@ class AuthenticatedFlightApiTests(TestCase):
         serializer2 = FlightListSerializer(flight2)
         serializer3 = FlightListSerializer(flight3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
+
+    def test_filter_flights_by_departure_date(self):
+        flight1 = sample_flight(
+            departure_time="2024-07-01T08:00:00+03:00",
+            arrival_time="2024-07-01T10:00:00+03:00",
+        )
+        flight2 = sample_flight(
+            departure_time="2024-07-02T23:30:00+03:00",
+            arrival_time="2024-07-03T01:30:00+03:00",
+        )
+        flight3 = sample_flight(
+            departure_time="2024-07-03T00:30:00+03:00",
+            arrival_time="2024-07-03T02:30:00+03:00",
+        )
+
+        res = self.client.get(
+            FLIGHT_URL,
+            {
+                "departure_date_from": "2024-07-01",
+                "departure_date_to": "2024-07-02",
+            },
+        )
+
+        ids = [flight["id"] for flight in res.data["results"]]
+        self.assertEqual(ids, [flight1.id, flight2.id])
+
+        res = self.client.get(FLIGHT_URL, {"arrival_date_from": "2024-07-03"})
+
+        ids = [flight["id"] for flight in res.data["results"]]
+        self.assertEqual(ids, [flight2.id, flight3.id])
+
+    def test_filter_flights_by_invalid_date(self):
+        res = self.client.get(FLIGHT_URL, {"departure_date_from": "07/01"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_flights_by_cities(self):
+        kyiv = sample_city(name="Kyiv")
+        paris = sample_city(name="Paris")
+        route1 = sample_route(
+            source=sample_airport(closest_big_city=kyiv),
+            destination=sample_airport(closest_big_city=paris),
+        )
+        route2 = sample_route(
+            source=sample_airport(closest_big_city=paris),
+            destination=sample_airport(closest_big_city=kyiv),
+        )
+        flight1 = sample_flight(route=route1)
+        sample_flight(route=route2)
+
+        res = self.client.get(
+            FLIGHT_URL,
+            {"source_cities": f"{kyiv.id}", "destination_cities": paris.id},
+        )
+
+        ids = [flight["id"] for flight in res.data["results"]]
+        self.assertEqual(ids, [flight1.id])
 
     def test_create_flight_forbidden(self):
         route = sample_route()
@@ -140,6 +217,307 @@ class AuthenticatedFlightApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
 
+@skipUnless(connection.vendor == "postgresql", "Needs PostgreSQL planner")
+class FlightSearchIndexTests(TestCase):
+    def setUp(self):
+        self.route = sample_route()
+        flight = sample_flight(route=self.route)
+        # A year of flights of 40 routes, so only the route and date
+        # index is selective for one route in one month
+        routes = [self.route] + Route.objects.bulk_create(
+            Route(
+                source=self.route.source,
+                destination=self.route.destination,
+                distance=self.route.distance,
+            )
+            for _ in range(39)
+        )
+        Flight.objects.bulk_create(
+            Flight(
+                route=route,
+                airplane=flight.airplane,
+                departure_time=f"2023-{month:02}-18T14:00:00+02:00",
+                arrival_time=f"2023-{month:02}-18T19:00:00+02:00",
+            )
+            for route in routes
+            for month in range(1, 13)
+        )
+
+    def explain(self, params):
+        request = APIRequestFactory().get(FLIGHT_URL, params)
+        view = FlightViewSet(request=Request(request), action="list")
+        queryset = view.get_queryset().order_by("departure_time", "id")
+        with connection.cursor() as cursor:
+            # Fresh statistics keep the plan independent of when
+            # autovacuum last analyzed the rows of earlier tests
+            cursor.execute("ANALYZE airport_flight")
+            return queryset[:20].explain()
+
+    def assertIndexScan(self, plan, index_name):
+        self.assertIn(index_name, plan)
+        self.assertNotIn("Seq Scan on airport_flight", plan)
+
+    def test_date_range_search_uses_index(self):
+        plan = self.explain(
+            {
+                "departure_date_from": "2023-11-01",
+                "departure_date_to": "2023-11-30",
+            }
+        )
+
+        self.assertIndexScan(plan, "flight_departure_idx")
+
+    def test_route_date_search_uses_index(self):
+        plan = self.explain(
+            {
+                "routes": self.route.id,
+                "departure_date_from": "2023-11-01",
+                "departure_date_to": "2023-11-30",
+            }
+        )
+
+        self.assertIndexScan(plan, "flight_route_departure_idx")
+
+
+class FlightPaginationApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        route = sample_route()
+        airplane = sample_airplane()
+        for departure_time in (
+            "2023-11-18T14:00:00+02:00",
+            "2023-11-18T12:00:00+02:00",
+            "2023-11-18T14:00:00+02:00",
+            "2023-11-17T09:00:00+02:00",
+            "2023-11-18T14:00:00+02:00",
+        ):
+            sample_flight(
+                route=route,
+                airplane=airplane,
+                departure_time=departure_time,
+            )
+        self.expected_ids = list(
+            Flight.objects
+            .order_by("departure_time", "id")
+            .values_list("id", flat=True)
+        )
+
+    def test_pages_follow_departure_time_and_id(self):
+        ids = []
+        url = FLIGHT_URL + "?page_size=2"
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data["results"]), 2)
+            ids += [flight["id"] for flight in res.data["results"]]
+            url = res.data["next"]
+
+        self.assertEqual(ids, self.expected_ids)
+
+    def test_previous_page(self):
+        first = self.client.get(FLIGHT_URL, {"page_size": 2})
+        second = self.client.get(first.data["next"])
+        previous = self.client.get(second.data["previous"])
+
+        self.assertEqual(previous.data["results"], first.data["results"])
+        self.assertIsNone(previous.data["previous"])
+
+    def test_page_stable_under_concurrent_insert(self):
+        first = self.client.get(FLIGHT_URL, {"page_size": 3})
+        sample_flight(departure_time="2023-11-18T14:00:00+02:00")
+
+        second = self.client.get(first.data["next"])
+
+        ids = [flight["id"] for flight in first.data["results"]]
+        ids += [flight["id"] for flight in second.data["results"]]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(ids[:5], self.expected_ids)
+
+    def test_max_page_size(self):
+        res = self.client.get(FLIGHT_URL, {"page_size": 1000})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 5)
+
+    def test_invalid_cursor(self):
+        res = self.client.get(FLIGHT_URL, {"cursor": "cD1nYXJiYWdl"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FlightSeatMapApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(
+            airplane=sample_airplane(rows=3, seats_in_row=4)
+        )
+        self.order = Order.objects.create(user=self.user)
+
+    def book(self, row, seat):
+        Ticket.objects.create(
+            flight=self.flight, order=self.order, row=row, seat=seat
+        )
+
+    def test_seat_map_bitmap(self):
+        self.book(1, 1)
+        self.book(2, 4)
+        self.book(3, 2)
+
+        res = self.client.get(seat_map_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["capacity"], 12)
+        self.assertEqual(res.data["taken"], 3)
+        self.assertEqual(
+            base64.b64decode(res.data["bitmap"]),
+            bytes([0b10000001, 0b01000000]),
+        )
+
+    def test_seat_map_rle(self):
+        self.book(1, 2)
+        self.book(1, 3)
+
+        res = self.client.get(
+            seat_map_url(self.flight.id), {"encoding": "rle"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["runs"], [1, 2, 9])
+
+    def test_seat_map_cached_and_invalidated_on_ticket_write(self):
+        self.client.get(seat_map_url(self.flight.id))
+
+        with self.assertNumQueries(0):
+            res = self.client.get(seat_map_url(self.flight.id))
+        self.assertEqual(res.data["taken"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(2, 2)
+        res = self.client.get(seat_map_url(self.flight.id))
+        self.assertEqual(res.data["taken"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.filter(flight=self.flight).get().delete()
+        res = self.client.get(seat_map_url(self.flight.id))
+        self.assertEqual(res.data["taken"], 0)
+
+    def test_seat_map_invalidated_on_commit(self):
+        self.client.get(seat_map_url(self.flight.id))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.book(2, 2)
+        # Read before the commit, as a concurrent request would
+        self.assertEqual(
+            self.client.get(seat_map_url(self.flight.id)).data["taken"], 0
+        )
+
+        for callback in callbacks:
+            callback()
+        res = self.client.get(seat_map_url(self.flight.id))
+        self.assertEqual(res.data["taken"], 1)
+
+    def test_seat_map_unknown_flight(self):
+        res = self.client.get(seat_map_url(self.flight.id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_seat_map_invalid_encoding(self):
+        res = self.client.get(
+            seat_map_url(self.flight.id), {"encoding": "json"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FlightSeatsSoldTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+        self.order = Order.objects.create(user=self.user)
+
+    def book(self, row, seat):
+        Ticket.objects.create(
+            flight=self.flight, order=self.order, row=row, seat=seat
+        )
+
+    def test_seats_sold_follows_ticket_writes(self):
+        self.book(1, 1)
+        self.book(1, 2)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 2)
+
+        Ticket.objects.filter(row=1, seat=1).delete()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 1)
+
+        self.order.delete()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 0)
+
+    def test_seats_sold_follows_moved_ticket(self):
+        other_flight = sample_flight(airplane=self.flight.airplane)
+        self.book(1, 1)
+        ticket = Ticket.objects.get()
+
+        ticket.flight = other_flight
+        ticket.save()
+        ticket.row = 2
+        ticket.save()
+
+        self.flight.refresh_from_db()
+        other_flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 0)
+        self.assertEqual(other_flight.seats_sold, 1)
+
+    def test_drifted_counter_does_not_block_delete(self):
+        self.book(1, 1)
+        Flight.objects.filter(pk=self.flight.pk).update(seats_sold=0)
+
+        Ticket.objects.get().delete()
+
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 0)
+
+    def test_tickets_available_reads_counter(self):
+        self.book(1, 1)
+
+        res = self.client.get(detail_url(self.flight.id))
+        list_res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list_res.data["results"][0]["tickets_available"], 79
+        )
+
+    def test_reconcile_seats_sold_command(self):
+        self.book(1, 1)
+        Flight.objects.filter(pk=self.flight.pk).update(seats_sold=7)
+
+        call_command("reconcile_seats_sold", "--dry-run", stdout=StringIO())
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 7)
+
+        call_command("reconcile_seats_sold", stdout=StringIO())
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 1)
+
+
 class AdminFlightApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -0,0 +1,144 @@
+import shutil
+import tempfile
+import time
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airplane
+from airport.tests.sample_data import sample_airplane, sample_airport
+
+
+def image_upload_url(basename, pk):
+    return reverse(f"airport:{basename}-upload-image", args=[pk])
+
+
+def detail_url(basename, pk):
+    return reverse(f"airport:{basename}-detail", args=[pk])
+
+
+def image_file(size=(1200, 600), color="red"):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return SimpleUploadedFile(
+        "photo.jpg", buffer.getvalue(), content_type="image/jpeg"
+    )
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "admin@admin.com", "testpass", is_staff=True
+            )
+        )
+
+    def upload(self, basename, pk, image=None):
+        return self.client.post(
+            image_upload_url(basename, pk),
+            {"image": image or image_file()},
+            format="multipart",
+        )
+
+
+@override_settings(IMAGE_PROCESSING_EAGER=True)
+class ImageVariantsApiTests(MediaRootMixin, TestCase):
+    def test_upload_returns_before_variants(self):
+        airplane = sample_airplane()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.upload("airplane", airplane.id)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["image_variants"], {})
+
+        res = self.client.get(detail_url("airplane", airplane.id))
+        variants = res.data["image_variants"]
+        self.assertEqual(set(variants), {"thumb", "medium"})
+        self.assertTrue(variants["thumb"].startswith("http://testserver/"))
+        self.assertTrue(variants["thumb"].endswith("-thumb.webp"))
+
+        airplane.refresh_from_db()
+        storage = airplane.image.storage
+        with storage.open(airplane.image_variants["thumb"]) as file:
+            with Image.open(file) as thumb:
+                self.assertEqual(thumb.format, "WEBP")
+                self.assertEqual(thumb.size, (160, 80))
+        with storage.open(airplane.image_variants["medium"]) as file:
+            with Image.open(file) as medium:
+                self.assertEqual(medium.size, (800, 400))
+
+    def test_variants_deduplicated_by_content(self):
+        airplane = sample_airplane()
+        airport = sample_airport()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload("airplane", airplane.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload("airport", airport.id)
+
+        airplane.refresh_from_db()
+        airport.refresh_from_db()
+        self.assertNotEqual(airplane.image.name, airport.image.name)
+        self.assertEqual(
+            airplane.image_variants["thumb"], airport.image_variants["thumb"]
+        )
+        self.assertEqual(
+            airplane.image_variants["hash"], airport.image_variants["hash"]
+        )
+
+    def test_replaced_image_gets_new_variants(self):
+        airport = sample_airport()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload("airport", airport.id)
+        airport.refresh_from_db()
+        first_variants = airport.image_variants
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload("airport", airport.id, image_file(color="blue"))
+
+        airport.refresh_from_db()
+        self.assertEqual(airport.image_variants["source"], airport.image.name)
+        self.assertNotEqual(
+            airport.image_variants["hash"], first_variants["hash"]
+        )
+
+    def test_airport_list_without_variants(self):
+        sample_airport()
+
+        res = self.client.get(reverse("airport:airport-list"))
+
+        self.assertNotIn("image_variants", res.data["results"][0])
+
+
+class ImageWorkerPoolTests(MediaRootMixin, TransactionTestCase):
+    def test_variants_generated_in_background(self):
+        airplane = sample_airplane()
+
+        res = self.upload("airplane", airplane.id)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            airplane = Airplane.objects.get(pk=airplane.pk)
+            if airplane.image_variants:
+                break
+            time.sleep(0.05)
+        self.assertEqual(
+            airplane.image_variants.get("source"), airplane.image.name
+        )
@@ -0,0 +1,204 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.itineraries import (
+    FlightGraph,
+    current_version,
+    delta_key,
+    get_graph,
+)
+from airport.models import Flight
+from airport.tests.sample_data import (
+    sample_airplane,
+    sample_airport,
+    sample_city,
+    sample_route
+)
+
+CONNECTIONS_URL = reverse("airport:flight-connections")
+
+
+class ItineraryApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.kyiv = sample_city(name="Kyiv")
+        self.warsaw = sample_city(name="Warsaw")
+        self.paris = sample_city(name="Paris")
+        self.kbp = sample_airport(closest_big_city=self.kyiv)
+        self.waw = sample_airport(closest_big_city=self.warsaw)
+        self.cdg = sample_airport(closest_big_city=self.paris)
+        self.kyiv_warsaw = sample_route(source=self.kbp, destination=self.waw)
+        self.warsaw_paris = sample_route(source=self.waw, destination=self.cdg)
+        self.kyiv_paris = sample_route(source=self.kbp, destination=self.cdg)
+        self.airplane = sample_airplane()
+
+    def flight(self, route, departure_time, arrival_time):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Flight.objects.create(
+                route=route,
+                airplane=self.airplane,
+                departure_time=departure_time,
+                arrival_time=arrival_time,
+            )
+
+    def search(self, **params):
+        return self.client.get(
+            CONNECTIONS_URL,
+            {
+                "source_city": self.kyiv.id,
+                "destination_city": self.paris.id,
+                "date": "2024-07-01",
+                **params,
+            },
+        )
+
+    def test_direct_and_connecting_itineraries(self):
+        first_leg = self.flight(
+            self.kyiv_warsaw,
+            "2024-07-01T08:00:00+03:00",
+            "2024-07-01T09:00:00+02:00",
+        )
+        second_leg = self.flight(
+            self.warsaw_paris,
+            "2024-07-01T10:00:00+02:00",
+            "2024-07-01T12:30:00+02:00",
+        )
+        direct = self.flight(
+            self.kyiv_paris,
+            "2024-07-01T11:00:00+03:00",
+            "2024-07-01T13:00:00+02:00",
+        )
+
+        res = self.search()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [[leg["flight"] for leg in item["legs"]] for item in res.data],
+            [[first_leg.id, second_leg.id], [direct.id]],
+        )
+        self.assertEqual(res.data[0]["connections"], 1)
+        self.assertEqual(res.data[0]["duration_minutes"], 330)
+        self.assertEqual(res.data[0]["legs"][0]["source"], self.kbp.id)
+        self.assertEqual(res.data[0]["legs"][1]["destination"], self.cdg.id)
+
+        res = self.search(max_legs=1)
+
+        self.assertEqual(
+            [[leg["flight"] for leg in item["legs"]] for item in res.data],
+            [[direct.id]],
+        )
+
+    def test_minimum_connection_time(self):
+        self.flight(
+            self.kyiv_warsaw,
+            "2024-07-01T08:00:00+03:00",
+            "2024-07-01T09:00:00+02:00",
+        )
+        self.flight(
+            self.warsaw_paris,
+            "2024-07-01T09:30:00+02:00",
+            "2024-07-01T12:00:00+02:00",
+        )
+
+        self.assertEqual(self.search().data, [])
+        self.assertEqual(len(self.search(min_connection=30).data), 1)
+
+    def test_graph_follows_flight_changes(self):
+        self.assertEqual(self.search().data, [])
+
+        direct = self.flight(
+            self.kyiv_paris,
+            "2024-07-01T11:00:00+03:00",
+            "2024-07-01T13:00:00+02:00",
+        )
+        self.assertEqual(self.search().data[0]["legs"][0]["flight"], direct.id)
+
+        graph = get_graph()
+        direct.departure_time = "2024-07-02T11:00:00+03:00"
+        direct.arrival_time = "2024-07-02T13:00:00+02:00"
+        with self.captureOnCommitCallbacks(execute=True):
+            direct.save()
+        self.assertEqual(self.search().data, [])
+        self.assertEqual(len(self.search(date="2024-07-02").data), 1)
+        # Graphs handed out earlier are replaced, not changed
+        self.assertIsNot(get_graph(), graph)
+        self.assertEqual(graph.flights[direct.id].departure_time.day, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            direct.delete()
+        self.assertEqual(self.search(date="2024-07-02").data, [])
+
+    def test_flight_changes_applied_without_rebuild(self):
+        graph = get_graph()
+
+        # As in a process that did not save the flight
+        with mock.patch.object(
+            FlightGraph, "build", side_effect=AssertionError
+        ):
+            direct = self.flight(
+                self.kyiv_paris,
+                "2024-07-01T11:00:00+03:00",
+                "2024-07-01T13:00:00+02:00",
+            )
+            res = self.search()
+
+        self.assertEqual(res.data[0]["legs"][0]["flight"], direct.id)
+        self.assertNotIn(direct.id, graph.flights)
+
+    def test_missing_flight_change_rebuilds_graph(self):
+        get_graph()
+        direct = self.flight(
+            self.kyiv_paris,
+            "2024-07-01T11:00:00+03:00",
+            "2024-07-01T13:00:00+02:00",
+        )
+        cache.delete(delta_key(current_version()))
+
+        with mock.patch.object(
+            FlightGraph, "build", wraps=FlightGraph.build
+        ) as build:
+            res = self.search()
+
+        build.assert_called_once()
+        self.assertEqual(res.data[0]["legs"][0]["flight"], direct.id)
+
+    def test_rolled_back_flight_not_in_graph(self):
+        self.assertEqual(self.search().data, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Flight.objects.create(
+                    route=self.kyiv_paris,
+                    airplane=self.airplane,
+                    departure_time="2024-07-01T11:00:00+03:00",
+                    arrival_time="2024-07-01T13:00:00+02:00",
+                )
+                transaction.set_rollback(True)
+
+        self.assertEqual(self.search().data, [])
+
+    def test_invalid_params(self):
+        for params in (
+            {"source_city": "kyiv"},
+            {"date": "07/01"},
+            {"max_legs": 10},
+            {"min_connection": -5},
+        ):
+            res = self.search(**params)
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST, params
+            )
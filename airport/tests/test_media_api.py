@@ -0,0 +1,170 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from airport.media import is_immutable, parse_range
+
+DIGEST = "ab" * 32
+VARIANT_NAME = f"uploads/variants/ab/{DIGEST}-thumb.webp"
+UPLOAD_NAME = (
+    "uploads/airplanes/skyliner-x-"
+    "0f8fad5b-d9cb-469f-a165-70867728950e.jpg"
+)
+CONTENT = bytes(range(256)) * 4
+
+
+def media_url(name):
+    return reverse("media", args=[name])
+
+
+class MediaServingTests(SimpleTestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root, MEDIA_OFFLOAD=""
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media_root = media_root
+        for name in (VARIANT_NAME, UPLOAD_NAME, "uploads/plan.png"):
+            path = os.path.join(media_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(CONTENT)
+
+    def test_serve_content_addressed_file(self):
+        res = self.client.get(media_url(VARIANT_NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(res.streaming_content), CONTENT)
+        self.assertEqual(res["Content-Type"], "image/webp")
+        self.assertEqual(res["Content-Length"], str(len(CONTENT)))
+        self.assertEqual(res["Accept-Ranges"], "bytes")
+        self.assertIn("immutable", res["Cache-Control"])
+        self.assertIn("max-age=31536000", res["Cache-Control"])
+        self.assertIn("ETag", res)
+
+    def test_cache_control_of_other_names(self):
+        res = self.client.get(media_url("uploads/plan.png"))
+
+        self.assertEqual(res["Cache-Control"], "public, max-age=3600")
+        res = self.client.get(media_url(UPLOAD_NAME))
+        self.assertIn("immutable", res["Cache-Control"])
+
+    def test_not_modified(self):
+        etag = self.client.get(media_url(VARIANT_NAME))["ETag"]
+
+        res = self.client.get(
+            media_url(VARIANT_NAME), HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn("immutable", res["Cache-Control"])
+
+    def test_range(self):
+        res = self.client.get(
+            media_url(VARIANT_NAME), HTTP_RANGE="bytes=10-19"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b"".join(res.streaming_content), CONTENT[10:20])
+        self.assertEqual(res["Content-Range"], "bytes 10-19/1024")
+        self.assertEqual(res["Content-Length"], "10")
+
+    def test_suffix_and_open_ranges(self):
+        res = self.client.get(media_url(VARIANT_NAME), HTTP_RANGE="bytes=-4")
+        self.assertEqual(b"".join(res.streaming_content), CONTENT[-4:])
+
+        res = self.client.get(
+            media_url(VARIANT_NAME), HTTP_RANGE="bytes=1000-"
+        )
+        self.assertEqual(res["Content-Range"], "bytes 1000-1023/1024")
+
+    def test_unsatisfiable_range(self):
+        res = self.client.get(
+            media_url(VARIANT_NAME), HTTP_RANGE="bytes=2000-"
+        )
+
+        self.assertEqual(
+            res.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        self.assertEqual(res["Content-Range"], "bytes */1024")
+
+    def test_stale_if_range_serves_whole_file(self):
+        res = self.client.get(
+            media_url(VARIANT_NAME),
+            HTTP_RANGE="bytes=0-9",
+            HTTP_IF_RANGE='"stale"',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(res.streaming_content), CONTENT)
+
+    def test_head(self):
+        res = self.client.head(media_url(VARIANT_NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, b"")
+        self.assertEqual(res["Content-Length"], str(len(CONTENT)))
+
+    def test_missing_and_outside_files(self):
+        self.assertEqual(
+            self.client.get(media_url("uploads/missing.png")).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        self.assertEqual(
+            self.client.get(media_url("uploads")).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        self.assertEqual(
+            self.client.get("/media/%2E%2E/%2E%2E/etc/passwd").status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    def test_post_not_allowed(self):
+        res = self.client.post(media_url(VARIANT_NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    @override_settings(
+        MEDIA_OFFLOAD="x-accel-redirect",
+        MEDIA_OFFLOAD_LOCATION="/protected-media/",
+    )
+    def test_x_accel_redirect(self):
+        res = self.client.get(media_url(VARIANT_NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, b"")
+        self.assertEqual(
+            res["X-Accel-Redirect"], f"/protected-media/{VARIANT_NAME}"
+        )
+        self.assertEqual(res["Content-Type"], "image/webp")
+        self.assertIn("immutable", res["Cache-Control"])
+
+    @override_settings(MEDIA_OFFLOAD="x-sendfile")
+    def test_x_sendfile(self):
+        res = self.client.get(media_url(UPLOAD_NAME))
+
+        self.assertEqual(
+            res["X-Sendfile"], os.path.join(self.media_root, UPLOAD_NAME)
+        )
+        self.assertEqual(res.content, b"")
+
+    def test_parse_range(self):
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertIsNone(parse_range("items=0-1", 100))
+        self.assertEqual(parse_range("bytes=90-200", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-200", 100), (0, 99))
+        with self.assertRaises(ValueError):
+            parse_range("bytes=5-1", 100)
+
+    def test_is_immutable(self):
+        self.assertTrue(is_immutable(VARIANT_NAME))
+        self.assertTrue(is_immutable(UPLOAD_NAME))
+        self.assertFalse(is_immutable("uploads/airplanes/skyliner-x.jpg"))
@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order, Ticket
+from airport.tests.sample_data import sample_flight, sample_airplane
+
+ORDER_URL = reverse("airport:order-list")
+
+
+class UnauthenticatedOrderApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(ORDER_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedOrderApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(
+            airplane=sample_airplane(rows=3, seats_in_row=3)
+        )
+
+    def create_order(self, *seats, flight=None):
+        flight = flight or self.flight
+        payload = {
+            "tickets": [
+                {"row": row, "seat": seat, "flight": flight.id}
+                for row, seat in seats
+            ]
+        }
+        return self.client.post(ORDER_URL, payload, format="json")
+
+    def test_create_order(self):
+        other_flight = sample_flight()
+
+        res = self.create_order((1, 1), (1, 2))
+        other_res = self.create_order((1, 1), flight=other_flight)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(other_res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 2)
+        self.assertEqual(Ticket.objects.filter(flight=self.flight).count(), 2)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.seats_sold, 2)
+
+    def test_create_group_order_queries(self):
+        seats = [(row, seat) for row in range(1, 4) for seat in range(1, 4)]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.create_order(*seats)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.count(), 9)
+        # Independent of the number of seats, with a seat lock per flight
+        self.assertLessEqual(len(queries), 10)
+
+    def test_create_order_seat_out_of_range(self):
+        res = self.create_order((1, 1), (2, 4))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["tickets"][1]["seat"],
+            ["seat number must be in available range: "
+             "(1, seats_in_row): (1, 3)"],
+        )
+        self.assertFalse(Order.objects.exists())
+
+    def test_create_order_seat_taken(self):
+        self.create_order((1, 1))
+
+        res = self.create_order((1, 2), (1, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0], {})
+        self.assertEqual(
+            res.data["tickets"][1]["non_field_errors"],
+            ["The fields flight, row, seat must make a unique set."],
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_create_order_duplicate_seats(self):
+        res = self.create_order((2, 2), (2, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", res.data["tickets"][1])
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_create_order_unknown_flight(self):
+        payload = {
+            "tickets": [{"row": 1, "seat": 1, "flight": self.flight.id + 1}]
+        }
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("flight", res.data["tickets"][0])
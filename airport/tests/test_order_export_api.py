@@ -0,0 +1,119 @@
+import csv
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.exports import batched
+from airport.models import Order, Ticket
+from airport.tests.sample_data import sample_airplane, sample_flight
+
+EXPORT_URL = reverse("airport:order-export")
+
+
+def streamed_text(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class OrderExportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "testpass",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.admin)
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.flight = sample_flight(
+            airplane=sample_airplane(rows=3, seats_in_row=4)
+        )
+        self.order = Order.objects.create(user=self.user)
+        for seat in (1, 2):
+            Ticket.objects.create(
+                flight=self.flight, order=self.order, row=1, seat=seat
+            )
+
+    def test_export_csv(self):
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertIn("attachment;", res["Content-Disposition"])
+        rows = list(csv.DictReader(StringIO(streamed_text(res))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["order_id"], str(self.order.id))
+        self.assertEqual(rows[0]["user_email"], "test@test.com")
+        self.assertEqual(rows[1]["seat"], "2")
+        self.assertEqual(rows[0]["source"], "Source Airport")
+        self.assertEqual(rows[0]["airplane"], "Skyliner X")
+        self.assertEqual(
+            rows[0]["departure_time"], "2023-11-18T12:00:00Z"
+        )
+
+    def test_export_ndjson(self):
+        res = self.client.get(EXPORT_URL, {"output": "ndjson"})
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [
+            json.loads(line) for line in streamed_text(res).splitlines()
+        ]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["flight_id"], self.flight.id)
+        self.assertEqual(rows[0]["route_id"], self.flight.route_id)
+        self.assertEqual(rows[0]["row"], 1)
+
+    def test_export_created_filters(self):
+        today = timezone.localdate()
+
+        res = self.client.get(
+            EXPORT_URL, {"created_to": str(today - timedelta(days=1))}
+        )
+        self.assertEqual(streamed_text(res).count("\n"), 1)
+
+        res = self.client.get(EXPORT_URL, {"created_from": str(today)})
+        self.assertEqual(streamed_text(res).count("\n"), 3)
+
+    async def test_export_streamed_async_under_asgi(self):
+        token = AccessToken.for_user(self.admin)
+
+        res = await self.async_client.get(
+            EXPORT_URL, headers={"Authorization": f"Bearer {token}"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.is_async)
+        text = b"".join(
+            [chunk async for chunk in res.streaming_content]
+        ).decode()
+        self.assertEqual(len(list(csv.DictReader(StringIO(text)))), 2)
+
+    def test_export_invalid_output(self):
+        res = self.client.get(EXPORT_URL, {"output": "xlsx"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_forbidden_for_regular_user(self):
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_batched(self):
+        lines = (f"{number}\n" for number in range(5))
+
+        self.assertEqual(
+            list(batched(lines, 2)), ["0\n1\n", "2\n3\n", "4\n"]
+        )
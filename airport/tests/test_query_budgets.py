@@ -0,0 +1,139 @@
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.models import Order, Ticket
+from airport.query_stats import QueryStatsMiddleware
+from airport.tests.query_budget import QueryBudgetMixin
+from airport.tests.sample_data import sample_airplane, sample_flight
+
+# Queries allowed per endpoint, independent of the number of rows
+QUERY_BUDGETS = {
+    "airport:airplanetype-list": 1,
+    "airport:airplane-list": 1,
+    "airport:crew-list": 1,
+    "airport:country-list": 1,
+    "airport:city-list": 1,
+    "airport:airport-list": 1,
+    "airport:route-list": 1,
+    "airport:flight-list": 2,
+    "airport:order-list": 4,
+    "airport:seathold-list": 1,
+}
+DETAIL_QUERY_BUDGETS = {
+    "airport:airplane-detail": 1,
+    "airport:airport-detail": 1,
+    "airport:route-detail": 1,
+    "airport:flight-detail": 3,
+}
+
+
+class QueryBudgetApiTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.flights = [
+            sample_flight(airplane=sample_airplane(rows=3, seats_in_row=4))
+            for _ in range(3)
+        ]
+        for _ in range(3):
+            order = Order.objects.create(user=self.user)
+            for seat, flight in enumerate(self.flights, start=1):
+                Ticket.objects.create(
+                    flight=flight, order=order, row=order.id % 3 + 1, seat=seat
+                )
+
+    def test_list_query_budgets(self):
+        for name, budget in QUERY_BUDGETS.items():
+            with self.subTest(name):
+                res = self.assertQueryBudget(budget, reverse(name))
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail_query_budgets(self):
+        flight = self.flights[0]
+        ids = {
+            "airport:airplane-detail": flight.airplane_id,
+            "airport:airport-detail": flight.route.source_id,
+            "airport:route-detail": flight.route_id,
+            "airport:flight-detail": flight.id,
+        }
+        for name, budget in DETAIL_QUERY_BUDGETS.items():
+            with self.subTest(name):
+                res = self.assertQueryBudget(
+                    budget, reverse(name, args=[ids[name]])
+                )
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_budget_exceeded(self):
+        with self.assertRaisesMessage(
+            AssertionError, "ran 4 queries, budget is 1"
+        ):
+            self.assertQueryBudget(1, reverse("airport:order-list"))
+
+
+class QueryStatsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        sample_flight()
+
+    @override_settings(QUERY_STATS_HEADERS=True)
+    def test_query_stats_headers(self):
+        res = self.client.get(reverse("airport:flight-list"))
+
+        self.assertEqual(res["X-DB-Query-Count"], "2")
+        self.assertEqual(res["X-DB-Duplicate-Queries"], "0")
+        self.assertIn("X-DB-Time-Ms", res)
+
+    @override_settings(QUERY_STATS_HEADERS=False)
+    def test_query_stats_headers_disabled(self):
+        res = self.client.get(reverse("airport:flight-list"))
+
+        self.assertNotIn("X-DB-Query-Count", res)
+
+    @override_settings(QUERY_STATS_WARNING_THRESHOLD=0)
+    def test_query_stats_logged_above_threshold(self):
+        with self.assertLogs("airport.query_stats", "WARNING") as logs:
+            self.client.get(reverse("airport:flight-list"))
+
+        self.assertIn("ran 2 queries", logs.output[0])
+
+    def test_async_capable(self):
+        async def get_response(request):
+            pass
+
+        self.assertTrue(
+            iscoroutinefunction(QueryStatsMiddleware(get_response))
+        )
+        self.assertFalse(
+            iscoroutinefunction(QueryStatsMiddleware(lambda request: None))
+        )
+
+    @override_settings(QUERY_STATS_HEADERS=True)
+    async def test_query_stats_headers_async_view(self):
+        res = await self.async_client.get(
+            reverse("airport:async-route-list"),
+            headers={
+                "Authorization": f"Bearer {AccessToken.for_user(self.user)}"
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # The user and the page of routes
+        self.assertEqual(res["X-DB-Query-Count"], "2")
@@ -0,0 +1,153 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import serializers, status
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+    force_authenticate,
+)
+
+from airport.models import Airport, Flight, Order, Ticket
+from airport.query_planner import get_query_plan
+from airport.response_cache import response_cache
+from airport.serializers import (
+    AirportListSerializer,
+    FlightListSerializer,
+    OrderListSerializer,
+    RouteListSerializer,
+)
+from airport.tests.sample_data import sample_airplane, sample_flight
+from airport.views import AirportViewSet
+
+
+class UnplannedAirportSerializer(AirportListSerializer):
+    routes = serializers.SerializerMethodField()
+
+    def get_routes(self, airport):
+        return airport.routes_source.count()
+
+
+class UnplannedAirportViewSet(AirportViewSet):
+    def get_serializer_class(self):
+        return UnplannedAirportSerializer
+
+
+class QueryPlanTests(SimpleTestCase):
+    def test_str_dependencies_joined(self):
+        plan = get_query_plan(AirportListSerializer, Airport)
+
+        self.assertEqual(
+            plan.select_related,
+            {"closest_big_city", "closest_big_city__country"},
+        )
+        self.assertEqual(plan.prefetches, {})
+        self.assertNotIn("image_variants", plan.only_fields())
+        self.assertIn("closest_big_city__country__name", plan.only_fields())
+
+    def test_nested_sources_joined(self):
+        plan = get_query_plan(
+            RouteListSerializer, RouteListSerializer.Meta.model
+        )
+
+        self.assertEqual(
+            plan.select_related,
+            {
+                f"{airport}{path}"
+                for airport in ("source", "destination")
+                for path in (
+                    "",
+                    "__closest_big_city",
+                    "__closest_big_city__country",
+                )
+            },
+        )
+
+    def test_many_relations_prefetched(self):
+        plan = get_query_plan(
+            FlightListSerializer, Flight, frozenset({"tickets_available"})
+        )
+
+        self.assertEqual(set(plan.prefetches), {"crew"})
+        self.assertIn("route__source__closest_big_city", plan.select_related)
+        self.assertIn("airplane__name", plan.only_fields())
+
+    def test_prefetched_relations_planned(self):
+        plan = get_query_plan(OrderListSerializer, Order)
+
+        tickets = plan.prefetches["tickets"]
+        self.assertIn("order", tickets.only_fields())
+        self.assertIn("flight__route__source", tickets.select_related)
+        self.assertEqual(set(tickets.prefetches), {"flight__crew"})
+
+    def test_unknown_attribute_loads_all_columns(self):
+        plan = get_query_plan(UnplannedAirportSerializer, Airport)
+
+        self.assertIsNone(plan.only_fields())
+
+
+@override_settings(QUERY_PLAN_WARNINGS=True, VALUES_SERIALIZERS=False)
+class QueryPlanApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        response_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.flights = [
+            sample_flight(airplane=sample_airplane(rows=3, seats_in_row=4))
+            for _ in range(2)
+        ]
+        order = Order.objects.create(user=self.user)
+        for seat, flight in enumerate(self.flights, start=1):
+            Ticket.objects.create(flight=flight, order=order, row=1, seat=seat)
+
+    def test_no_unplanned_queries(self):
+        flight = self.flights[0]
+        urls = [
+            reverse(name)
+            for name in (
+                "airport:airplane-list",
+                "airport:city-list",
+                "airport:airport-list",
+                "airport:route-list",
+                "airport:flight-list",
+                "airport:order-list",
+            )
+        ] + [
+            reverse("airport:airplane-detail", args=[flight.airplane_id]),
+            reverse("airport:airport-detail", args=[flight.route.source_id]),
+            reverse("airport:route-detail", args=[flight.route_id]),
+            reverse("airport:flight-detail", args=[flight.id]),
+        ]
+        for url in urls:
+            with self.subTest(url):
+                with self.assertNoLogs("airport.query_planner", "WARNING"):
+                    res = self.client.get(url)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_unplanned_relation_logged(self):
+        view = UnplannedAirportViewSet.as_view({"get": "list"})
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, self.user)
+
+        with self.assertLogs("airport.query_planner", "WARNING") as logs:
+            res = view(request)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("UnplannedAirportSerializer", logs.output[0])
+        self.assertIn("airport_route", logs.output[0])
+
+    @override_settings(QUERY_PLAN_WARNINGS=False)
+    def test_warnings_disabled(self):
+        view = UnplannedAirportViewSet.as_view({"get": "list"})
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, self.user)
+
+        with self.assertNoLogs("airport.query_planner", "WARNING"):
+            view(request)
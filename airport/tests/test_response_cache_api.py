@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import City, Country, Crew
+from airport.response_cache import LRUCache, response_cache
+
+COUNTRY_URL = reverse("airport:country-list")
+CITY_URL = reverse("airport:city-list")
+CREW_URL = reverse("airport:crew-list")
+CACHE_STATS_URL = reverse("airport:cache-stats-list")
+
+
+class ResponseCacheApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        response_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.country = Country.objects.create(name="Ukraine")
+
+    def test_list_served_from_cache(self):
+        res = self.client.get(COUNTRY_URL)
+        self.assertEqual(res["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            res = self.client.get(COUNTRY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual(
+            res.data, [{"id": self.country.id, "name": "Ukraine"}]
+        )
+
+    def test_shared_cache_fills_local_cache(self):
+        self.client.get(COUNTRY_URL)
+        response_cache.local.clear()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(COUNTRY_URL)
+
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual(len(res.data), 1)
+
+    def test_query_params_are_cached_separately(self):
+        self.client.get(CREW_URL)
+
+        res = self.client.get(CREW_URL, {"page": 2})
+
+        self.assertEqual(res["X-Cache"], "MISS")
+
+    def test_invalidated_on_write(self):
+        self.client.get(COUNTRY_URL)
+        self.client.get(CITY_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Crew.objects.create(first_name="Jane", last_name="Doe")
+        self.assertEqual(self.client.get(COUNTRY_URL)["X-Cache"], "HIT")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            City.objects.create(name="Kyiv", country=self.country)
+        res = self.client.get(CITY_URL)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data[0]["country"], "Ukraine")
+
+        self.country.name = "Ukraina"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.country.save()
+        res = self.client.get(CITY_URL)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data[0]["country"], "Ukraina")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.country.delete()
+        res = self.client.get(COUNTRY_URL)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data, [])
+
+    def test_invalidated_on_commit(self):
+        self.client.get(COUNTRY_URL)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Country.objects.create(name="Poland")
+        self.assertEqual(self.client.get(COUNTRY_URL)["X-Cache"], "HIT")
+
+        for callback in callbacks:
+            callback()
+        res = self.client.get(COUNTRY_URL)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(len(res.data), 2)
+
+    def test_cache_stats(self):
+        self.client.get(COUNTRY_URL)
+        self.client.get(COUNTRY_URL)
+
+        res = self.client.get(CACHE_STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.get(CACHE_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["size"], 1)
+        self.assertEqual(res.data["groups"]["countries"]["misses"], 1)
+        self.assertGreaterEqual(
+            res.data["groups"]["countries"]["local_hits"], 1
+        )
+
+
+class LRUCacheTests(TestCase):
+    def test_least_recently_used_evicted(self):
+        lru = LRUCache(2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("c"), 3)
+        self.assertEqual(len(lru), 2)
@@ -0,0 +1,254 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Crew, Flight
+from airport.tests.sample_data import sample_airplane, sample_route
+
+FLIGHT_URL = reverse("airport:flight-list")
+IMPORT_URL = reverse("airport:flight-bulk-import")
+
+CSV_SCHEDULE = (
+    "source,destination,airplane,departure_time,arrival_time,crew\n"
+    "Source Airport,Destination Airport,Skyliner X,"
+    "2024-07-01T08:00:00+02:00,2024-07-01T11:00:00+02:00,"
+    "Anna Pilot;Ben Steward\n"
+    "Source Airport,Destination Airport,Skyliner X,"
+    "2024-07-02T08:00:00+02:00,2024-07-02T11:00:00+02:00,\n"
+)
+
+
+def ndjson(*rows):
+    return "\n".join(
+        row if isinstance(row, str) else json.dumps(row) for row in rows
+    )
+
+
+def schedule_row(**params):
+    row = {
+        "source": "Source Airport",
+        "destination": "Destination Airport",
+        "airplane": "Skyliner X",
+        "departure_time": "2024-07-01T08:00:00+02:00",
+        "arrival_time": "2024-07-01T11:00:00+02:00",
+        "crew": ["Anna Pilot"],
+    }
+    row.update(params)
+    return row
+
+
+class ScheduleImportTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "testpass",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        self.route = sample_route()
+        self.airplane = sample_airplane()
+        self.anna = Crew.objects.create(first_name="Anna", last_name="Pilot")
+        self.ben = Crew.objects.create(first_name="Ben", last_name="Steward")
+
+
+class ScheduleImportApiTests(ScheduleImportTestCase):
+    def test_import_csv(self):
+        res = self.client.generic(
+            "POST", IMPORT_URL, CSV_SCHEDULE, content_type="text/csv"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            {"rows": 2, "created": 2, "error_count": 0, "errors": []},
+        )
+        flights = Flight.objects.order_by("departure_time")
+        self.assertEqual(len(flights), 2)
+        self.assertEqual(flights[0].route, self.route)
+        self.assertEqual(flights[0].airplane, self.airplane)
+        self.assertEqual(set(flights[0].crew.all()), {self.anna, self.ben})
+        self.assertFalse(flights[1].crew.exists())
+
+    def test_import_ndjson_row_errors(self):
+        schedule = ndjson(
+            schedule_row(),
+            schedule_row(airplane="Unknown"),
+            "{not json",
+            "",
+            schedule_row(
+                departure_time="tomorrow",
+                crew=["Anna Pilot", "Nobody"],
+            ),
+            schedule_row(arrival_time="2024-07-01T07:00:00+02:00"),
+            schedule_row(source=""),
+        )
+
+        res = self.client.generic(
+            "POST",
+            IMPORT_URL,
+            schedule,
+            content_type="application/x-ndjson",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 6)
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual(res.data["error_count"], 5)
+        errors = {
+            error["line"]: error["errors"] for error in res.data["errors"]
+        }
+        self.assertEqual(
+            errors[2], {"airplane": ["'Unknown' does not exist."]}
+        )
+        self.assertEqual(errors[3], {"row": ["Enter a valid JSON object."]})
+        self.assertEqual(
+            errors[5],
+            {
+                "crew": ["'Nobody' does not exist."],
+                "departure_time": ["Enter a valid date/time."],
+            },
+        )
+        self.assertIn("arrival_time", errors[6])
+        self.assertEqual(errors[7], {"source": ["This field is required."]})
+        self.assertEqual(Flight.objects.count(), 1)
+
+    def test_import_unreadable_file(self):
+        valid_row = (
+            "Source Airport,Destination Airport,Skyliner X,"
+            "2024-07-03T08:00:00+02:00,2024-07-03T11:00:00+02:00,\n"
+        )
+        schedules = {
+            "not utf-8": (
+                "text/csv",
+                CSV_SCHEDULE.encode() + b"\xff,\n" + valid_row.encode(),
+                4,
+            ),
+            "oversized field": (
+                "text/csv",
+                (
+                    CSV_SCHEDULE
+                    + "x" * (csv.field_size_limit() + 1)
+                    + "\n"
+                    + valid_row
+                ).encode(),
+                4,
+            ),
+            "ndjson not utf-8": (
+                "application/x-ndjson",
+                ndjson(schedule_row(), schedule_row()).encode()
+                + b"\n\xff\n",
+                3,
+            ),
+        }
+        for name, (media_type, body, line) in schedules.items():
+            with self.subTest(name):
+                res = self.client.generic(
+                    "POST", IMPORT_URL, body, content_type=media_type
+                )
+
+                self.assertEqual(
+                    res.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertEqual(res.data["created"], 2)
+                self.assertEqual(res.data["errors"][-1]["line"], line)
+                self.assertIn("file", res.data["errors"][-1]["errors"])
+
+    def test_import_without_body(self):
+        res = self.client.generic("POST", IMPORT_URL, content_type="text/csv")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["created"], 0)
+        self.assertEqual(res.data["errors"][0]["line"], 1)
+        self.assertIn("file", res.data["errors"][0]["errors"])
+
+    def test_import_ambiguous_route(self):
+        sample_route()
+
+        res = self.client.generic(
+            "POST",
+            IMPORT_URL,
+            ndjson(schedule_row()),
+            content_type="application/x-ndjson",
+        )
+
+        self.assertEqual(
+            res.data["errors"][0]["errors"],
+            {
+                "route": [
+                    "('Source Airport', 'Destination Airport') "
+                    "matches several objects."
+                ]
+            },
+        )
+
+    def test_import_dry_run(self):
+        res = self.client.generic(
+            "POST",
+            f"{IMPORT_URL}?dry_run=true",
+            CSV_SCHEDULE,
+            content_type="text/csv",
+        )
+
+        self.assertEqual(res.data["created"], 2)
+        self.assertFalse(Flight.objects.exists())
+
+    def test_import_unsupported_media_type(self):
+        res = self.client.post(IMPORT_URL, {"schedule": CSV_SCHEDULE})
+
+        self.assertEqual(
+            res.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+
+    def test_import_forbidden_for_regular_user(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "testpass")
+        )
+
+        res = self.client.generic(
+            "POST", IMPORT_URL, CSV_SCHEDULE, content_type="text/csv"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Flight.objects.exists())
+
+    def test_import_changes_flight_list_etag(self):
+        etag = self.client.get(FLIGHT_URL)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.generic(
+                "POST", IMPORT_URL, CSV_SCHEDULE, content_type="text/csv"
+            )
+
+        res = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+
+
+class ImportScheduleCommandTests(ScheduleImportTestCase):
+    def test_import_schedule_file(self):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False
+        ) as file:
+            file.write(CSV_SCHEDULE + "Source Airport,,Skyliner X,,,\n")
+        self.addCleanup(os.remove, file.name)
+        out, err = StringIO(), StringIO()
+
+        call_command("import_schedule", file.name, stdout=out, stderr=err)
+
+        self.assertIn(
+            "2 of 3 flights imported, 1 rows with errors", out.getvalue()
+        )
+        self.assertIn("line 4:", err.getvalue())
+        self.assertEqual(Flight.objects.count(), 2)
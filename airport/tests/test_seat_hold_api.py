@@ -0,0 +1,217 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order, SeatHold, Ticket
+from airport.serializers import OrderSerializer
+from airport.tests.sample_data import sample_flight, sample_airplane
+
+SEAT_HOLD_URL = reverse("airport:seathold-list")
+CHECKOUT_URL = reverse("airport:seathold-checkout")
+ORDER_URL = reverse("airport:order-list")
+
+
+def hold_url(flight_id):
+    return reverse("airport:flight-hold", args=[flight_id])
+
+
+class UnauthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(SEAT_HOLD_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.other_user = get_user_model().objects.create_user(
+            "other@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(
+            airplane=sample_airplane(rows=3, seats_in_row=3)
+        )
+
+    def hold(self, *seats):
+        payload = {
+            "seats": [{"row": row, "seat": seat} for row, seat in seats]
+        }
+        return self.client.post(
+            hold_url(self.flight.id), payload, format="json"
+        )
+
+    def test_hold_seats(self):
+        res = self.hold((1, 1), (1, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(
+            SeatHold.objects.filter(user=self.user).count(), 2
+        )
+
+    def test_hold_seat_out_of_range(self):
+        res = self.hold((4, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_hold_unknown_flight(self):
+        payload = {"seats": [{"row": 1, "seat": 1}]}
+
+        for flight_id in (self.flight.id + 1, "abc"):
+            with self.subTest(flight_id):
+                res = self.client.post(
+                    hold_url(flight_id), payload, format="json"
+                )
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_hold_seat_held_by_other_user(self):
+        SeatHold.objects.create(
+            flight=self.flight,
+            user=self.other_user,
+            row=1,
+            seat=1,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+
+        res = self.hold((1, 1), (1, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(SeatHold.objects.filter(user=self.user).exists())
+
+    def test_hold_sold_seat(self):
+        order = Order.objects.create(user=self.other_user)
+        Ticket.objects.create(flight=self.flight, order=order, row=2, seat=2)
+
+        res = self.hold((2, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+    def test_hold_replaces_expired_hold(self):
+        SeatHold.objects.create(
+            flight=self.flight,
+            user=self.other_user,
+            row=1,
+            seat=1,
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+
+        res = self.hold((1, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.user)
+
+    def test_order_rejects_seat_held_by_other_user(self):
+        self.hold((1, 1))
+        self.client.force_authenticate(self.other_user)
+
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 1}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_order_rejects_hold_taken_after_validation(self):
+        self.client.force_authenticate(self.other_user)
+
+        def validate_tickets(serializer, tickets_data):
+            # Another customer holds the seat before the order commits
+            SeatHold.objects.create(
+                flight=self.flight,
+                user=self.user,
+                row=1,
+                seat=1,
+                expires_at=timezone.now() + timedelta(minutes=5),
+            )
+            return tickets_data
+
+        with mock.patch.object(
+            OrderSerializer, "validate_tickets", validate_tickets
+        ):
+            res = self.client.post(
+                ORDER_URL,
+                {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 1}]},
+                format="json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_order_releases_own_holds(self):
+        self.hold((1, 1), (1, 2))
+
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 1}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(SeatHold.objects.values_list("row", "seat")), [(1, 2)]
+        )
+
+    @override_settings(SEAT_HOLD_MAX_SEATS=3)
+    def test_held_seats_capped_per_user(self):
+        self.assertEqual(
+            self.hold((1, 1), (1, 2)).status_code, status.HTTP_201_CREATED
+        )
+        # Seats held again are not counted twice
+        self.assertEqual(
+            self.hold((1, 2), (1, 3)).status_code, status.HTTP_201_CREATED
+        )
+
+        res = self.hold((2, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(SeatHold.objects.filter(user=self.user).count(), 3)
+
+    def test_checkout_converts_holds_into_order(self):
+        self.hold((1, 1), (3, 3))
+
+        res = self.client.post(CHECKOUT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 2)
+        self.assertEqual(
+            Order.objects.get(user=self.user).tickets.count(), 2
+        )
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_checkout_without_holds(self):
+        res = self.client.post(CHECKOUT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sweep_seat_holds_command(self):
+        SeatHold.objects.create(
+            flight=self.flight,
+            user=self.other_user,
+            row=1,
+            seat=1,
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        self.hold((2, 1))
+
+        call_command("sweep_seat_holds", stdout=StringIO())
+
+        self.assertEqual(SeatHold.objects.get().user, self.user)
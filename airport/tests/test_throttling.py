@@ -0,0 +1,220 @@
+import multiprocessing
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from airport.throttling import (
+    SlidingWindowAnonRateThrottle,
+    SlidingWindowStore,
+    SlidingWindowUserRateThrottle,
+    get_throttle_store,
+)
+
+
+def hit_many(path, slots, count, results):
+    store = SlidingWindowStore(path, slots)
+    results.put(
+        sum(store.hit("shared", 100, 60, 1000.0)[0] for _ in range(count))
+    )
+    store.close()
+
+
+class SlidingWindowStoreTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, "throttle.bin")
+        self.addCleanup(os.rmdir, directory)
+        self.addCleanup(os.remove, self.path)
+        self.store = SlidingWindowStore(self.path, 64)
+        self.addCleanup(self.store.close)
+
+    def hits(self, key, count, limit=3, duration=60, now=1200.0):
+        return [
+            self.store.hit(key, limit, duration, now)[0]
+            for _ in range(count)
+        ]
+
+    def test_limit_per_key(self):
+        self.assertEqual(self.hits("a", 4), [True, True, True, False])
+        self.assertEqual(self.hits("b", 1), [True])
+
+    def test_previous_window_weighted(self):
+        self.hits("a", 3, now=1200.0)
+
+        # A quarter into the next window 3 * 0.75 requests still count
+        self.assertEqual(self.hits("a", 1, now=1275.0), [False])
+        allowed, wait = self.store.hit("a", 3, 60, 1275.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 5.0)
+        # Half into it there is room for one more
+        self.assertEqual(self.hits("a", 2, now=1290.0), [True, False])
+        # Two windows later nothing is left
+        self.assertEqual(self.hits("a", 3, now=1400.0), [True] * 3)
+
+    def test_wait_until_next_window(self):
+        self.hits("a", 3, now=1210.0)
+
+        allowed, wait = self.store.hit("a", 3, 60, 1230.0)
+
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 30.0)
+
+    def test_full_bucket_replaces_oldest_window(self):
+        store = SlidingWindowStore(self.path, 4)
+        self.addCleanup(store.close)
+        for index, key in enumerate("abcd"):
+            store.hit(key, 1, 60, 1200.0 + index * 60)
+
+        self.assertTrue(store.hit("e", 1, 60, 1500.0)[0])
+        self.assertFalse(store.hit("d", 1, 60, 1380.0)[0])
+        self.assertTrue(store.hit("a", 1, 60, 1500.0)[0])
+
+    def test_counters_shared_through_file(self):
+        other = SlidingWindowStore(self.path, 64)
+        self.addCleanup(other.close)
+
+        self.hits("a", 2)
+
+        self.assertEqual(
+            [other.hit("a", 3, 60, 1200.0)[0] for _ in range(2)],
+            [True, False],
+        )
+
+    def test_counters_shared_between_processes(self):
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=hit_many, args=(self.path, 64, 50, results)
+            )
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        allowed = sum(results.get(timeout=10) for _ in processes)
+        for process in processes:
+            process.join()
+
+        self.assertEqual(allowed, 100)
+
+    def test_resized_file_reset(self):
+        self.hits("a", 3)
+
+        store = SlidingWindowStore(self.path, 128)
+        self.addCleanup(store.close)
+
+        self.assertEqual(store.slots, 128)
+        self.assertTrue(store.hit("a", 3, 60, 1200.0)[0])
+
+    def test_resized_file_replaced_under_mapping(self):
+        self.hits("a", 2)
+
+        resized = SlidingWindowStore(self.path, 128)
+        self.addCleanup(resized.close)
+        shared = SlidingWindowStore(self.path, 128)
+        self.addCleanup(shared.close)
+
+        # The mapping of the old layout keeps its counters
+        self.assertEqual(self.hits("a", 2), [True, False])
+        resized.hit("b", 1, 60, 1200.0)
+        self.assertFalse(shared.hit("b", 1, 60, 1200.0)[0])
+        self.assertEqual(
+            os.listdir(os.path.dirname(self.path)), ["throttle.bin"]
+        )
+
+    def test_clear(self):
+        self.hits("a", 3)
+
+        self.store.clear()
+
+        self.assertEqual(self.hits("a", 1), [True])
+
+
+class ThreePerMinuteView(APIView):
+    permission_classes = ()
+
+    class AnonThrottle(SlidingWindowAnonRateThrottle):
+        rate = "3/minute"
+
+    class UserThrottle(SlidingWindowUserRateThrottle):
+        rate = "3/minute"
+
+    throttle_classes = (AnonThrottle, UserThrottle)
+
+    def get(self, request):
+        return Response({})
+
+
+class DefaultRatesView(APIView):
+    permission_classes = ()
+    throttle_classes = (SlidingWindowAnonRateThrottle,)
+
+    def get(self, request):
+        return Response({})
+
+
+def throttle_rates(anon):
+    return {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {
+            **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+            "anon": anon,
+        },
+    }
+
+
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self):
+        get_throttle_store().clear()
+        self.factory = APIRequestFactory()
+        self.view = ThreePerMinuteView.as_view()
+
+    def get(self, user=None, address="10.0.0.1"):
+        request = self.factory.get("/", REMOTE_ADDR=address)
+        if user is not None:
+            force_authenticate(request, user)
+        return self.view(request)
+
+    def test_anon_throttled(self):
+        statuses = [self.get().status_code for _ in range(4)]
+
+        self.assertEqual(statuses[:3], [status.HTTP_200_OK] * 3)
+        self.assertEqual(statuses[3], status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(
+            self.get(address="10.0.0.2").status_code, status.HTTP_200_OK
+        )
+
+    def test_user_throttled_with_retry_after(self):
+        user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        for _ in range(3):
+            self.get(user)
+
+        res = self.get(user)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertLessEqual(int(res["Retry-After"]), 60)
+
+    def test_rates_read_from_settings(self):
+        view = DefaultRatesView.as_view()
+
+        with override_settings(REST_FRAMEWORK=throttle_rates("1/minute")):
+            statuses = [
+                view(self.factory.get("/")).status_code for _ in range(2)
+            ]
+        with override_settings(REST_FRAMEWORK=throttle_rates(None)):
+            unthrottled = view(self.factory.get("/")).status_code
+
+        self.assertEqual(
+            statuses,
+            [status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS],
+        )
+        self.assertEqual(unthrottled, status.HTTP_200_OK)
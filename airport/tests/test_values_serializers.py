@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.datasets import generate_dataset
+from airport.models import Crew, Flight
+from airport.serializers import FlightListSerializer, RouteListSerializer
+from airport.values_serializers import (
+    FlightListValuesSerializer,
+    RouteListValuesSerializer,
+)
+from airport.views import FlightViewSet, RouteViewSet
+
+FLIGHT_URL = reverse("airport:flight-list")
+ROUTE_URL = reverse("airport:route-list")
+
+
+class ValuesSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_dataset("tiny", seed=3)
+        # Crews added out of id order and a flight without crew
+        flights = list(Flight.objects.order_by("id")[:2])
+        crews = list(Crew.objects.order_by("-id")[:3])
+        flights[0].crew.set(crews)
+        flights[1].crew.clear()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "testpass")
+        )
+
+    def pages(self, url, params):
+        """Raw bodies of every page of the list"""
+        bodies = []
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            bodies.append(res.content)
+            url, params = res.data["next"], None
+        return bodies
+
+    def assert_identical(self, url, params=None):
+        params = {"page_size": 7, **(params or {})}
+        with override_settings(VALUES_SERIALIZERS=False):
+            expected = self.pages(url, params)
+        cache.clear()
+
+        actual = self.pages(url, params)
+
+        self.assertGreater(len(expected), 1)
+        self.assertEqual(actual, expected)
+
+    def test_flight_list_identical(self):
+        self.assert_identical(FLIGHT_URL)
+
+    def test_filtered_flight_list_identical(self):
+        crew_ids = ",".join(
+            str(crew_id)
+            for crew_id in Crew.objects.values_list("id", flat=True)
+        )
+        self.assert_identical(FLIGHT_URL, {"crews": crew_ids})
+
+    def test_route_list_identical(self):
+        self.assert_identical(ROUTE_URL)
+
+    def test_representations_match_serializers(self):
+        for values_serializer, serializer, viewset in (
+            (FlightListValuesSerializer, FlightListSerializer, FlightViewSet),
+            (RouteListValuesSerializer, RouteListSerializer, RouteViewSet),
+        ):
+            queryset = viewset.queryset.order_by("id")
+            values = values_serializer()
+
+            self.assertEqual(
+                values.to_representation(values.prepare(queryset)),
+                serializer(queryset, many=True).data,
+            )
+
+    def test_flight_list_queries(self):
+        serializer = FlightListValuesSerializer()
+
+        with self.assertNumQueries(2):
+            serializer.to_representation(
+                serializer.prepare(FlightViewSet.queryset)
+            )
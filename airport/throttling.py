@@ -0,0 +1,241 @@
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+try:
+    import fcntl
+except ImportError:  # Windows, counters are only shared between threads
+    fcntl = None
+
+# Magic, format version and number of slots at the start of the file
+THROTTLE_HEADER = struct.Struct("<4sII")
+THROTTLE_MAGIC = b"ATHR"
+THROTTLE_VERSION = 1
+# Key digest, window number, requests in the window and the one before
+THROTTLE_SLOT = struct.Struct("<QqII")
+# Slots a key may occupy, locked together as one byte range
+THROTTLE_BUCKET_SLOTS = 4
+
+
+def key_digest(key):
+    """Non-zero 64-bit digest, zero marks an empty slot"""
+    digest = int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(), "little"
+    )
+    return digest or 1
+
+
+class SlidingWindowStore:
+    """
+    Sliding-window request counters in a memory-mapped file shared by
+    every worker process of the host.
+    A key keeps the count of the current and of the previous fixed
+    window, the previous one is weighted by its overlap with the
+    sliding window. Updates lock a single bucket of slots with a POSIX
+    byte-range lock, so they are O(1) and never block other buckets.
+    When a bucket is full, the least recently used window is replaced.
+    """
+
+    def __init__(self, path, slots):
+        self.path = path
+        self.buckets = max(slots // THROTTLE_BUCKET_SLOTS, 1)
+        self.slots = self.buckets * THROTTLE_BUCKET_SLOTS
+        self.size = THROTTLE_HEADER.size + self.slots * THROTTLE_SLOT.size
+        # Record locks belong to the process, threads need their own lock
+        self.thread_lock = threading.Lock()
+        self.open()
+        self.map = mmap.mmap(self.fd, self.size)
+
+    def open(self):
+        """
+        Open the file at path with the layout of this store. A file with
+        another layout, e.g. left by workers of a previous deploy with
+        other THROTTLE_STORE_SLOTS, is replaced instead of resized, the
+        processes still mapping it keep using the old file.
+        """
+        while True:
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self.lock(0, THROTTLE_HEADER.size)
+            try:
+                stat = os.fstat(self.fd)
+                # Otherwise replaced while waiting for the lock, reopened
+                if os.path.samestat(stat, os.stat(self.path)):
+                    if stat.st_size == 0:
+                        # Created just now, nobody maps it yet
+                        self.initialize(self.fd)
+                        return
+                    if stat.st_size == self.size and (
+                        os.read(self.fd, THROTTLE_HEADER.size)
+                        == self.header()
+                    ):
+                        return
+                    self.replace()
+            finally:
+                self.unlock(0, THROTTLE_HEADER.size)
+            os.close(self.fd)
+
+    def initialize(self, fd):
+        os.ftruncate(fd, self.size)
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, self.header())
+
+    def replace(self):
+        """Swap in an initialized file of this layout at path"""
+        fd, temp_path = tempfile.mkstemp(
+            prefix=".throttle-",
+            dir=os.path.dirname(os.path.abspath(self.path)),
+        )
+        try:
+            self.initialize(fd)
+        finally:
+            os.close(fd)
+        os.replace(temp_path, self.path)
+
+    def header(self):
+        return THROTTLE_HEADER.pack(
+            THROTTLE_MAGIC, THROTTLE_VERSION, self.slots
+        )
+
+    def lock(self, offset, length):
+        if fcntl is not None:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, length, offset)
+
+    def unlock(self, offset, length):
+        if fcntl is not None:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, length, offset)
+
+    def hit(self, key, limit, duration, now):
+        """
+        Count a request of the key if the sliding window of duration
+        seconds holds less than limit requests.
+        Returns whether it is allowed and the seconds to wait if not.
+        """
+        digest = key_digest(key)
+        window, elapsed = divmod(now, duration)
+        window = int(window)
+        length = THROTTLE_BUCKET_SLOTS * THROTTLE_SLOT.size
+        offset = THROTTLE_HEADER.size + digest % self.buckets * length
+
+        with self.thread_lock:
+            self.lock(offset, length)
+            try:
+                slot_offset, current, previous = self.find_slot(
+                    offset, digest, window
+                )
+                weight = 1 - elapsed / duration
+                if previous * weight + current + 1 > limit:
+                    return False, self.wait(
+                        limit, current, previous, duration, elapsed
+                    )
+                THROTTLE_SLOT.pack_into(
+                    self.map,
+                    slot_offset,
+                    digest,
+                    window,
+                    current + 1,
+                    previous,
+                )
+                return True, None
+            finally:
+                self.unlock(offset, length)
+
+    def find_slot(self, offset, digest, window):
+        """Offset and counts of the key in the bucket, rolled to window"""
+        victim = None
+        for index in range(THROTTLE_BUCKET_SLOTS):
+            slot_offset = offset + index * THROTTLE_SLOT.size
+            slot_digest, slot_window, current, previous = (
+                THROTTLE_SLOT.unpack_from(self.map, slot_offset)
+            )
+            if slot_digest == digest:
+                if slot_window == window:
+                    return slot_offset, current, previous
+                if slot_window == window - 1:
+                    return slot_offset, 0, current
+                return slot_offset, 0, 0
+            if victim is None or slot_window < victim[1]:
+                victim = (slot_offset, slot_window)
+        return victim[0], 0, 0
+
+    @staticmethod
+    def wait(limit, current, previous, duration, elapsed):
+        """Seconds until the weighted count leaves room for a request"""
+        if current + 1 > limit or not previous:
+            return duration - elapsed
+        return max(
+            (1 - (limit - current - 1) / previous) * duration - elapsed, 0
+        )
+
+    def clear(self):
+        with self.thread_lock:
+            self.lock(THROTTLE_HEADER.size, 0)
+            try:
+                self.map[THROTTLE_HEADER.size:] = bytes(
+                    self.size - THROTTLE_HEADER.size
+                )
+            finally:
+                self.unlock(THROTTLE_HEADER.size, 0)
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_throttle_store():
+    """Store of THROTTLE_STORE_PATH, opened once per process"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SlidingWindowStore(
+                settings.THROTTLE_STORE_PATH, settings.THROTTLE_STORE_SLOTS
+            )
+        return _store
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Rate throttle counting requests in the shared SlidingWindowStore
+    instead of a history list per key in the default cache.
+    """
+
+    @property
+    def THROTTLE_RATES(self):
+        """Read per request, so that override_settings changes the rates"""
+        return api_settings.DEFAULT_THROTTLE_RATES
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self.wait_seconds = get_throttle_store().hit(
+            self.key, self.num_requests, self.duration, self.timer()
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class SlidingWindowAnonRateThrottle(
+    SlidingWindowThrottleMixin, AnonRateThrottle
+):
+    pass
+
+
+class SlidingWindowUserRateThrottle(
+    SlidingWindowThrottleMixin, UserRateThrottle
+):
+    pass
@@ -1,14 +1,20 @@
+from django.urls import path
 from rest_framework import routers
+from airport import async_views
 from airport.views import (
     AirplaneTypeViewSet,
     AirplaneViewSet,
     CrewViewSet,
     CountryViewSet,
     CityViewSet,
+    DatabasePoolStatsViewSet,
     AirportViewSet,
+    AutocompleteViewSet,
     RouteViewSet,
     FlightViewSet,
-    OrderViewSet
+    OrderViewSet,
+    ResponseCacheStatsViewSet,
+    SeatHoldViewSet
 )
 
 router = routers.DefaultRouter()
@@ -18,10 +24,34 @@ router.register("crews", CrewViewSet)
 router.register("countries", CountryViewSet)
 router.register("cities", CityViewSet)
 router.register("airports", AirportViewSet)
+router.register("autocomplete", AutocompleteViewSet, basename="autocomplete")
 router.register("routes", RouteViewSet)
 router.register("flights", FlightViewSet)
 router.register("orders", OrderViewSet)
+router.register("seat_holds", SeatHoldViewSet)
+router.register(
+    "cache_stats", ResponseCacheStatsViewSet, basename="cache-stats"
+)
+router.register(
+    "db_pool_stats", DatabasePoolStatsViewSet, basename="db-pool-stats"
+)
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path(
+        "async/flights/",
+        async_views.flight_list,
+        name="async-flight-list",
+    ),
+    path(
+        "async/flights/<int:pk>/",
+        async_views.flight_detail,
+        name="async-flight-detail",
+    ),
+    path(
+        "async/routes/",
+        async_views.route_list,
+        name="async-route-list",
+    ),
+]
 
 app_name = "airport"
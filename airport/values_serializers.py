@@ -0,0 +1,172 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601
+from rest_framework.fields import DateTimeField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from airport.models import Flight
+
+AIRPORT_LOOKUPS = (
+    "name",
+    "closest_big_city__name",
+    "closest_big_city__country__name",
+)
+
+
+def datetime_formatter():
+    """
+    DRF DateTimeField representation as a plain function, the current
+    time zone and the output format are looked up once per response.
+    """
+    if api_settings.DATETIME_FORMAT is None:
+        return lambda value: value
+    if (
+        api_settings.DATETIME_FORMAT.lower() != ISO_8601
+        or not settings.USE_TZ
+    ):
+        return DateTimeField().to_representation
+    current_timezone = timezone.get_current_timezone()
+
+    def to_representation(value):
+        if value is None:
+            return None
+        value = value.astimezone(current_timezone).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return to_representation
+
+
+class ValuesSerializer:
+    """
+    Read-only list serializer working on values_list() rows instead of
+    model instances. Subclasses name the columns they need in lookups
+    and build the same dicts as their ModelSerializer counterpart.
+    """
+
+    lookups = ()
+
+    def prepare(self, queryset):
+        """The rows of the queryset, paginated like model instances"""
+        return queryset.prefetch_related(None).values_list(
+            *self.lookups, named=True
+        )
+
+
+class FlightListValuesSerializer(ValuesSerializer):
+    """Same output as FlightListSerializer"""
+
+    lookups = (
+        "id",
+        "departure_time",
+        "arrival_time",
+        "tickets_available",
+        "airplane__name",
+        *(f"route__source__{lookup}" for lookup in AIRPORT_LOOKUPS),
+        *(f"route__destination__{lookup}" for lookup in AIRPORT_LOOKUPS),
+    )
+
+    @staticmethod
+    def crew_names(rows):
+        """Crew names of every flight, in the Crew ordering"""
+        crews = defaultdict(list)
+        memberships = (
+            Flight.crew.through.objects.filter(
+                flight_id__in=[row.id for row in rows]
+            )
+            .order_by("crew_id")
+            .values_list("flight_id", "crew__first_name", "crew__last_name")
+        )
+        for flight_id, first_name, last_name in memberships:
+            crews[flight_id].append(f"{first_name} {last_name}")
+        return crews
+
+    @staticmethod
+    def route_label(row):
+        """Route.__str__ of Airport.__str__ of City.__str__"""
+        source = (
+            row.route__source__name,
+            row.route__source__closest_big_city__name,
+            row.route__source__closest_big_city__country__name,
+        )
+        destination = (
+            row.route__destination__name,
+            row.route__destination__closest_big_city__name,
+            row.route__destination__closest_big_city__country__name,
+        )
+        return "{} ({}, {}) - {} ({}, {})".format(*source, *destination)
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        crews = self.crew_names(rows) if rows else {}
+        to_datetime = datetime_formatter()
+        return [
+            {
+                "id": row.id,
+                "route": self.route_label(row),
+                "airplane": row.airplane__name,
+                "departure_time": to_datetime(row.departure_time),
+                "arrival_time": to_datetime(row.arrival_time),
+                "crew": crews.get(row.id, []),
+                "tickets_available": row.tickets_available,
+            }
+            for row in rows
+        ]
+
+
+class RouteListValuesSerializer(ValuesSerializer):
+    """Same output as RouteListSerializer"""
+
+    lookups = (
+        "id",
+        "source__closest_big_city__name",
+        "source__closest_big_city__country__name",
+        "destination__closest_big_city__name",
+        "destination__closest_big_city__country__name",
+        "distance",
+    )
+
+    def to_representation(self, rows):
+        return [
+            {
+                "id": row.id,
+                "source": (
+                    f"{row.source__closest_big_city__name}, "
+                    f"{row.source__closest_big_city__country__name}"
+                ),
+                "destination": (
+                    f"{row.destination__closest_big_city__name}, "
+                    f"{row.destination__closest_big_city__country__name}"
+                ),
+                "distance": row.distance,
+            }
+            for row in rows
+        ]
+
+
+class ValuesListMixin:
+    """
+    Serve the list action with values_serializer_class, bypassing the
+    field machinery of the DRF serializer, when VALUES_SERIALIZERS is on.
+    """
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.values_serializer_class is None or (
+            not settings.VALUES_SERIALIZERS
+        ):
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.values_serializer_class()
+        rows = serializer.prepare(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_representation(page)
+            )
+        return Response(serializer.to_representation(rows))
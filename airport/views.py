@@ -1,8 +1,15 @@
-from django.db.models import F, Count
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.http import Http404
+from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, mixins, status
+from rest_framework import serializers, viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import UnsupportedMediaType, ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
@@ -16,7 +23,9 @@ from airport.models import (
     Airport,
     Route,
     Flight,
-    Order
+    Order,
+    SeatHold,
+    Ticket
 )
 from airport.serializers import (
     AirplaneTypeSerializer,
@@ -39,7 +48,38 @@ from airport.serializers import (
     OrderSerializer,
     OrderListSerializer,
     AirplaneImageSerializer,
-    AirportImageSerializer
+    AirportImageSerializer,
+    SeatHoldCreateSerializer,
+    SeatHoldSerializer
+)
+from airport.autocomplete import AUTOCOMPLETE_TYPES, get_index
+from airport.conditional import ConditionalGetMixin
+from airport.db_pool import pool_stats
+from airport.db_router import ReplicaReadMixin
+from airport.exports import EXPORT_FORMATS, export_response
+from airport.itineraries import get_graph
+from airport.pagination import (
+    AirportPagination,
+    FlightPagination,
+    RoutePagination
+)
+from airport.query_planner import QueryPlanMixin
+from airport.response_cache import CachedListMixin, response_cache
+from airport.schedule_import import (
+    SCHEDULE_MEDIA_TYPES,
+    ScheduleFileError,
+    import_schedule,
+)
+from airport.seat_holds import hold_seats
+from airport.seat_map import (
+    SEAT_MAP_ENCODINGS,
+    get_seat_map,
+    serialize_seat_map
+)
+from airport.values_serializers import (
+    FlightListValuesSerializer,
+    RouteListValuesSerializer,
+    ValuesListMixin,
 )
 
 
@@ -48,22 +88,53 @@ def params_to_ints(qs):
     return [int(str_id) for str_id in qs.split(",")]
 
 
+def param_to_int(value, name, minimum=1, maximum=None):
+    """Converts a query parameter to an integer within the bounds"""
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({name: "A valid integer is required"})
+    if number < minimum or (maximum is not None and number > maximum):
+        raise ValidationError(
+            {name: f"Must be between {minimum} and {maximum}"}
+            if maximum is not None
+            else {name: f"Must be at least {minimum}"}
+        )
+    return number
+
+
+def param_to_datetime(value, name, days=0):
+    """Converts a YYYY-MM-DD string to the start of that day (+ days)"""
+    try:
+        day = datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValidationError({name: "Date must be in YYYY-MM-DD format"})
+    return timezone.make_aware(
+        datetime.combine(day + timedelta(days=days), time.min)
+    )
+
+
 class AirplaneTypeViewSet(
+    ReplicaReadMixin,
+    CachedListMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.ListModelMixin
 ):
+    cache_group = "airplane_types"
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
 
 
 class AirplaneViewSet(
+    ReplicaReadMixin,
+    QueryPlanMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
 ):
-    queryset = Airplane.objects.select_related("airplane_type")
+    queryset = Airplane.objects.order_by("id")
 
     def get_queryset(self):
         """Retrieve the airplanes with airplane_type filter"""
@@ -118,29 +189,39 @@ class AirplaneViewSet(
 
 
 class CrewViewSet(
+    ReplicaReadMixin,
+    CachedListMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.ListModelMixin
 ):
+    cache_group = "crews"
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
 
 
 class CountryViewSet(
+    ReplicaReadMixin,
+    CachedListMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.ListModelMixin
 ):
+    cache_group = "countries"
     queryset = Country.objects.all()
     serializer_class = CountrySerializer
 
 
 class CityViewSet(
+    ReplicaReadMixin,
+    QueryPlanMixin,
+    CachedListMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.ListModelMixin
 ):
-    queryset = City.objects.select_related("country")
+    cache_group = "cities"
+    queryset = City.objects.all()
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -148,13 +229,34 @@ class CityViewSet(
         return CitySerializer
 
 
+class ResponseCacheStatsViewSet(viewsets.ViewSet):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def list(self, request):
+        """Hit and miss counters of the response cache in this process"""
+        return Response(response_cache.get_stats())
+
+
+class DatabasePoolStatsViewSet(viewsets.ViewSet):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def list(self, request):
+        """Connection pool counters of every database in this process"""
+        return Response(pool_stats())
+
+
 class AirportViewSet(
+    ReplicaReadMixin,
+    QueryPlanMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
 ):
-    queryset = Airport.objects.select_related("closest_big_city")
+    queryset = Airport.objects.all()
+    pagination_class = AirportPagination
 
     def get_queryset(self):
         """Retrieve the airports with closest_big_city filter"""
@@ -207,13 +309,69 @@ class AirportViewSet(
         return super().list(request, *args, **kwargs)
 
 
+class AutocompleteViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    default_limit = 10
+    max_limit = 20
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                type=OpenApiTypes.STR,
+                description="Name prefix to complete (ex. ?q=par)",
+            ),
+            OpenApiParameter(
+                "types",
+                type={"type": "list", "items": {"type": "string"}},
+                description=(
+                    "Restrict to city, airport and/or country "
+                    "(ex. ?types=city,airport)"
+                ),
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description="Number of suggestions, up to 20 (ex. ?limit=5)",
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    def list(self, request):
+        """Ranked name suggestions over cities, airports and countries"""
+        query = request.query_params.get("q", "")
+        types = request.query_params.get("types")
+        types = (
+            tuple(
+                value.strip()
+                for value in types.split(",")
+                if value.strip() in AUTOCOMPLETE_TYPES
+            )
+            if types
+            else AUTOCOMPLETE_TYPES
+        )
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = min(max(limit, 1), self.max_limit)
+
+        return Response(get_index().search(query, limit, types))
+
+
 class RouteViewSet(
+    ReplicaReadMixin,
+    QueryPlanMixin,
+    ConditionalGetMixin,
+    ValuesListMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin
 ):
-    queryset = Route.objects.select_related("source", "destination")
+    queryset = Route.objects.all()
+    pagination_class = RoutePagination
+    values_serializer_class = RouteListValuesSerializer
+    conditional_name = "route"
 
     def get_queryset(self):
         """Retrieve the routes with filters"""
@@ -256,29 +414,34 @@ class RouteViewSet(
 
 
 class FlightViewSet(
+    ReplicaReadMixin,
+    QueryPlanMixin,
+    ConditionalGetMixin,
+    ValuesListMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin
 ):
-    queryset = (
-        Flight.objects
-        .select_related("route", "airplane")
-        .prefetch_related("crew")
-        .annotate(
-            tickets_available=(
-                    F("airplane__rows")
-                    * F("airplane__seats_in_row")
-                    - Count("tickets")
-            )
+    queryset = Flight.objects.annotate(
+        tickets_available=(
+                F("airplane__rows")
+                * F("airplane__seats_in_row")
+                - F("seats_sold")
         )
     )
+    pagination_class = FlightPagination
+    values_serializer_class = FlightListValuesSerializer
+    conditional_name = "flight"
 
     def get_queryset(self):
         """Retrieve the flights with filters"""
-        routes = self.request.query_params.get("routes")
-        airplanes = self.request.query_params.get("airplanes")
-        crews = self.request.query_params.get("crews")
+        params = self.request.query_params
+        routes = params.get("routes")
+        airplanes = params.get("airplanes")
+        crews = params.get("crews")
+        source_cities = params.get("source_cities")
+        destination_cities = params.get("destination_cities")
         queryset = self.queryset
         if routes:
             routes_ids = params_to_ints(routes)
@@ -286,18 +449,255 @@ class FlightViewSet(
         if airplanes:
             airplanes_ids = params_to_ints(airplanes)
             queryset = queryset.filter(airplane__id__in=airplanes_ids)
+        if source_cities:
+            queryset = queryset.filter(
+                route__source__closest_big_city_id__in=params_to_ints(
+                    source_cities
+                )
+            )
+        if destination_cities:
+            queryset = queryset.filter(
+                route__destination__closest_big_city_id__in=params_to_ints(
+                    destination_cities
+                )
+            )
+        for param, lookup, days in (
+            ("departure_date_from", "departure_time__gte", 0),
+            ("departure_date_to", "departure_time__lt", 1),
+            ("arrival_date_from", "arrival_time__gte", 0),
+            ("arrival_date_to", "arrival_time__lt", 1),
+        ):
+            if params.get(param):
+                queryset = queryset.filter(
+                    **{lookup: param_to_datetime(params[param], param, days)}
+                )
         if crews:
             crews_ids = params_to_ints(crews)
-            queryset = queryset.filter(crew__id__in=crews_ids)
-        return queryset.distinct()
+            # Only the crew join can duplicate flights
+            queryset = queryset.filter(crew__id__in=crews_ids).distinct()
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
             return FlightListSerializer
         if self.action == "retrieve":
             return FlightDetailSerializer
+        if self.action == "hold":
+            return SeatHoldCreateSerializer
         return FlightSerializer
 
+    @extend_schema(responses=SeatHoldSerializer(many=True))
+    @action(
+        methods=["POST"],
+        detail=True,
+        permission_classes=[IsAuthenticated],
+    )
+    def hold(self, request, pk=None):
+        """Endpoint for holding seats of specific flight before ordering"""
+        flight = get_object_or_404(
+            Flight.objects.select_related("airplane"), pk=pk
+        )
+        serializer = self.get_serializer(
+            data=request.data,
+            context={**self.get_serializer_context(), "flight": flight},
+        )
+        serializer.is_valid(raise_exception=True)
+        holds = hold_seats(
+            request.user,
+            flight,
+            [
+                (seat["row"], seat["seat"])
+                for seat in serializer.validated_data["seats"]
+            ],
+        )
+        return Response(
+            SeatHoldSerializer(holds, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "encoding",
+                type=OpenApiTypes.STR,
+                enum=SEAT_MAP_ENCODINGS,
+                description=(
+                    "Occupancy encoding: base64 bitmap (default) "
+                    "or run lengths of free/taken seats (ex. ?encoding=rle)"
+                ),
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(methods=["GET"], detail=True, url_path="seat-map")
+    def seat_map(self, request, pk=None):
+        """Endpoint for compact seat occupancy of specific flight"""
+        encoding = request.query_params.get("encoding", "bitmap")
+        if encoding not in SEAT_MAP_ENCODINGS:
+            return Response(
+                {
+                    "encoding": "Must be one of: "
+                    + ", ".join(SEAT_MAP_ENCODINGS)
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            flight_id = int(pk)
+        except ValueError:
+            raise Http404
+        seat_map = get_seat_map(flight_id)
+        if seat_map is None:
+            raise Http404
+        return Response(serialize_seat_map(flight_id, seat_map, encoding))
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source_city",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Departure city id (ex. ?source_city=2)",
+            ),
+            OpenApiParameter(
+                "destination_city",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Arrival city id (ex. ?destination_city=5)",
+            ),
+            OpenApiParameter(
+                "date",
+                type=OpenApiTypes.DATE,
+                required=True,
+                description="Departure date (ex. ?date=2024-07-01)",
+            ),
+            OpenApiParameter(
+                "max_legs",
+                type=OpenApiTypes.INT,
+                description=(
+                    "Number of flights, 2 by default (ex. ?max_legs=3)"
+                ),
+            ),
+            OpenApiParameter(
+                "min_connection",
+                type=OpenApiTypes.INT,
+                description=(
+                    "Minimum connection time in minutes "
+                    "(ex. ?min_connection=60)"
+                ),
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description="Number of itineraries, up to 50 (ex. ?limit=5)",
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(methods=["GET"], detail=False)
+    def connections(self, request):
+        """Endpoint for itineraries with connections between two cities"""
+        params = request.query_params
+        source_city = param_to_int(params.get("source_city"), "source_city")
+        destination_city = param_to_int(
+            params.get("destination_city"), "destination_city"
+        )
+        day = param_to_datetime(params.get("date", ""), "date").date()
+        max_legs = param_to_int(
+            params.get("max_legs", 2),
+            "max_legs",
+            maximum=settings.ITINERARY_MAX_LEGS,
+        )
+        min_connection = param_to_int(
+            params.get(
+                "min_connection",
+                settings.ITINERARY_MIN_CONNECTION.total_seconds() // 60,
+            ),
+            "min_connection",
+            minimum=0,
+        )
+        limit = param_to_int(params.get("limit", 10), "limit", maximum=50)
+
+        itineraries = get_graph().search(
+            source_city,
+            destination_city,
+            day,
+            max_legs=max_legs,
+            min_connection=timedelta(minutes=min_connection),
+            max_connection=settings.ITINERARY_MAX_CONNECTION,
+            limit=limit,
+        )
+
+        to_representation = serializers.DateTimeField().to_representation
+        return Response(
+            [
+                {
+                    "departure_time": to_representation(
+                        legs[0].departure_time
+                    ),
+                    "arrival_time": to_representation(legs[-1].arrival_time),
+                    "duration_minutes": int(
+                        legs[-1].arrives_at - legs[0].departs_at
+                    ) // 60,
+                    "connections": len(legs) - 1,
+                    "legs": [
+                        {
+                            "flight": leg.flight_id,
+                            "source": leg.source_id,
+                            "destination": leg.destination_id,
+                            "departure_time": to_representation(
+                                leg.departure_time
+                            ),
+                            "arrival_time": to_representation(
+                                leg.arrival_time
+                            ),
+                        }
+                        for leg in legs
+                    ],
+                }
+                for legs in itineraries
+            ]
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "dry_run",
+                type=OpenApiTypes.BOOL,
+                description="Validate the rows without creating flights",
+            ),
+        ],
+        request={
+            media_type: OpenApiTypes.STR
+            for media_type in SCHEDULE_MEDIA_TYPES
+        },
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="import",
+        permission_classes=[IsAdminUser],
+    )
+    def bulk_import(self, request):
+        """
+        Endpoint for importing a streamed CSV or NDJSON schedule with
+        source, destination, airplane, departure_time, arrival_time and
+        crew names (separated by ";" in CSV) of every flight
+        """
+        media_type = request.content_type.split(";")[0].strip()
+        schedule_format = SCHEDULE_MEDIA_TYPES.get(media_type)
+        if schedule_format is None:
+            raise UnsupportedMediaType(media_type)
+        try:
+            report = import_schedule(
+                request.stream,
+                schedule_format,
+                dry_run=request.query_params.get("dry_run") == "true",
+            )
+        except ScheduleFileError as error:
+            return Response(error.report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -315,6 +715,53 @@ class FlightViewSet(
                 type={"type": "list", "items": {"type": "number"}},
                 description="Filter by crew id (ex. ?crew=2,5)",
             ),
+            OpenApiParameter(
+                "source_cities",
+                type={"type": "list", "items": {"type": "number"}},
+                description=(
+                    "Filter by source city id (ex. ?source_cities=2,5)"
+                ),
+            ),
+            OpenApiParameter(
+                "destination_cities",
+                type={"type": "list", "items": {"type": "number"}},
+                description=(
+                    "Filter by destination city id "
+                    "(ex. ?destination_cities=2,5)"
+                ),
+            ),
+            OpenApiParameter(
+                "departure_date_from",
+                type=OpenApiTypes.DATE,
+                description=(
+                    "Filter by departure on or after the date "
+                    "(ex. ?departure_date_from=2024-07-01)"
+                ),
+            ),
+            OpenApiParameter(
+                "departure_date_to",
+                type=OpenApiTypes.DATE,
+                description=(
+                    "Filter by departure on or before the date "
+                    "(ex. ?departure_date_to=2024-07-07)"
+                ),
+            ),
+            OpenApiParameter(
+                "arrival_date_from",
+                type=OpenApiTypes.DATE,
+                description=(
+                    "Filter by arrival on or after the date "
+                    "(ex. ?arrival_date_from=2024-07-01)"
+                ),
+            ),
+            OpenApiParameter(
+                "arrival_date_to",
+                type=OpenApiTypes.DATE,
+                description=(
+                    "Filter by arrival on or before the date "
+                    "(ex. ?arrival_date_to=2024-07-07)"
+                ),
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -327,21 +774,20 @@ class OrderPagination(PageNumberPagination):
 
 
 class OrderViewSet(
+    ReplicaReadMixin,
+    QueryPlanMixin,
     viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
 ):
-    queryset = Order.objects.prefetch_related(
-        "tickets__flight__route",
-        "tickets__flight__airplane",
-        "tickets__flight__crew"
-    )
+    queryset = Order.objects.all()
     serializer_class = OrderSerializer
     pagination_class = OrderPagination
     permission_classes = (IsAuthenticated,)
+    pin_reads_after_write = True
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return self.queryset.filter(user=self.request.user)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -349,4 +795,109 @@ class OrderViewSet(
         return OrderSerializer
 
     def perform_create(self, serializer):
-        serializer.save()
+        serializer.save(user=self.request.user)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "output",
+                type=OpenApiTypes.STR,
+                enum=list(EXPORT_FORMATS),
+                description="Export format, csv (default) or ndjson",
+            ),
+            OpenApiParameter(
+                "created_from",
+                type=OpenApiTypes.DATE,
+                description=(
+                    "Orders created on or after the date "
+                    "(ex. ?created_from=2024-07-01)"
+                ),
+            ),
+            OpenApiParameter(
+                "created_to",
+                type=OpenApiTypes.DATE,
+                description=(
+                    "Orders created on or before the date "
+                    "(ex. ?created_to=2024-07-31)"
+                ),
+            ),
+        ],
+        responses={
+            (200, media_type): OpenApiTypes.STR
+            for media_type in EXPORT_FORMATS.values()
+        },
+    )
+    @action(methods=["GET"], detail=False, permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        Endpoint for streaming the tickets of all orders with their
+        flight and route as CSV or NDJSON
+        """
+        params = request.query_params
+        export_format = params.get("output", "csv")
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"output": f"Must be one of: {', '.join(EXPORT_FORMATS)}"}
+            )
+        queryset = Ticket.objects.all()
+        for param, lookup, days in (
+            ("created_from", "order__created_at__gte", 0),
+            ("created_to", "order__created_at__lt", 1),
+        ):
+            if params.get(param):
+                queryset = queryset.filter(
+                    **{lookup: param_to_datetime(params[param], param, days)}
+                )
+        return export_response(
+            request._request,
+            queryset,
+            export_format,
+            f"orders-{timezone.now():%Y%m%d}",
+        )
+
+
+class SeatHoldViewSet(
+    ReplicaReadMixin,
+    viewsets.GenericViewSet,
+    mixins.ListModelMixin,
+    mixins.DestroyModelMixin,
+):
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    permission_classes = (IsAuthenticated,)
+    pin_reads_after_write = True
+
+    def get_queryset(self):
+        """Retrieve the active seat holds of the current user"""
+        return self.queryset.filter(
+            user=self.request.user, expires_at__gt=timezone.now()
+        )
+
+    @extend_schema(request=None, responses=OrderSerializer)
+    @action(methods=["POST"], detail=False)
+    def checkout(self, request):
+        """Endpoint for converting the active seat holds into an order"""
+        holds = list(self.get_queryset())
+        if not holds:
+            return Response(
+                {"detail": "There are no active seat holds to check out."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = OrderSerializer(
+            data={
+                "tickets": [
+                    {
+                        "flight": hold.flight_id,
+                        "row": hold.row,
+                        "seat": hold.seat,
+                    }
+                    for hold in holds
+                ]
+            },
+            context=self.get_serializer_context(),
+        )
+        serializer.is_valid(raise_exception=True)
+        # OrderSerializer.create releases the holds on the ordered seats
+        serializer.save(user=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -44,6 +45,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "airport.query_stats.QueryStatsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -85,6 +87,65 @@ DATABASES = {
     }
 }
 
+# Connection pooling (psycopg 3) or persistent connections,
+# either way connections are health-checked before reuse
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+if os.environ.get("POSTGRES_POOL", "").lower() in ("1", "true", "yes"):
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("POSTGRES_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("POSTGRES_POOL_MAX_SIZE", 10)),
+            "max_lifetime": float(
+                os.environ.get("POSTGRES_POOL_MAX_LIFETIME", 60 * 30)
+            ),
+            "timeout": float(os.environ.get("POSTGRES_POOL_TIMEOUT", 10)),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(
+        os.environ.get("POSTGRES_CONN_MAX_AGE", 60)
+    )
+
+# Read replicas, comma-separated hosts with the same credentials.
+# Listing the primary host gives a second alias of the same instance.
+REPLICA_DATABASES = []
+for index, host in enumerate(
+    filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(",")),
+    start=1,
+):
+    REPLICA_DATABASES.append(f"replica_{index}")
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["airport.db_router.ReplicaRouter"]
+
+# Order reads of a user stay on the primary this long after their write
+READ_YOUR_WRITES_WINDOW = timedelta(seconds=30)
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# The versions of the itinerary graph, ETags, response cache groups,
+# cached users and revoked tokens are read by every worker process, so
+# more than one worker needs the shared Redis cache. Without REDIS_URL
+# each process has its own memory cache, for runserver and tests.
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -123,24 +184,49 @@ STATIC_URL = "static/"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = "/vol/web/media"
+# Cache lifetime of media names without a digest, see airport.media
+MEDIA_CACHE_MAX_AGE = 60 * 60
+# "x-accel-redirect" (nginx) or "x-sendfile" (Apache, lighttpd) hands
+# media files to the web server instead of streaming them from Python
+MEDIA_OFFLOAD = os.environ.get("MEDIA_OFFLOAD", "")
+# Internal nginx location aliased to MEDIA_ROOT for X-Accel-Redirect
+MEDIA_OFFLOAD_LOCATION = os.environ.get(
+    "MEDIA_OFFLOAD_LOCATION", "/protected-media/"
+)
+
+# Threads resizing uploaded images into variants, see airport.images
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", 2))
+# Resize right after the upload commits, without the worker pool
+IMAGE_PROCESSING_EAGER = False
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Memory-mapped file with the request counters of the throttles, shared
+# by the worker processes of the host, see airport.throttling
+THROTTLE_STORE_PATH = os.environ.get(
+    "THROTTLE_STORE_PATH",
+    os.path.join(tempfile.gettempdir(), "airport-throttle.bin"),
+)
+THROTTLE_STORE_SLOTS = 65536
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "airport.throttling.SlidingWindowAnonRateThrottle",
+        "airport.throttling.SlidingWindowUserRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "10/minute", "user": "30/minute"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": os.environ.get("THROTTLE_ANON_RATE", "10/minute"),
+        "user": os.environ.get("THROTTLE_USER_RATE", "30/minute"),
+    },
     "DEFAULT_PERMISSION_CLASSES": [
         "airport.permissions.IsAdminOrIfAuthenticatedReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
 }
 
@@ -160,5 +246,49 @@ SPECTACULAR_SETTINGS = {
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
-    "ROTATE_REFRESH_TOKENS": False,
+    "ROTATE_REFRESH_TOKENS": True,
+    "TOKEN_REFRESH_SERIALIZER": (
+        "user.serializers.RotatingTokenRefreshSerializer"
+    ),
+    "TOKEN_VERIFY_SERIALIZER": (
+        "user.serializers.RevocationTokenVerifySerializer"
+    ),
 }
+
+# Bloom filter of revoked token ids in every process, synced from the
+# database when a process sharing the cache revokes a token through
+# token/revoke/, rotated refresh tokens and the rest every interval in
+# seconds, see user.revocation
+REVOKED_TOKEN_FILTER_CAPACITY = 100_000
+REVOKED_TOKEN_FILTER_ERROR_RATE = 0.001
+REVOKED_TOKEN_SYNC_INTERVAL = 10
+
+# Users of JWT-authenticated requests kept in every process, entries
+# are dropped on save in every process sharing the cache and expire
+# after the timeout in seconds elsewhere, see user.authentication
+AUTH_USER_CACHE_MAX_ENTRIES = 1024
+AUTH_USER_CACHE_TIMEOUT = 10
+
+SEAT_HOLD_TTL = timedelta(minutes=10)
+# Active seat holds of a single user across all flights
+SEAT_HOLD_MAX_SEATS = 10
+
+ITINERARY_MAX_LEGS = 3
+ITINERARY_MIN_CONNECTION = timedelta(minutes=45)
+ITINERARY_MAX_CONNECTION = timedelta(hours=24)
+
+# Flight and route lists built from values_list() rows, see
+# airport.values_serializers
+VALUES_SERIALIZERS = True
+
+RESPONSE_CACHE_MAX_ENTRIES = 256
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+# X-DB-Query-Count, X-DB-Duplicate-Queries, X-DB-Similar-Queries and
+# X-DB-Time-Ms response headers, requests above the threshold are logged
+QUERY_STATS_HEADERS = bool(os.environ.get("QUERY_STATS_HEADERS", DEBUG))
+QUERY_STATS_WARNING_THRESHOLD = 50
+
+# Log the queries serializers run beyond their planned queryset, see
+# airport.query_planner
+QUERY_PLAN_WARNINGS = bool(os.environ.get("QUERY_PLAN_WARNINGS", DEBUG))
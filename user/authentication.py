@@ -0,0 +1,101 @@
+import copy
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from airport.response_cache import LRUCache
+
+USER_CACHE_PREFIX = "user:principal"
+
+
+class UserCache:
+    """
+    Process-local cache of authenticated users with a TTL.
+    Entries are keyed by user id and a per-user version token in the
+    default cache. With the shared cache (REDIS_URL) saving a user in
+    one process makes every process load it again, with the memory
+    cache other processes only load it once their entry expires.
+    """
+
+    def __init__(self, max_size, timeout):
+        self.local = LRUCache(max_size)
+        self.timeout = timeout
+
+    @staticmethod
+    def version_key(user_id):
+        return f"{USER_CACHE_PREFIX}:version:{user_id}"
+
+    def user_version(self, user_id):
+        key = self.version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    def get(self, user_id):
+        """Copy of the cached user, None when missing or expired"""
+        entry = self.local.get((user_id, self.user_version(user_id)))
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            return None
+        # Requests never share one instance and its cached relations
+        return copy.copy(user)
+
+    def set(self, user):
+        self.local.set(
+            (user.pk, self.user_version(user.pk)),
+            (time.monotonic() + self.timeout, copy.copy(user)),
+        )
+
+    def invalidate(self, user_id):
+        """New version for the user once the transaction commits"""
+        transaction.on_commit(
+            lambda: cache.set(
+                self.version_key(user_id), uuid.uuid4().hex, None
+            )
+        )
+
+    def clear(self):
+        self.local.clear()
+
+
+user_cache = UserCache(
+    settings.AUTH_USER_CACHE_MAX_ENTRIES, settings.AUTH_USER_CACHE_TIMEOUT
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication resolving the user of the token from user_cache,
+    the user table is only read on a miss.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or api_settings.USER_ID_FIELD != "id":
+            return super().get_user(validated_token)
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user)
+            return user
+
+        # Inactive users are never cached. A token not matching the
+        # cached password hash may have been issued after a password
+        # change, the user is loaded again before rejecting it.
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            user = super().get_user(validated_token)
+            user_cache.set(user)
+        return user
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from user.revocation import prune_revoked_tokens
+
+
+class Command(BaseCommand):
+    """Deletes revoked tokens that expired and can no longer be used"""
+
+    help = "Delete expired revoked tokens"
+
+    def handle(self, *args, **options):
+        deleted = prune_revoked_tokens()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired revoked token(s)")
+        )
@@ -0,0 +1,184 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from user.models import RevokedToken
+
+REVOCATION_VERSION_KEY = "user:revoked_tokens:version"
+# Rows are loaded again for this long after their revoked_at, so rows
+# committed after a later one are not missed
+REVOCATION_SYNC_OVERLAP = timedelta(minutes=1)
+
+
+class BloomFilter:
+    """
+    Bit array answering "maybe present" or "certainly absent".
+    count is the number of insertions, an upper bound of the values in
+    it, so a value that hits set bits still counts towards the capacity.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(
+            int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8
+        )
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [
+            (first + index * second) % self.size
+            for index in range(self.hashes)
+        ]
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def contains_positions(self, positions):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in positions
+        )
+
+    def __contains__(self, value):
+        return self.contains_positions(self.positions(value))
+
+
+class RevocationFilter:
+    """
+    Process-local Bloom filter of the revoked token ids.
+    Rows revoked since the last sync are loaded when the version in the
+    shared cache changes or every sync_interval seconds. Only explicit
+    revocations change the version, refresh tokens rotated by another
+    process are loaded on the interval. A token id
+    missing from the filter is not revoked, only filter hits are
+    confirmed with a query.
+    The version only reaches other processes through a cache they share
+    (REDIS_URL). With the per-process cache a token revoked by another
+    process is accepted for up to sync_interval seconds.
+    """
+
+    def __init__(self, capacity, error_rate, sync_interval):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.filter = BloomFilter(self.capacity, self.error_rate)
+        self.synced_until = None
+        self.version = None
+        self.synced_at = None
+
+    def sync(self):
+        version = cache.get(REVOCATION_VERSION_KEY)
+        if (
+            self.synced_at is not None
+            and version == self.version
+            and time.monotonic() - self.synced_at < self.sync_interval
+        ):
+            return
+        with self.lock:
+            self.synced_until = self.load(self.filter, self.synced_until)
+            if self.filter.count > self.filter.capacity:
+                # Grow and reload, expired rows leave the filter as well.
+                # Checks without the lock use the old filter until the
+                # new one is complete.
+                self.capacity = self.filter.count * 2
+                bloom = BloomFilter(self.capacity, self.error_rate)
+                self.synced_until = self.load(bloom, None)
+                self.filter = bloom
+            self.version = version
+            self.synced_at = time.monotonic()
+
+    def load(self, bloom, synced_until):
+        """
+        Add the rows revoked since synced_until to bloom, all of them
+        when it is None. Returns the time to sync from next.
+        """
+        started = timezone.now()
+        rows = RevokedToken.objects.filter(expires_at__gt=started)
+        if synced_until is not None:
+            rows = rows.filter(
+                revoked_at__gte=synced_until - REVOCATION_SYNC_OVERLAP
+            )
+        for jti in rows.values_list("jti", flat=True).iterator():
+            bloom.add(jti)
+        return started
+
+    def add(self, jti):
+        with self.lock:
+            self.filter.add(jti)
+
+    def is_revoked(self, jti):
+        self.sync()
+        if jti not in self.filter:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+
+revocation_filter = RevocationFilter(
+    settings.REVOKED_TOKEN_FILTER_CAPACITY,
+    settings.REVOKED_TOKEN_FILTER_ERROR_RATE,
+    settings.REVOKED_TOKEN_SYNC_INTERVAL,
+)
+
+
+def is_revoked(token):
+    return revocation_filter.is_revoked(token[api_settings.JTI_CLAIM])
+
+
+def revoke(token, notify=False):
+    """
+    Record the token as revoked. Returns False when it already was,
+    e.g. by a concurrent refresh with the same token.
+    With notify every process loads it on its next check, otherwise
+    within REVOKED_TOKEN_SYNC_INTERVAL seconds, which spares them a
+    load query after every rotated refresh token.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(
+                jti=jti, expires_at=datetime_from_epoch(token["exp"])
+            )
+    except IntegrityError:
+        return False
+    revocation_filter.add(jti)
+    if notify:
+        bump_revocation_version()
+    return True
+
+
+def bump_revocation_version():
+    """Make every process load the new rows on its next check"""
+    transaction.on_commit(
+        lambda: cache.set(REVOCATION_VERSION_KEY, time.time_ns(), None)
+    )
+
+
+def prune_revoked_tokens():
+    """
+    Delete the rows of expired tokens, the filters drop them when they
+    grow and reload
+    """
+    deleted, _ = RevokedToken.objects.filter(
+        expires_at__lte=timezone.now()
+    ).delete()
+    return deleted
@@ -1,5 +1,15 @@
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import (
+    TokenRefreshSerializer,
+    TokenVerifySerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
+
+from user.revocation import is_revoked, revoke
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -22,3 +32,41 @@ class UserSerializer(serializers.ModelSerializer):
             user.save()
 
         return user
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh rejecting revoked tokens. With ROTATE_REFRESH_TOKENS the
+    given token is revoked, so it can be used only once.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        if is_revoked(refresh):
+            raise TokenError(_("Token is revoked"))
+
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if not revoke(refresh):
+                raise TokenError(_("Token is revoked"))
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+        return data
+
+
+class RevocationTokenVerifySerializer(TokenVerifySerializer):
+    def validate(self, attrs):
+        token = UntypedToken(attrs["token"])
+        if api_settings.JTI_CLAIM in token and is_revoked(token):
+            raise TokenError(_("Token is revoked"))
+        return {}
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    refresh = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        revoke(RefreshToken(attrs["refresh"]), notify=True)
+        return {}
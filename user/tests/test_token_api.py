@@ -0,0 +1,186 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.throttling import get_throttle_store
+from user.models import RevokedToken
+from user.revocation import (
+    REVOCATION_VERSION_KEY,
+    BloomFilter,
+    RevocationFilter,
+    bump_revocation_version,
+    revocation_filter,
+)
+
+REFRESH_URL = reverse("user:token_refresh")
+VERIFY_URL = reverse("user:token_verify")
+REVOKE_URL = reverse("user:token_revoke")
+
+
+def revoked_token_queries(queries):
+    table = RevokedToken._meta.db_table
+    return [query["sql"] for query in queries if table in query["sql"]]
+
+
+class TokenRevocationApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_throttle_store().clear()
+        revocation_filter.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.refresh = str(RefreshToken.for_user(self.user))
+
+    def post(self, url, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(url, data)
+        return res, revoked_token_queries(queries)
+
+    def test_refresh_rotates_token(self):
+        res, _ = self.post(REFRESH_URL, {"refresh": self.refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("access", res.data)
+        self.assertNotEqual(res.data["refresh"], self.refresh)
+        res, _ = self.post(REFRESH_URL, {"refresh": res.data["refresh"]})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_rotated_token_rejected(self):
+        self.post(REFRESH_URL, {"refresh": self.refresh})
+
+        res, _ = self.post(REFRESH_URL, {"refresh": self.refresh})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        res, _ = self.post(VERIFY_URL, {"token": self.refresh})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoke(self):
+        res, _ = self.post(REVOKE_URL, {"refresh": self.refresh})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res, _ = self.post(REFRESH_URL, {"refresh": self.refresh})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        res, _ = self.post(REVOKE_URL, {"refresh": self.refresh})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_checks_skip_database_for_valid_tokens(self):
+        access = str(RefreshToken.for_user(self.user).access_token)
+        self.post(VERIFY_URL, {"token": access})
+
+        res, queries = self.post(VERIFY_URL, {"token": self.refresh})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, [])
+
+        res, queries = self.post(REFRESH_URL, {"refresh": self.refresh})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0].startswith("INSERT"))
+
+    def test_filter_hit_confirmed_in_database(self):
+        self.post(VERIFY_URL, {"token": self.refresh})
+        revocation_filter.add(RefreshToken(self.refresh)["jti"])
+
+        res, queries = self.post(VERIFY_URL, {"token": self.refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+
+    def test_revocation_in_other_process_synced(self):
+        self.post(VERIFY_URL, {"token": self.refresh})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RevokedToken.objects.create(
+                jti=RefreshToken(self.refresh)["jti"],
+                expires_at=timezone.now() + timedelta(days=1),
+            )
+            bump_revocation_version()
+
+        res, _ = self.post(VERIFY_URL, {"token": self.refresh})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_only_explicit_revocation_changes_version(self):
+        self.post(REFRESH_URL, {"refresh": self.refresh})
+        self.assertIsNone(cache.get(REVOCATION_VERSION_KEY))
+
+        other = str(RefreshToken.for_user(self.user))
+        self.post(REVOKE_URL, {"refresh": other})
+        self.assertIsNotNone(cache.get(REVOCATION_VERSION_KEY))
+
+    def test_grown_filter_swapped_in_once_loaded(self):
+        now = timezone.now()
+        RevokedToken.objects.create(
+            jti="first", expires_at=now + timedelta(days=1)
+        )
+        revocations = RevocationFilter(2, 0.01, 0)
+        revocations.sync()
+        for number in range(4):
+            RevokedToken.objects.create(
+                jti=f"token-{number}", expires_at=now + timedelta(days=1)
+            )
+        checked = []
+        load = revocations.load
+
+        def checking_load(bloom, synced_until):
+            # A check without the lock while the new filter is loaded
+            checked.append("first" in revocations.filter)
+            return load(bloom, synced_until)
+
+        revocations.load = checking_load
+        revocations.sync()
+
+        self.assertEqual(checked, [True, True])
+        self.assertGreater(revocations.filter.capacity, 2)
+        self.assertIn("token-3", revocations.filter)
+
+    def test_prune_revoked_tokens(self):
+        now = timezone.now()
+        RevokedToken.objects.create(
+            jti="expired", expires_at=now - timedelta(minutes=1)
+        )
+        RevokedToken.objects.create(
+            jti="active", expires_at=now + timedelta(days=1)
+        )
+
+        out = StringIO()
+        call_command("prune_revoked_tokens", stdout=out)
+
+        self.assertIn("Deleted 1 expired", out.getvalue())
+        self.assertEqual(
+            list(RevokedToken.objects.values_list("jti", flat=True)),
+            ["active"],
+        )
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        values = [f"token-{number}" for number in range(1000)]
+        for value in values:
+            bloom.add(value)
+
+        self.assertTrue(all(value in bloom for value in values))
+        false_positives = sum(
+            f"other-{number}" in bloom for number in range(10000)
+        )
+        self.assertLess(false_positives, 300)
+
+    def test_every_insert_counted(self):
+        bloom = BloomFilter(10, 0.5)
+        for number in range(100):
+            bloom.add(f"token-{number}")
+
+        self.assertEqual(bloom.count, 100)
@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.throttling import get_throttle_store
+from user.authentication import user_cache
+
+ME_URL = reverse("user:manage")
+AIRPORT_URL = reverse("airport:airport-list")
+
+
+def user_queries(queries):
+    table = get_user_model()._meta.db_table
+    return [query for query in queries if table in query["sql"]]
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_throttle_store().clear()
+        user_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        token = self.client.post(
+            reverse("user:token_obtain_pair"),
+            {"email": "test@test.com", "password": "testpass"},
+        ).data["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+        return res, user_queries(queries)
+
+    def test_user_loaded_once(self):
+        res, queries = self.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+
+        for url in (ME_URL, AIRPORT_URL):
+            res, queries = self.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(queries, [])
+        self.assertEqual(res.wsgi_request.user, self.user)
+
+    def test_update_through_me_reloads_user(self):
+        self.get(ME_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(ME_URL, {"email": "new@test.com"})
+
+        res, queries = self.get(ME_URL)
+        self.assertEqual(res.data["email"], "new@test.com")
+        self.assertEqual(len(queries), 1)
+
+    def test_staff_change_applies_to_next_request(self):
+        res, _ = self.get(AIRPORT_URL)
+        self.assertFalse(res.wsgi_request.user.is_staff)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_staff = True
+            self.user.save()
+
+        res, _ = self.get(AIRPORT_URL)
+        self.assertTrue(res.wsgi_request.user.is_staff)
+
+    def test_deactivated_user_rejected(self):
+        self.get(ME_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        res, _ = self.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_requests_do_not_share_instances(self):
+        first, _ = self.get(ME_URL)
+        second, _ = self.get(ME_URL)
+
+        self.assertIsNot(first.wsgi_request.user, second.wsgi_request.user)
+
+    # override_settings rebinds the module attribute, the modules that
+    # imported api_settings keep this instance
+    @mock.patch.object(api_settings, "CHECK_REVOKE_TOKEN", True)
+    def test_token_after_password_change_in_other_process(self):
+        old_token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {old_token}")
+        self.get(ME_URL)
+
+        # Changed without invalidating the entry of this process
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            password=make_password("newpass")
+        )
+        self.user.refresh_from_db()
+        new_token = AccessToken.for_user(self.user)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {new_token}")
+        res, _ = self.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {old_token}")
+        res, _ = self.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
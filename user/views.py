@@ -1,8 +1,9 @@
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.views import TokenViewBase
 
-from user.serializers import UserSerializer
+from user.authentication import CachedJWTAuthentication
+from user.serializers import TokenRevokeSerializer, UserSerializer
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -11,8 +12,14 @@ class CreateUserView(generics.CreateAPIView):
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
         return self.request.user
+
+
+class TokenRevokeView(TokenViewBase):
+    """Revoke a refresh token, e.g. on logout"""
+
+    serializer_class = TokenRevokeSerializer